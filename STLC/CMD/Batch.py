@@ -0,0 +1,173 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from hashlib import sha256
+from pathlib import Path
+from typing import Iterable, Optional
+
+from lark import Lark, UnexpectedToken
+
+from STLC.Parser.Parser import (
+    load_fused_grammar,
+    parse_string_to_ast,
+    ParserError,
+    LarkLoadError,
+    cache_directory,
+)
+from STLC.Checker.Checks import non_type_checks
+from STLC.Checker.Incremental import IncrementalChecker, CheckCache
+from STLC.Parser.Binary import parse_cached
+from STLC.SymbolTable import SymbolTable
+
+# Checks many files at once for CI: parse and `non_type_checks` of every
+# file, fanned out on a process pool. Reports come back in the order of
+# the files, so the output doesn't depend on scheduling. With
+# `incremental` every file keeps its own `CheckCache`, so a worker never
+# shares a cache file with another one. With `ast_cache` the parsed
+# statements are kept in the binary format of `STLC.Parser.Binary`, an
+# unchanged file isn't parsed again.
+
+SOURCE_SUFFIX = ".stlc"
+
+
+@dataclass
+class FileReport:
+    path: str
+    # The `pretty` of every error found, in the order they were found
+    errors: list[str] = field(default_factory=list)
+
+    def pretty(self) -> str:
+        return "\n".join([f"{self.path}:"] + self.errors)
+
+
+def collect_files(paths: Iterable[str]) -> list[Path]:
+    # Files are taken as given, directories are searched recursively for
+    # `.stlc` files. Sorted and without repetitions.
+    found: set[Path] = set()
+    for path in map(Path, paths):
+        if path.is_dir():
+            found.update(
+                p for p in path.rglob(f"*{SOURCE_SUFFIX}") if p.is_file()
+            )
+        else:
+            found.add(path)
+    return sorted(found)
+
+
+# The grammar of the current process, loaded once per worker.
+_LARK: Optional[Lark] = None
+
+
+def _load_worker_grammar() -> Lark | str:
+    global _LARK
+    if _LARK is None:
+        lark = load_fused_grammar()
+        if not isinstance(lark, Lark):
+            if isinstance(lark, LarkLoadError):
+                return lark.msg
+            return "Can't load the grammar"
+        _LARK = lark
+    return _LARK
+
+
+def parser_error_message(error: ParserError) -> str:
+    # lark keeps the expected terminals in sets, their order changes from
+    # one process to another unless they are sorted.
+    exception = error.exception
+    if isinstance(exception, UnexpectedToken):
+        # `accepts` is computed on first use and cached in `_accepts`
+        # (lark 1.3)
+        exception._accepts = sorted(getattr(exception, "accepts", None) or ())
+    for attribute in ("expected", "allowed"):
+        value = getattr(exception, attribute, None)
+        if isinstance(value, (set, frozenset)):
+            setattr(exception, attribute, sorted(value))
+    return str(exception)
+
+
+def check_cache_path(path: Path) -> Optional[Path]:
+    directory = cache_directory()
+    if directory is None:
+        return None
+    directory = directory / "checks"
+    try:
+        directory.mkdir(exist_ok=True)
+    except OSError:
+        return None
+    key = sha256(str(path.resolve()).encode("utf8")).hexdigest()
+    return directory / f"{key}.pickle"
+
+
+def check_file(
+    path: Path, incremental: bool = False, ast_cache: bool = False
+) -> FileReport:
+    report = FileReport(str(path))
+    lark = _load_worker_grammar()
+    if isinstance(lark, str):
+        report.errors.append(lark)
+        return report
+    try:
+        with open(path, "r") as file:
+            content = file.read()
+    except (OSError, UnicodeDecodeError):
+        report.errors.append(f"Can't open or read file: {path}")
+        return report
+    if incremental:
+        cache = CheckCache(check_cache_path(path))
+        result = IncrementalChecker(lark, cache, types=False).check(content)
+        if isinstance(result, ParserError):
+            report.errors.append(parser_error_message(result))
+            return report
+        cache.save()
+        report.errors.extend(error.pretty() for error in result.errors)
+        return report
+    if ast_cache:
+        statements = parse_cached(lark, path, content)
+    else:
+        statements = parse_string_to_ast(lark, content)
+    if isinstance(statements, ParserError):
+        report.errors.append(parser_error_message(statements))
+        return report
+    symbols = SymbolTable(statements)
+    for error in non_type_checks(statements, symbols):
+        report.errors.append(error.pretty())
+    return report
+
+
+def check_files(
+    paths: list[Path],
+    jobs: Optional[int] = None,
+    incremental: bool = False,
+    ast_cache: bool = False,
+) -> list[FileReport]:
+    check = partial(check_file, incremental=incremental, ast_cache=ast_cache)
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(paths)))
+    if jobs == 1:
+        return [check(path) for path in paths]
+    # Small chunks keep the workers busy when file sizes vary a lot,
+    # without paying a round trip per file.
+    chunk_size = max(1, len(paths) // (jobs * 8))
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=_load_worker_grammar
+    ) as pool:
+        return list(pool.map(check, paths, chunksize=chunk_size))
+
+
+def run_batch(
+    paths: Iterable[str],
+    jobs: Optional[int] = None,
+    incremental: bool = False,
+    ast_cache: bool = False,
+) -> int:
+    # Prints the reports of the files with errors and a summary, returns
+    # the exit code: 0 if every file passed, 1 otherwise.
+    files = collect_files(paths)
+    reports = check_files(files, jobs, incremental, ast_cache)
+    failed = [report for report in reports if report.errors]
+    for report in failed:
+        print(report.pretty())
+    print(f"{len(files)} files checked, {len(failed)} with errors.")
+    return 1 if failed else 0
@@ -0,0 +1,153 @@
+import json
+import os
+import socket
+from argparse import ArgumentParser
+from itertools import count
+from pathlib import Path
+from typing import Any, Optional
+
+# Sends requests to a running `stlc serve` (see `STLC.CMD.Server` for the
+# protocol), or handles them in this process when there is none. Only the
+# fallback imports lark and the rest of STLC, so talking to a server
+# costs little more than starting Python.
+
+
+def default_socket_path() -> Path:
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime:
+        return Path(runtime) / "stlc.sock"
+    cache = os.environ.get("XDG_CACHE_HOME")
+    base = Path(cache) if cache else Path.home() / ".cache"
+    return base / "stlc" / "stlc.sock"
+
+
+class Client:
+    def __init__(self, path: Optional[Path] = None):
+        self.path = default_socket_path() if path is None else path
+        self.connection: Optional[socket.socket] = None
+        self.reader: Any = None
+        self.session: Any = None
+        self.ids = count(1)
+        self.connect()
+
+    def connect(self) -> None:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            connection.connect(str(self.path))
+        except OSError:
+            connection.close()
+            return
+        self.connection = connection
+        self.reader = connection.makefile("rb")
+
+    @property
+    def in_process(self) -> bool:
+        return self.connection is None
+
+    def request(self, method: str, params: dict[str, Any]) -> dict[str, Any]:
+        request = {"id": next(self.ids), "method": method, "params": params}
+        if self.connection is not None:
+            try:
+                self.connection.sendall(
+                    json.dumps(request).encode("utf8") + b"\n"
+                )
+                line = self.reader.readline()
+                if line:
+                    return json.loads(line)
+            except OSError:
+                pass
+            # the server went away
+            self.close()
+        if self.session is None:
+            from STLC.CMD.Server import Session
+
+            self.session = Session()
+        return self.session.handle(request)
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.reader.close()
+            self.connection.close()
+            self.connection = None
+            self.reader = None
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+def print_response(method: str, response: dict[str, Any]) -> int:
+    if "error" in response:
+        print(response["error"])
+        return 1
+    result = response["result"]
+    if "parse_error" in result:
+        print("Error trying to parse it!")
+        print(result["parse_error"])
+        return 1
+    if method == "parse":
+        for statement in result["statements"]:
+            print(statement)
+        return 0
+    if method == "check":
+        for error in result["errors"] + result["type_errors"]:
+            print(error)
+        return 1 if result["errors"] or result["type_errors"] else 0
+    if "error" in result:
+        print(result["error"])
+        return 1
+    print(result["value"])
+    return 0
+
+
+def main() -> int:
+    parser = ArgumentParser(
+        prog="stlc-client",
+        description="Send a request to a running `stlc serve`, or handle it"
+        " in this process if there is none",
+    )
+    parser.add_argument("method", choices=["parse", "check", "evaluate"])
+    parser.add_argument(
+        "-e",
+        "--evaluate",
+        type=str,
+        metavar="name",
+        help="The definition to evaluate (for the evaluate method)",
+    )
+    parser.add_argument(
+        "--vm", action="store_true", help="Evaluate with the bytecode VM"
+    )
+    parser.add_argument(
+        "--socket",
+        type=str,
+        metavar="PATH",
+        help=f"The socket of the server (default: {default_socket_path()})",
+    )
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument(
+        "-i", "--inline", type=str, metavar="str", help="The text to send"
+    )
+    group.add_argument(
+        "-f", "--file", type=str, metavar="FILE", help="A file to send"
+    )
+    args = parser.parse_args()
+    if args.method == "evaluate" and args.evaluate is None:
+        parser.error("the evaluate method needs -e/--evaluate")
+    if args.inline is not None:
+        text = args.inline
+    else:
+        try:
+            with open(args.file, "r") as f:
+                text = f.read()
+        except OSError:
+            print("Can't open or read file: ", args.file)
+            return 1
+    params: dict[str, Any] = {"text": text}
+    if args.method == "evaluate":
+        params["name"] = args.evaluate
+        params["vm"] = args.vm
+    path = None if args.socket is None else Path(args.socket)
+    with Client(path) as client:
+        return print_response(args.method, client.request(args.method, params))
@@ -0,0 +1,425 @@
+import json
+import sys
+from dataclasses import fields
+from typing import Any, BinaryIO, Optional
+
+from lark import Lark
+
+from STLC.Parser.AST import (
+    Definition,
+    Declaration,
+    Variable,
+    Function,
+    Arrow,
+)
+from STLC.Parser.Parser import load_fused_grammar, ParserError
+from STLC.Checker.Incremental import IncrementalChecker, IncrementalResult
+from STLC.Range import LineIndex, Range
+from STLC.SpanIndex import SpanIndex
+from STLC.CMD.Batch import parser_error_message
+
+# Language server over stdio (`stlc lsp`). Documents are synced
+# incrementally and checked with an `IncrementalChecker` per document, so
+# after an edit only the edited statements are parsed and only the
+# definitions affected by them are checked again. Hover and go to
+# definition look the node up in a `SpanIndex` of the latest successful
+# parse, built on the first query after a change.
+
+# LSP error codes
+PARSE_ERROR = -32700
+INVALID_PARAMS = -32602
+METHOD_NOT_FOUND = -32601
+INVALID_REQUEST = -32600
+SERVER_NOT_INITIALIZED = -32002
+
+# DiagnosticSeverity.Error
+ERROR = 1
+
+
+def read_message(stream: BinaryIO) -> Optional[Any]:
+    # None at the end of the stream, raises `ValueError` if the message
+    # can't be decoded
+    length = None
+    while True:
+        line = stream.readline()
+        if not line:
+            return None
+        line = line.strip()
+        if not line:
+            break
+        name, _, value = line.decode("ascii").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    if length is None:
+        return None
+    return json.loads(stream.read(length))
+
+
+def write_message(stream: BinaryIO, message: Any) -> None:
+    body = json.dumps(message).encode("utf8")
+    stream.write(f"Content-Length: {len(body)}\r\n\r\n".encode("ascii"))
+    stream.write(body)
+    stream.flush()
+
+
+def error_range(error: Any) -> Range:
+    # Every error of `Checks` and `TypeChecker` has the node it reports on
+    # (or a list of them) as its first field
+    node = getattr(error, fields(error)[0].name)
+    if isinstance(node, list):
+        node = node[0]
+    return node._range
+
+
+class Document:
+    def __init__(self, uri: str, text: str, version: int, lark: Lark):
+        self.uri = uri
+        self.text = text
+        self.version = version
+        # shared with the checker, edited in place with the text
+        self.lines = LineIndex(text)
+        self.checker = IncrementalChecker(lark, lines=self.lines)
+        self.result: Optional[IncrementalResult] = None
+        self.index: Optional[SpanIndex] = None
+        self.utf16 = True
+
+    def offset(self, position: dict[str, int]) -> int:
+        starts = self.lines.line_starts
+        line, character = position["line"], position["character"]
+        if line >= len(starts):
+            return len(self.text)
+        start = starts[line]
+        end = starts[line + 1] - 1 if line + 1 < len(starts) else len(self.text)
+        if not self.utf16:
+            return min(start + character, end)
+        # characters out of the BMP are two UTF-16 code units
+        offset, units = start, 0
+        while offset < end and units < character:
+            units += 2 if ord(self.text[offset]) > 0xFFFF else 1
+            offset += 1
+        return offset
+
+    def position(self, offset: int) -> dict[str, int]:
+        line, column = self.lines.line_and_column(offset)
+        character = column - 1
+        if self.utf16:
+            character += sum(
+                1
+                for c in self.text[offset - character : offset]
+                if ord(c) > 0xFFFF
+            )
+        return {"line": line - 1, "character": character}
+
+    def range(self, start: int, end: int) -> dict[str, Any]:
+        return {"start": self.position(start), "end": self.position(end)}
+
+    def change(self, changes: list[dict[str, Any]], version: int) -> None:
+        for change in changes:
+            if "range" not in change:
+                self.text = change["text"]
+                self.lines.replace(self.text)
+            else:
+                start = self.offset(change["range"]["start"])
+                end = self.offset(change["range"]["end"])
+                self.text = self.text[:start] + change["text"] + self.text[end:]
+                self.lines.edit(start, end, change["text"])
+        self.version = version
+
+    def check(self) -> list[dict[str, Any]]:
+        result = self.checker.check(self.text)
+        self.index = None
+        if isinstance(result, ParserError):
+            # the nodes of the previous parse don't match the text anymore
+            self.result = None
+            return [self.parser_diagnostic(result)]
+        self.result = result
+        diagnostics = []
+        for error in result.errors + result.type_errors:
+            _range = error_range(error)
+            diagnostics.append(
+                {
+                    "range": self.range(
+                        _range.position_start, _range.position_end
+                    ),
+                    "severity": ERROR,
+                    "source": "stlc",
+                    "message": error.pretty(),
+                }
+            )
+        return diagnostics
+
+    def parser_diagnostic(self, error: ParserError) -> dict[str, Any]:
+        exception = error.exception
+        token = getattr(exception, "token", None)
+        if token is not None and isinstance(token.start_pos, int):
+            start, end = token.start_pos, token.end_pos
+        elif isinstance(exception.line, int) and exception.line > 0:
+            start = self.offset(
+                {"line": exception.line - 1, "character": exception.column - 1}
+            )
+            end = start + 1
+        else:
+            start = end = len(self.text)
+        end = max(min(end, len(self.text)), start)
+        return {
+            "range": self.range(start, end),
+            "severity": ERROR,
+            "source": "stlc",
+            "message": parser_error_message(error),
+        }
+
+    def span_index(self) -> Optional[SpanIndex]:
+        if self.result is None:
+            return None
+        if self.index is None:
+            self.index = SpanIndex(self.result.statements)
+        return self.index
+
+    def binder(self, index: SpanIndex, node_index: int) -> Optional[Variable]:
+        # The argument that binds the variable at `node_index`, None if
+        # it's a global
+        variable = index.nodes[node_index]
+        for ancestor in index.ancestors(node_index):
+            match ancestor:
+                case Function(argument=argument):
+                    if argument is variable or argument.name == variable.name:
+                        return argument
+                case Definition(arguments=arguments):
+                    for argument in reversed(arguments):
+                        if argument is variable:
+                            return argument
+                    for argument in reversed(arguments):
+                        if argument.name == variable.name:
+                            return argument
+        return None
+
+    def argument_type(self, definition: Definition, argument: Variable) -> str:
+        declarations = self.result.symbols.declarations_of(  # type: ignore
+            definition.name
+        )
+        if not declarations:
+            return ""
+        _type = declarations[0]._type
+        for i in definition.arguments:
+            if not isinstance(_type, Arrow):
+                return ""
+            if i is argument:
+                return f" : {_type.left.pretty()}"
+            _type = _type.right
+        return ""
+
+    def hover(self, offset: int) -> Optional[dict[str, Any]]:
+        index = self.span_index()
+        if index is None:
+            return None
+        node_index = index.find(offset)
+        if node_index < 0:
+            return None
+        node = index.nodes[node_index]
+        symbols = self.result.symbols  # type: ignore
+        if isinstance(node, Variable):
+            binder = self.binder(index, node_index)
+            if binder is None:
+                declarations = symbols.declarations_of(node.name)
+                if declarations:
+                    text = declarations[0].pretty()
+                elif symbols.is_defined(node.name):
+                    text = f"{node.name} (not declared)"
+                else:
+                    text = f"{node.name} (undefined)"
+            else:
+                text = f"{node.name} (bound at line {binder._range.line_start}, column {binder._range.column_start})"
+                for ancestor in index.ancestors(node_index):
+                    if isinstance(ancestor, Definition):
+                        if binder in ancestor.arguments:
+                            text = f"{node.name}{self.argument_type(ancestor, binder)} (argument of {ancestor.name})"
+                        break
+        elif isinstance(node, (Definition, Declaration)):
+            declarations = symbols.declarations_of(node.name)
+            if declarations:
+                text = declarations[0].pretty()
+            else:
+                text = f"{node.name} (not declared)"
+        else:
+            text = node.pretty()
+        return {
+            "contents": {"kind": "plaintext", "value": text},
+            "range": self.range(
+                node._range.position_start, node._range.position_end
+            ),
+        }
+
+    def definition(self, offset: int) -> Optional[dict[str, Any]]:
+        index = self.span_index()
+        if index is None:
+            return None
+        node_index = index.find(offset)
+        if node_index < 0:
+            return None
+        node = index.nodes[node_index]
+        if not isinstance(node, Variable):
+            return None
+        target: Any = self.binder(index, node_index)
+        if target is None:
+            symbols = self.result.symbols  # type: ignore
+            targets = symbols.definitions_of(
+                node.name
+            ) or symbols.declarations_of(node.name)
+            if not targets:
+                return None
+            target = targets[0]
+        return {
+            "uri": self.uri,
+            "range": self.range(
+                target._range.position_start, target._range.position_end
+            ),
+        }
+
+
+class LanguageServer:
+    def __init__(self, input: BinaryIO, output: BinaryIO):
+        self.input = input
+        self.output = output
+        self.lark: Optional[Lark] = None
+        self.documents: dict[str, Document] = dict()
+        self.utf16 = True
+        self.initialized = False
+        self.shutdown = False
+
+    def send(self, message: dict[str, Any]) -> None:
+        message["jsonrpc"] = "2.0"
+        write_message(self.output, message)
+
+    def notify(self, method: str, params: Any) -> None:
+        self.send({"method": method, "params": params})
+
+    def publish(self, document: Document) -> None:
+        self.notify(
+            "textDocument/publishDiagnostics",
+            {
+                "uri": document.uri,
+                "version": document.version,
+                "diagnostics": document.check(),
+            },
+        )
+
+    def error(self, id: Any, code: int, message: str) -> None:
+        self.send({"id": id, "error": {"code": code, "message": message}})
+
+    def run(self) -> int:
+        while True:
+            try:
+                message = read_message(self.input)
+            except ValueError as error:
+                self.error(
+                    None, PARSE_ERROR, f"Can't parse the message: {error}"
+                )
+                continue
+            if message is None:
+                return 1
+            if not isinstance(message, dict):
+                self.error(None, INVALID_REQUEST, "The message isn't an object")
+                continue
+            method = message.get("method", None)
+            if method == "exit":
+                return 0 if self.shutdown else 1
+            params = message.get("params", {})
+            # a malformed `params` fails where it's read
+            if "id" in message and method is not None:
+                try:
+                    self.request(message["id"], method, params)
+                except (KeyError, TypeError, AttributeError) as error:
+                    self.error(
+                        message["id"],
+                        INVALID_PARAMS,
+                        f"Invalid params for {method}: {error!r}",
+                    )
+            elif method is not None:
+                try:
+                    self.notification(method, params)
+                except (KeyError, TypeError, AttributeError) as error:
+                    print(
+                        f"Ignoring {method}, invalid params: {error!r}",
+                        file=sys.stderr,
+                    )
+
+    def request(self, id: Any, method: str, params: Any) -> None:
+        if not self.initialized and method != "initialize":
+            self.error(
+                id, SERVER_NOT_INITIALIZED, "The server is not initialized"
+            )
+            return
+        result: Any = None
+        if method == "initialize":
+            result = self.initialize(params)
+            if result is None:
+                self.error(id, INVALID_REQUEST, "Can't load the grammar")
+                return
+        elif method == "shutdown":
+            self.shutdown = True
+        elif method in ("textDocument/hover", "textDocument/definition"):
+            document = self.documents.get(params["textDocument"]["uri"], None)
+            if document is not None:
+                offset = document.offset(params["position"])
+                if method == "textDocument/hover":
+                    result = document.hover(offset)
+                else:
+                    result = document.definition(offset)
+        else:
+            self.error(id, METHOD_NOT_FOUND, f"Unknown method: {method}")
+            return
+        self.send({"id": id, "result": result})
+
+    def initialize(self, params: Any) -> Optional[dict[str, Any]]:
+        lark = load_fused_grammar()
+        if not isinstance(lark, Lark):
+            return None
+        self.lark = lark
+        self.initialized = True
+        general = params.get("capabilities", {}).get("general", {})
+        self.utf16 = "utf-32" not in general.get("positionEncodings", [])
+        return {
+            "capabilities": {
+                "positionEncoding": "utf-16" if self.utf16 else "utf-32",
+                # incremental sync
+                "textDocumentSync": {"openClose": True, "change": 2},
+                "hoverProvider": True,
+                "definitionProvider": True,
+            },
+            "serverInfo": {"name": "stlc"},
+        }
+
+    def notification(self, method: str, params: Any) -> None:
+        if not self.initialized:
+            return
+        if method == "textDocument/didOpen":
+            item = params["textDocument"]
+            document = Document(
+                item["uri"],
+                item["text"],
+                item.get("version", 0),
+                self.lark,  # type: ignore
+            )
+            document.utf16 = self.utf16
+            self.documents[item["uri"]] = document
+            self.publish(document)
+        elif method == "textDocument/didChange":
+            identifier = params["textDocument"]
+            document = self.documents.get(identifier["uri"], None)
+            if document is None:
+                return
+            document.change(
+                params["contentChanges"], identifier.get("version", 0)
+            )
+            self.publish(document)
+        elif method == "textDocument/didClose":
+            uri = params["textDocument"]["uri"]
+            if self.documents.pop(uri, None) is not None:
+                self.notify(
+                    "textDocument/publishDiagnostics",
+                    {"uri": uri, "diagnostics": []},
+                )
+
+
+def lsp_main(arguments: list[str]) -> int:
+    return LanguageServer(sys.stdin.buffer, sys.stdout.buffer).run()
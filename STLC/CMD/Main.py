@@ -1,3 +1,5 @@
+import sys
+from typing import Any, Iterable, Optional
 from pathlib import Path
 from argparse import ArgumentParser
 from pprint import pprint
@@ -11,24 +13,79 @@ from STLC.Parser.Parser import (
     ParserStageError,
     LarkLoadError,
     ParserError,
+    cache_directory,
 )
 
 from STLC.Parser.Transformation import ToAST
+from STLC.Range import LineIndex
+from STLC.Parser.AST import document
+from STLC.Pretty import render
+from STLC.Timings import Timings, recording, phase
 
 from STLC.Checker.Checks import non_type_checks
+from STLC.Checker.TypeChecker import type_checks
+from STLC.SymbolTable import SymbolTable
+from STLC.Optimizer import PASSES, optimize
+from STLC.Evaluator.Evaluator import (
+    Evaluator,
+    EvaluationError,
+    pretty_value,
+)
+from STLC.Evaluator.Bytecode import BytecodeCache, disassemble
+from STLC.Evaluator.VM import VM, pretty_vm_value
+from STLC.Core.Lowering import lower_program
+from STLC.Core.Sharing import SharingTable
+from STLC.CMD.Batch import run_batch
+from STLC.CMD.Server import serve_main
+from STLC.CMD.LanguageServer import lsp_main
+
+STAGES = ["parse", "ast", "check"]
+OUTPUTS = ["tree", "repr", "ast", "errors", "optimized"]
+DEFAULT_OUTPUTS = ["ast", "errors"]
 
 
-def from_file(symbols: list[str], path: Path) -> None:
+def from_file(
+    symbols: list[str],
+    path: Path,
+    evaluate: Optional[str] = None,
+    vm: bool = False,
+    sharing: bool = False,
+    stop_after: Optional[str] = None,
+    emit: Iterable[str] = DEFAULT_OUTPUTS,
+    width: int = 80,
+    passes: Optional[list[str]] = None,
+) -> None:
     try:
         with open(path, "r") as f:
             content = f.read()
     except OSError:
         print("Can't open or read file: ", path)
         return None
-    from_string(symbols, content)
+    from_string(
+        symbols,
+        content,
+        evaluate,
+        vm,
+        sharing,
+        stop_after,
+        emit,
+        width,
+        passes,
+    )
 
 
-def from_string(symbols: list[str], value: str) -> None:
+def from_string(
+    symbols: list[str],
+    value: str,
+    evaluate: Optional[str] = None,
+    vm: bool = False,
+    sharing: bool = False,
+    stop_after: Optional[str] = None,
+    emit: Iterable[str] = DEFAULT_OUTPUTS,
+    width: int = 80,
+    passes: Optional[list[str]] = None,
+) -> None:
+    emit = frozenset(emit)
     lark = load_grammar(False, symbols)
     if not isinstance(lark, Lark):
         match lark:
@@ -42,18 +99,79 @@ def from_string(symbols: list[str], value: str) -> None:
         print("Error trying to parse it!")
         print(parsed.exception)
         return
-    print(40 * "-", "Lark Tree", 40 * "-", "\n")
-    print(parsed.pretty())
-    tranformed = ToAST().transform(parsed)
-    print(40 * "-", "Transformed pprint", 40 * "-", "\n")
-    pprint(tranformed)
-    print(40 * "-", "Transformed pretty", 40 * "-", "\n")
-    for i in tranformed:
-        print(i.pretty())
-    print(40 * "-", "Non type errors checks", 40 * "-", "\n")
-    maybe_errors = non_type_checks(tranformed)
-    for i in maybe_errors:
-        print(i.pretty())
+    if "tree" in emit:
+        print(40 * "-", "Lark Tree", 40 * "-", "\n")
+        print(parsed.pretty())
+    if stop_after == "parse":
+        return
+    tranformed = ToAST(LineIndex(value)).transform(parsed)
+    if "repr" in emit:
+        print(40 * "-", "Transformed pprint", 40 * "-", "\n")
+        pprint(tranformed)
+    if "ast" in emit:
+        print(40 * "-", "Transformed pretty", 40 * "-", "\n")
+        for i in tranformed:
+            render(document(i), sys.stdout, width)
+            sys.stdout.write("\n")
+    if sharing:
+        print(40 * "-", "Sharing of the core", 40 * "-", "\n")
+        sharing_table = SharingTable()
+        with phase("lower_program"):
+            lower_program(tranformed, sharing_table)
+        print(sharing_table.report().pretty())
+    if stop_after == "ast":
+        return
+    table = SymbolTable(tranformed)
+    maybe_errors = non_type_checks(tranformed, table)
+    type_errors = type_checks(tranformed, table)
+    if "errors" in emit:
+        print(40 * "-", "Non type errors checks", 40 * "-", "\n")
+        for i in maybe_errors:
+            print(i.pretty())
+        print(40 * "-", "Type errors checks", 40 * "-", "\n")
+        for i in type_errors:
+            print(i.pretty())
+    if stop_after == "check":
+        return
+    if passes is not None:
+        # the entry point of the dead definitions pass is the evaluated one
+        tranformed, report = optimize(tranformed, evaluate, passes)
+        table = SymbolTable(tranformed)
+        print(40 * "-", "Optimizations", 40 * "-", "\n")
+        print(report.pretty())
+        if "optimized" in emit:
+            print(40 * "-", "Optimized program", 40 * "-", "\n")
+            for i in tranformed:
+                render(document(i), sys.stdout, width)
+                sys.stdout.write("\n")
+    if evaluate is not None:
+        print(40 * "-", "Evaluation of " + evaluate, 40 * "-", "\n")
+        if vm:
+            print(run_vm(table, evaluate))
+            return
+        with phase("evaluate"):
+            result = Evaluator(table).evaluate_global(evaluate)
+        if isinstance(result, EvaluationError):
+            print(result.pretty())
+        else:
+            print(pretty_value(result))
+
+
+def run_vm(table: SymbolTable, name: str) -> str:
+    directory = cache_directory()
+    cache = BytecodeCache(
+        None if directory is None else directory / "bytecode.pickle"
+    )
+    machine = VM(table, cache)
+    code = machine.code_of(name)
+    if code is not None:
+        print(disassemble(code))
+    with phase("evaluate"):
+        result = machine.evaluate_global(name)
+    cache.save()
+    if isinstance(result, EvaluationError):
+        return result.pretty()
+    return pretty_vm_value(result)
 
 
 def generate_arg_parser():
@@ -71,7 +189,104 @@ def generate_arg_parser():
         metavar="Lark_rule",
         help="The rule to apply",
     )
-    group = parser.add_mutually_exclusive_group(required=True)
+    parser.add_argument(
+        "-e",
+        "--evaluate",
+        nargs=1,
+        type=str,
+        required=False,
+        metavar="name",
+        help="A definition to evaluate after the checks",
+    )
+    parser.add_argument(
+        "--vm",
+        action="store_true",
+        help="Evaluate with the bytecode VM, showing the disassembled code",
+    )
+    parser.add_argument(
+        "-O",
+        "--optimize",
+        nargs="?",
+        const=",".join(PASSES),
+        metavar="PASSES",
+        help="Optimize the program after the checks, with the comma separated"
+        " PASSES of "
+        + ", ".join(PASSES)
+        + " (default: all of them). The dead definitions pass keeps the ones"
+        " used by -e/--evaluate",
+    )
+    parser.add_argument(
+        "--sharing",
+        action="store_true",
+        help="Report how many subterms of the core are structurally equal",
+    )
+    parser.add_argument(
+        "--stop-after",
+        choices=STAGES,
+        required=False,
+        help="Stop after parsing, building the AST or checking it",
+    )
+    parser.add_argument(
+        "--emit",
+        type=str,
+        required=False,
+        metavar="OUTPUTS",
+        help="Comma separated outputs to print, of "
+        + ", ".join(OUTPUTS)
+        + " (default: "
+        + ",".join(DEFAULT_OUTPUTS)
+        + ")",
+    )
+    parser.add_argument(
+        "-w",
+        "--width",
+        type=int,
+        default=80,
+        metavar="N",
+        help="The line width of the printed AST (default: 80)",
+    )
+    parser.add_argument(
+        "--timings",
+        nargs="?",
+        const="text",
+        choices=["text", "json"],
+        help="Print the time spent in every phase and check to stderr, as a"
+        " table (the default) or as JSON",
+    )
+    parser.add_argument(
+        "--timings-memory",
+        action="store_true",
+        help="Also trace the peak memory of every phase with tracemalloc"
+        " (slow)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        required=False,
+        metavar="N",
+        help="Worker processes to check PATHs with (default: one per core)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Cache the checks of PATHs between runs, only the changed"
+        " definitions (and the ones using them) are checked again",
+    )
+    parser.add_argument(
+        "--ast-cache",
+        action="store_true",
+        help="Keep the parsed PATHs in a binary cache between runs, unchanged"
+        " files aren't parsed again",
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        metavar="PATH",
+        help="Files or directories (searched for .stlc files) to parse and"
+        " check in parallel",
+    )
+    group = parser.add_mutually_exclusive_group()
     group.add_argument(
         "-i",
         "--inline",
@@ -88,20 +303,95 @@ def generate_arg_parser():
         metavar="FILE",
         help="A file to parse",
     )
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.paths and (args.inline is not None or args.file is not None):
+        parser.error("PATHs can't be used with -i/--inline or -f/--file")
+    if not args.paths and args.inline is None and args.file is None:
+        parser.error("one of -i/--inline, -f/--file or PATHs is required")
+    if not args.paths and args.incremental:
+        parser.error("--incremental can only be used with PATHs")
+    if not args.paths and args.ast_cache:
+        parser.error("--ast-cache can only be used with PATHs")
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("-j/--jobs must be at least 1")
+    if args.emit is None:
+        args.emit = DEFAULT_OUTPUTS
+    else:
+        args.emit = [i.strip() for i in args.emit.split(",") if i.strip()]
+        for output in args.emit:
+            if output not in OUTPUTS:
+                parser.error(
+                    f"unknown output {output!r} for --emit, expected some"
+                    f" of {', '.join(OUTPUTS)}"
+                )
+    if args.optimize is not None:
+        args.optimize = [
+            i.strip() for i in args.optimize.split(",") if i.strip()
+        ]
+        for name in args.optimize:
+            if name not in PASSES:
+                parser.error(
+                    f"unknown pass {name!r} for -O/--optimize, expected some"
+                    f" of {', '.join(PASSES)}"
+                )
+        if args.stop_after is not None:
+            parser.error("-O/--optimize can't be used with --stop-after")
+    if args.timings_memory and args.timings is None:
+        parser.error("--timings-memory needs --timings")
+    if args.timings is not None and args.paths and args.jobs != 1:
+        parser.error("--timings with PATHs needs -j 1, workers aren't timed")
+    if args.width < 1:
+        parser.error("-w/--width must be at least 1")
+    if args.evaluate is not None and args.stop_after is not None:
+        parser.error("-e/--evaluate can't be used with --stop-after")
+    return args
 
 
 def main():
+    if sys.argv[1:2] == ["serve"]:
+        return serve_main(sys.argv[2:])
+    if sys.argv[1:2] == ["lsp"]:
+        return lsp_main(sys.argv[2:])
+
     args = generate_arg_parser()
 
+    if args.timings is None:
+        return run(args)
+    timings = Timings(memory=args.timings_memory)
+    with recording(timings):
+        code = run(args)
+    if args.timings == "json":
+        print(timings.pretty_json(), file=sys.stderr)
+    else:
+        print(timings.pretty(), file=sys.stderr)
+    return code
+
+
+def run(args: Any) -> int:
+    if args.paths:
+        return run_batch(
+            args.paths, args.jobs, args.incremental, args.ast_cache
+        )
+
     if args.symbol is not None:
         symbols = args.symbol
     else:
         symbols = ["top"]
 
+    evaluate = args.evaluate[0] if args.evaluate is not None else None
+
+    options = (
+        evaluate,
+        args.vm,
+        args.sharing,
+        args.stop_after,
+        args.emit,
+        args.width,
+        args.optimize,
+    )
     if args.inline is not None:
-        from_string(symbols, args.inline[0])
+        from_string(symbols, args.inline[0], *options)
     else:
-        from_file(symbols, args.file[0])
+        from_file(symbols, args.file[0], *options)
 
     return 0
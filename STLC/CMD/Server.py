@@ -0,0 +1,311 @@
+import json
+import socket
+import socketserver
+import sys
+import threading
+from argparse import ArgumentParser
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, TextIO
+
+from lark import Lark
+
+from STLC.Parser.Parser import (
+    load_fused_grammar,
+    parse_string_to_ast,
+    ParserError,
+    LarkLoadError,
+)
+from STLC.Checker.Checks import non_type_checks
+from STLC.Checker.TypeChecker import type_checks
+from STLC.SymbolTable import SymbolTable
+from STLC.Evaluator.Evaluator import Evaluator, EvaluationError, pretty_value
+from STLC.Evaluator.Bytecode import BytecodeCache, CodeObject
+from STLC.Evaluator.VM import VM, pretty_vm_value
+from STLC.CMD.Client import default_socket_path
+from STLC.Parser.AST import Definition
+
+# `stlc serve`: keeps the parser and the caches loaded and answers
+# requests, one JSON object per line:
+#
+#   {"id": 1, "method": "check", "params": {"text": "a : Int; a = 1;"}}
+#
+# and answers every one of them with a line holding the same "id" and
+# either a "result" or an "error" (a string). Methods:
+#
+#   parse     {"text"} -> {"statements": [pretty of every statement]}
+#   check     {"text"} -> {"errors": [...], "type_errors": [...]}
+#   evaluate  {"text", "name", "vm": false} -> {"value"} or {"error"}
+#
+# A parse error is a result too: {"parse_error": message}. An evaluation
+# stops after `max_steps` function calls (--max-steps), so a program that
+# doesn't terminate can't keep a thread forever. The socket server has a
+# thread per connection and answers the requests of every connection in
+# order; with --stdio requests are handled on a thread pool and responses
+# may arrive in any order. Lark parsers keep state while parsing, so every
+# request takes one from a pool that outlives the connections (it only
+# loads another one when all of them are busy), the compiled code is
+# shared behind a lock.
+
+PROTOCOL_VERSION = 1
+
+MAX_STEPS = 10_000_000
+
+
+class RequestError(Exception):
+    pass
+
+
+class _SharedBytecodeCache(BytecodeCache):
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+
+    def get(self, definition: Definition) -> CodeObject:
+        with self.lock:
+            return super().get(definition)
+
+
+class Session:
+    # The warm state shared by every request.
+    def __init__(self, max_steps: Optional[int] = MAX_STEPS):
+        self.max_steps = max_steps
+        self.lock = threading.Lock()
+        self.parsers: list[Lark] = []
+        self.bytecode = _SharedBytecodeCache()
+        self.methods: dict[str, Callable[[dict[str, Any]], dict[str, Any]]] = {
+            "parse": self.parse,
+            "check": self.check,
+            "evaluate": self.evaluate,
+            "version": self.version,
+        }
+        try:
+            # the first request finds a warm parser
+            self.parsers.append(self.load_parser())
+        except RequestError:
+            pass
+
+    def load_parser(self) -> Lark:
+        lark = load_fused_grammar()
+        if not isinstance(lark, Lark):
+            if isinstance(lark, LarkLoadError):
+                raise RequestError(lark.msg)
+            raise RequestError("Can't load the grammar")
+        return lark
+
+    @contextmanager
+    def parser(self) -> Iterator[Lark]:
+        with self.lock:
+            lark = self.parsers.pop() if self.parsers else None
+        if lark is None:
+            lark = self.load_parser()
+        try:
+            yield lark
+        finally:
+            with self.lock:
+                self.parsers.append(lark)
+
+    def statements(self, params: dict[str, Any]) -> ParserError | list[Any]:
+        text = params.get("text", None)
+        if not isinstance(text, str):
+            raise RequestError('"text" must be a string')
+        with self.parser() as lark:
+            return parse_string_to_ast(lark, text)
+
+    def version(self, params: dict[str, Any]) -> dict[str, Any]:
+        return {"protocol": PROTOCOL_VERSION}
+
+    def parse(self, params: dict[str, Any]) -> dict[str, Any]:
+        statements = self.statements(params)
+        if isinstance(statements, ParserError):
+            return {"parse_error": str(statements.exception)}
+        return {"statements": [i.pretty() for i in statements]}
+
+    def check(self, params: dict[str, Any]) -> dict[str, Any]:
+        statements = self.statements(params)
+        if isinstance(statements, ParserError):
+            return {"parse_error": str(statements.exception)}
+        symbols = SymbolTable(statements)
+        return {
+            "errors": [
+                i.pretty() for i in non_type_checks(statements, symbols)
+            ],
+            "type_errors": [
+                i.pretty() for i in type_checks(statements, symbols)
+            ],
+        }
+
+    def evaluate(self, params: dict[str, Any]) -> dict[str, Any]:
+        name = params.get("name", None)
+        if not isinstance(name, str):
+            raise RequestError('"name" must be a string')
+        statements = self.statements(params)
+        if isinstance(statements, ParserError):
+            return {"parse_error": str(statements.exception)}
+        symbols = SymbolTable(statements)
+        if params.get("vm", False):
+            result = VM(symbols, self.bytecode, self.max_steps).evaluate_global(
+                name
+            )
+            if isinstance(result, EvaluationError):
+                return {"error": result.pretty()}
+            return {"value": pretty_vm_value(result)}
+        result = Evaluator(symbols, self.max_steps).evaluate_global(name)
+        if isinstance(result, EvaluationError):
+            return {"error": result.pretty()}
+        return {"value": pretty_value(result)}
+
+    def handle(self, request: Any) -> dict[str, Any]:
+        if not isinstance(request, dict):
+            return {"id": None, "error": "A request must be a JSON object"}
+        response: dict[str, Any] = {"id": request.get("id", None)}
+        method = self.methods.get(request.get("method", None), None)
+        if method is None:
+            response["error"] = f"Unknown method: {request.get('method')!r}"
+            return response
+        params = request.get("params", {})
+        if not isinstance(params, dict):
+            response["error"] = '"params" must be an object'
+            return response
+        try:
+            response["result"] = method(params)
+        except RequestError as e:
+            response["error"] = str(e)
+        except RecursionError:
+            response["error"] = "The program is too deeply nested"
+        except Exception as e:
+            # a bug, but the client still waits for an answer
+            response["error"] = f"Internal error: {type(e).__name__}: {e}"
+        return response
+
+    def handle_line(self, line: str) -> str:
+        try:
+            request = json.loads(line)
+        except (ValueError, RecursionError) as e:
+            return json.dumps({"id": None, "error": f"Invalid JSON: {e}"})
+        return json.dumps(self.handle(request))
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "_Server"
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            response = self.server.session.handle_line(line.decode("utf8"))
+            self.wfile.write(response.encode("utf8") + b"\n")
+            self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, session: Session):
+        self.session = session
+        super().__init__(path, _Handler)
+
+
+def socket_is_alive(path: Path) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        try:
+            s.connect(str(path))
+        except OSError:
+            return False
+    return True
+
+
+def serve_socket(path: Path, session: Optional[Session] = None) -> int:
+    if session is None:
+        session = Session()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        if socket_is_alive(path):
+            print(f"A server is already listening on {path}", file=sys.stderr)
+            return 1
+        path.unlink()
+    server = _Server(str(path), session)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            path.unlink()
+        except OSError:
+            pass
+    return 0
+
+
+def serve_stdio(
+    session: Optional[Session] = None,
+    input: TextIO = sys.stdin,
+    output: TextIO = sys.stdout,
+    workers: Optional[int] = None,
+) -> int:
+    if session is None:
+        session = Session()
+    lock = threading.Lock()
+
+    def answer(line: str) -> None:
+        response = session.handle_line(line)  # type: ignore
+        with lock:
+            output.write(response + "\n")
+            output.flush()
+
+    def report(future: Future) -> None:
+        # the pool would keep the exception in the discarded future
+        error = future.exception()
+        if error is not None:
+            print(f"Can't answer a request: {error!r}", file=sys.stderr)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for line in input:
+            if line.strip():
+                pool.submit(answer, line).add_done_callback(report)
+    return 0
+
+
+def serve_main(arguments: list[str]) -> int:
+    parser = ArgumentParser(
+        prog="stlc serve",
+        description="Answer parse, check and evaluate requests (one JSON"
+        " object per line) keeping the parser loaded",
+    )
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        "--socket",
+        type=str,
+        metavar="PATH",
+        help=f"The Unix socket to listen on (default: {default_socket_path()})",
+    )
+    group.add_argument(
+        "--stdio",
+        action="store_true",
+        help="Read requests from stdin and write responses to stdout",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        metavar="N",
+        help="Threads answering requests with --stdio",
+    )
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=MAX_STEPS,
+        metavar="N",
+        help="Stop an evaluation after N function calls, 0 for no limit"
+        f" (default: {MAX_STEPS})",
+    )
+    args = parser.parse_args(arguments)
+    if args.max_steps < 0:
+        parser.error("--max-steps must be at least 0")
+    session = Session(args.max_steps if args.max_steps > 0 else None)
+    if args.stdio:
+        return serve_stdio(session, workers=args.jobs)
+    path = default_socket_path() if args.socket is None else Path(args.socket)
+    return serve_socket(path, session)
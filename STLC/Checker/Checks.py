@@ -1,22 +1,29 @@
-from typing import Union, TypeVar, Generic, reveal_type, Literal
+from typing import (
+    Union,
+    TypeVar,
+    Generic,
+    reveal_type,
+    Literal,
+    Iterable,
+    Optional,
+)
 from dataclasses import dataclass
 
 from STLC.Parser.AST import (
     Definition,
     Declaration,
     Variable,
-    Expression,
-    BoolLiteral,
-    IntLiteral,
-    UnitLiteral,
-    Application,
-    OperatorApplication,
-    Function,
-    If,
-    Annotation,
 )
+from STLC.Checker.Engine import (
+    CheckEngine,
+    CheckVisitor,
+    CheckContext,
+    ErrorSink,
+)
+from STLC.SymbolTable import SymbolTable
 
 from STLC.Range import Range
+from STLC.Timings import timed
 
 T = TypeVar("T")
 CheckError = Union[
@@ -97,43 +104,114 @@ class Shadowing:
         return f"""The variable "{self.variable.name}" {range2Report(self.variable._range)} is shadowing the previous introduction of the variable: \n{msg}."""
 
 
-def declaration_and_variable_are_together(
-    statements: parserResult,
-) -> list[DeclarationNotFollowedByDefinition | DefinitionWithoutDeclaration]:
-    errors: list[
-        DeclarationNotFollowedByDefinition | DefinitionWithoutDeclaration
-    ] = []
-
-    while statements:
-        maybe_declaration = statements[0]
-        if isinstance(maybe_declaration, Declaration):
-            statements = statements[1:]
-            if statements:
-                maybe_definition = statements[0]
-                if isinstance(maybe_definition, Definition):
-                    if maybe_definition.name != maybe_declaration.name:
-                        errors.append(
-                            DeclarationNotFollowedByDefinition(
-                                maybe_declaration
-                            )
-                        )
-                        errors.append(
-                            DefinitionWithoutDeclaration(maybe_definition)
-                        )
-                    statements = statements[1:]
-                else:
-                    errors.append(
-                        DeclarationNotFollowedByDefinition(maybe_declaration)
-                    )
-            else:
-                errors.append(
-                    DeclarationNotFollowedByDefinition(maybe_declaration)
+class DeclarationPairingCheck(CheckVisitor):
+    def __init__(self):
+        self.pending_declaration: Optional[Declaration] = None
+
+    def statement(
+        self, statement: Definition | Declaration, context: CheckContext
+    ) -> None:
+        if isinstance(statement, Declaration):
+            if self.pending_declaration is not None:
+                context.sink.report(
+                    self,
+                    DeclarationNotFollowedByDefinition(
+                        self.pending_declaration
+                    ),
+                )
+            self.pending_declaration = statement
+            return
+        if self.pending_declaration is None:
+            context.sink.report(self, DefinitionWithoutDeclaration(statement))
+        elif self.pending_declaration.name != statement.name:
+            context.sink.report(
+                self,
+                DeclarationNotFollowedByDefinition(self.pending_declaration),
+            )
+            context.sink.report(self, DefinitionWithoutDeclaration(statement))
+        self.pending_declaration = None
+
+    def finish(self, context: CheckContext) -> None:
+        if self.pending_declaration is not None:
+            context.sink.report(
+                self,
+                DeclarationNotFollowedByDefinition(self.pending_declaration),
+            )
+            self.pending_declaration = None
+
+
+class MultipleDeclarationOrDefinitionCheck(CheckVisitor):
+    def finish(self, context: CheckContext) -> None:
+        for symbol in context.symbols.defined_symbols():
+            if len(symbol.definitions) > 1:
+                context.sink.report(
+                    self, MultipleDefinition(symbol.definitions)
+                )
+        for symbol in context.symbols.declared_symbols():
+            if len(symbol.declarations) > 1:
+                context.sink.report(
+                    self, MultipleDeclaration(symbol.declarations)
                 )
-        else:
-            errors.append(DefinitionWithoutDeclaration(maybe_declaration))
-            statements = statements[1:]
 
-    return errors
+
+class UndefinedVariableCheck(CheckVisitor):
+    def __init__(self):
+        self.reported: set[str] = set()
+
+    def definition(self, definition: Definition, context: CheckContext) -> None:
+        self.reported = set()
+
+    def variable(self, variable: Variable, context: CheckContext) -> None:
+        name = variable.name
+        if (
+            name in self.reported
+            or context.scope.is_bound(name)
+            or context.symbols.is_defined(name)
+        ):
+            return
+        self.reported.add(name)
+        context.sink.report(
+            self,
+            UseOfUndefinedVariable(variable, context.definition),  # type: ignore
+        )
+
+
+class ShadowingCheck(CheckVisitor):
+    def definition(self, definition: Definition, context: CheckContext) -> None:
+        # the arguments of every name, to find the later ones with the same
+        # name without comparing every pair
+        same_name: dict[str, list[Variable]] = dict()
+        for var in definition.arguments:
+            same_name.setdefault(var.name, []).append(var)
+        seen: dict[str, int] = dict()
+        for var in definition.arguments:
+            definitions = context.symbols.definitions_of(var.name)
+            if definitions:
+                context.sink.report(self, Shadowing(var, definitions))
+            index = seen.get(var.name, 0) + 1
+            seen[var.name] = index
+            for var2 in same_name[var.name][index:]:
+                context.sink.report(self, Shadowing(var, var2))
+
+    def bind(self, variable: Variable, context: CheckContext) -> None:
+        definitions = context.symbols.definitions_of(variable.name)
+        if definitions:
+            context.sink.report(self, Shadowing(variable, definitions))
+        for var2 in context.scope.lookup(variable.name):
+            context.sink.report(self, Shadowing(variable, var2))
+
+
+# Only needs the previous statement, so it can consume the output of
+# `STLC.Parser.Parser.parse_stream` directly.
+def declaration_and_variable_are_together(
+    statements: Iterable[Definition | Declaration],
+) -> list[DeclarationNotFollowedByDefinition | DefinitionWithoutDeclaration]:
+    check = DeclarationPairingCheck()
+    context = CheckContext(ErrorSink([check]))
+    for statement in statements:
+        check.statement(statement, context)
+    check.finish(context)
+    return context.sink.errors()
 
 
 def split_definitions_and_declarations(
@@ -172,99 +250,29 @@ def multiple_declarations_or_definitions(
 
 
 def no_use_of_undefined_variables(
-    definitions: dict[str, list[Definition]]
-) -> list[UseOfUndefinedVariable]:
-    errors = []
-    for name, defs in definitions.items():
-        for definition in defs:
-            free: list[Variable] = definition.free_variables()
-            for var in free:
-                if var.name not in definitions:
-                    errors.append(UseOfUndefinedVariable(var, definition))
-    return errors
-
-
-def no_shadowing_in_expression(
-    expression: Expression,
     definitions: dict[str, list[Definition]],
-    bounded_variables: list[Variable],
-) -> list[Shadowing]:
-    match expression:
-        case Variable() | BoolLiteral() | IntLiteral() | UnitLiteral():
-            return []
-        case Application(left=left, right=right):
-            return no_shadowing_in_expression(
-                left, definitions, bounded_variables
-            ) + no_shadowing_in_expression(
-                right, definitions, bounded_variables
-            )
-        case OperatorApplication(left=left, right=right):
-            return no_shadowing_in_expression(
-                left, definitions, bounded_variables
-            ) + no_shadowing_in_expression(
-                right, definitions, bounded_variables
-            )
-        case Function(argument=var, expression=expression):
-            errors: list[Shadowing] = []
-            if var.name in definitions:
-                errors.append(Shadowing(var, definitions[var.name]))
-            for var2 in bounded_variables:
-                if var.name == var2.name:
-                    errors.append(Shadowing(var, var2))
-            return errors + no_shadowing_in_expression(
-                expression, definitions, bounded_variables + [var]
-            )
-        case If(
-            condition=condition,
-            true_expression=true_expression,
-            false_expression=false_expression,
-        ):
-            return (
-                no_shadowing_in_expression(
-                    condition, definitions, bounded_variables
-                )
-                + no_shadowing_in_expression(
-                    true_expression, definitions, bounded_variables
-                )
-                + no_shadowing_in_expression(
-                    false_expression, definitions, bounded_variables
-                )
-            )
-        case Annotation(expression=expression):
-            return no_shadowing_in_expression(
-                expression, definitions, bounded_variables
-            )
-
-
-def no_shadowing_in_definition(
-    definition: Definition, definitions: dict[str, list[Definition]]
-) -> list[Shadowing]:
-    errors: list[Shadowing] = []
-    for i in range(len(definition.arguments)):
-        var = definition.arguments[i]
-        if var.name in definitions:
-            errors.append(Shadowing(var, definitions[var.name]))
-        for var2 in definition.arguments[i + 1 :]:
-            if var.name == var2.name:
-                errors.append(Shadowing(var, var2))
-    return errors + no_shadowing_in_expression(
-        definition.expression, definitions, definition.arguments
-    )
+) -> list[UseOfUndefinedVariable]:
+    return CheckEngine([UndefinedVariableCheck()]).run_definitions(definitions)
 
 
 def no_shadowing(definitions: dict[str, list[Definition]]) -> list[Shadowing]:
-    errors: list[Shadowing] = []
-    for name, defs in definitions.items():
-        for definition in defs:
-            errors += no_shadowing_in_definition(definition, definitions)
-    return errors
-
-
-def non_type_checks(statements: parserResult) -> list[CheckError]:
-    definitions, declarations = split_definitions_and_declarations(statements)
-    return (
-        declaration_and_variable_are_together(statements)
-        + multiple_declarations_or_definitions(definitions, declarations)
-        + no_use_of_undefined_variables(definitions)
-        + no_shadowing(definitions)
+    return CheckEngine([ShadowingCheck()]).run_definitions(definitions)
+
+
+# All the checks are done in a single walk of every definition, the errors
+# are returned grouped by check in this order.
+@timed("non_type_checks")
+def non_type_checks(
+    statements: parserResult, symbols: Optional[SymbolTable] = None
+) -> list[CheckError]:
+    if symbols is None:
+        symbols = SymbolTable(statements)
+    engine = CheckEngine(
+        [
+            DeclarationPairingCheck(),
+            MultipleDeclarationOrDefinitionCheck(),
+            UndefinedVariableCheck(),
+            ShadowingCheck(),
+        ]
     )
+    return engine.run_symbols(symbols)
@@ -0,0 +1,257 @@
+from typing import Any, Iterable, Optional
+from dataclasses import dataclass, field
+from time import perf_counter
+
+from STLC.Parser.AST import (
+    Definition,
+    Declaration,
+    Variable,
+    Expression,
+    BoolLiteral,
+    IntLiteral,
+    UnitLiteral,
+    Application,
+    OperatorApplication,
+    Function,
+    If,
+    Annotation,
+)
+from STLC.SymbolTable import SymbolTable
+from STLC.Timings import Timings, active
+
+
+class Scope:
+    # The variables bound at the current point of the traversal, grouped by
+    # name in the order they were bound. Binding and unbinding are O(1), so
+    # no list of bound variables is ever copied.
+    __slots__ = ("bound",)
+
+    def __init__(self):
+        self.bound: dict[str, list[Variable]] = dict()
+
+    def bind(self, variable: Variable) -> None:
+        previous = self.bound.get(variable.name, None)
+        if previous is None:
+            self.bound[variable.name] = [variable]
+        else:
+            previous.append(variable)
+
+    def unbind(self, variable: Variable) -> None:
+        previous = self.bound[variable.name]
+        previous.pop()
+        if not previous:
+            del self.bound[variable.name]
+
+    def is_bound(self, name: str) -> bool:
+        return name in self.bound
+
+    def lookup(self, name: str) -> list[Variable]:
+        return self.bound.get(name, [])
+
+
+class ErrorSink:
+    # Errors are kept per visitor and returned in the order the visitors
+    # were given to the engine, so the result doesn't depend on how the
+    # traversal interleaves them.
+    def __init__(self, visitors: list["CheckVisitor"]):
+        self.reports: dict[int, list[Any]] = {id(v): [] for v in visitors}
+        self.order = [id(v) for v in visitors]
+
+    def report(self, visitor: "CheckVisitor", error: Any) -> None:
+        self.reports[id(visitor)].append(error)
+
+    def errors(self) -> list[Any]:
+        return [error for key in self.order for error in self.reports[key]]
+
+    def errors_of(self, visitor: "CheckVisitor") -> list[Any]:
+        return self.reports[id(visitor)]
+
+
+@dataclass
+class CheckContext:
+    sink: ErrorSink
+    symbols: SymbolTable = field(default_factory=SymbolTable)
+    scope: Scope = field(default_factory=Scope)
+    definition: Optional[Definition] = None
+
+
+class CheckVisitor:
+    # Hooks called by `CheckEngine`, a check overrides the ones it needs.
+    #
+    # `statement` sees every top level statement in source order, before
+    # any definition is walked. Definitions are walked grouped by name, in
+    # order of the first definition of every name: `definition` is called
+    # with the
+    # arguments not yet in scope, `bind` for every lambda argument before
+    # it is added to the scope and `variable` for every use of a variable.
+    def statement(
+        self, statement: Definition | Declaration, context: CheckContext
+    ) -> None:
+        pass
+
+    def definition(self, definition: Definition, context: CheckContext) -> None:
+        pass
+
+    def bind(self, variable: Variable, context: CheckContext) -> None:
+        pass
+
+    def variable(self, variable: Variable, context: CheckContext) -> None:
+        pass
+
+    def finish(self, context: CheckContext) -> None:
+        pass
+
+
+class TimedVisitor(CheckVisitor):
+    # Forwards every hook to `visitor`, adding up the time spent in it. The
+    # engine only uses it while a `Timings` is recording, the walk is
+    # shared by every check so only the time of the hooks is theirs.
+    def __init__(self, visitor: CheckVisitor):
+        self.visitor = visitor
+        self.seconds = 0.0
+        self.calls = 0
+
+    def statement(
+        self, statement: Definition | Declaration, context: CheckContext
+    ) -> None:
+        start = perf_counter()
+        self.visitor.statement(statement, context)
+        self.seconds += perf_counter() - start
+        self.calls += 1
+
+    def definition(self, definition: Definition, context: CheckContext) -> None:
+        start = perf_counter()
+        self.visitor.definition(definition, context)
+        self.seconds += perf_counter() - start
+        self.calls += 1
+
+    def bind(self, variable: Variable, context: CheckContext) -> None:
+        start = perf_counter()
+        self.visitor.bind(variable, context)
+        self.seconds += perf_counter() - start
+        self.calls += 1
+
+    def variable(self, variable: Variable, context: CheckContext) -> None:
+        start = perf_counter()
+        self.visitor.variable(variable, context)
+        self.seconds += perf_counter() - start
+        self.calls += 1
+
+    def finish(self, context: CheckContext) -> None:
+        start = perf_counter()
+        self.visitor.finish(context)
+        self.seconds += perf_counter() - start
+        self.calls += 1
+
+    def record(self, timings: Timings) -> None:
+        name = f"check/{type(self.visitor).__name__}"
+        timings.record(name, self.seconds, calls=self.calls)
+
+
+class CheckEngine:
+    def __init__(self, visitors: list[CheckVisitor]):
+        self.visitors = visitors
+
+    def hooks(self) -> list[CheckVisitor]:
+        # the visitors whose hooks are called, timed while recording
+        if active() is None:
+            return self.visitors
+        return [TimedVisitor(visitor) for visitor in self.visitors]
+
+    def run(self, statements: Iterable[Definition | Declaration]) -> list[Any]:
+        return self.run_symbols(SymbolTable(statements))
+
+    def run_symbols(self, symbols: SymbolTable) -> list[Any]:
+        context = CheckContext(ErrorSink(self.visitors), symbols)
+        visitors = self.hooks()
+        for statement in symbols.statements:
+            for visitor in visitors:
+                visitor.statement(statement, context)
+        return self.check(context, visitors)
+
+    def run_definitions(
+        self,
+        definitions: dict[str, list[Definition]],
+        declarations: Optional[dict[str, list[Declaration]]] = None,
+    ) -> list[Any]:
+        symbols = SymbolTable(
+            definition for defs in definitions.values() for definition in defs
+        )
+        if declarations is not None:
+            for decls in declarations.values():
+                for declaration in decls:
+                    symbols.add(declaration)
+        context = CheckContext(ErrorSink(self.visitors), symbols)
+        return self.check(context)
+
+    def check(
+        self,
+        context: CheckContext,
+        visitors: Optional[list[CheckVisitor]] = None,
+    ) -> list[Any]:
+        if visitors is None:
+            visitors = self.hooks()
+        for symbol in context.symbols.defined_symbols():
+            for definition in symbol.definitions:
+                self.walk_definition(definition, context, visitors)
+        for visitor in visitors:
+            visitor.finish(context)
+        timings = active()
+        if timings is not None:
+            for visitor in visitors:
+                if isinstance(visitor, TimedVisitor):
+                    visitor.record(timings)
+        return context.sink.errors()
+
+    def walk_definition(
+        self,
+        definition: Definition,
+        context: CheckContext,
+        visitors: Optional[list[CheckVisitor]] = None,
+    ) -> None:
+        if visitors is None:
+            visitors = self.visitors
+        context.definition = definition
+        for visitor in visitors:
+            visitor.definition(definition, context)
+        scope = context.scope
+        for argument in definition.arguments:
+            scope.bind(argument)
+        # `(expression, False)` visits the expression,
+        # `(variable, True)` leaves the scope of a lambda argument.
+        stack: list[tuple[Expression, bool]] = [(definition.expression, False)]
+        while stack:
+            expression, leaving = stack.pop()
+            if leaving:
+                scope.unbind(expression)  # type: ignore
+                continue
+            match expression:
+                case Variable():
+                    for visitor in visitors:
+                        visitor.variable(expression, context)
+                case BoolLiteral() | IntLiteral() | UnitLiteral():
+                    pass
+                case Application(left=left, right=right) | OperatorApplication(
+                    left=left, right=right
+                ):
+                    stack.append((right, False))
+                    stack.append((left, False))
+                case Function(argument=argument, expression=body):
+                    for visitor in visitors:
+                        visitor.bind(argument, context)
+                    scope.bind(argument)
+                    stack.append((argument, True))
+                    stack.append((body, False))
+                case If(
+                    condition=condition,
+                    true_expression=true_expression,
+                    false_expression=false_expression,
+                ):
+                    stack.append((false_expression, False))
+                    stack.append((true_expression, False))
+                    stack.append((condition, False))
+                case Annotation(expression=inner):
+                    stack.append((inner, False))
+        for argument in reversed(definition.arguments):
+            scope.unbind(argument)
+        context.definition = None
@@ -0,0 +1,499 @@
+import io
+import pickle
+from dataclasses import dataclass, field
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from lark import Lark
+
+from STLC.Parser.AST import (
+    Definition,
+    Declaration,
+    Expression,
+    Function,
+    Application,
+    OperatorApplication,
+    If,
+    Annotation,
+)
+from STLC.Parser.Parser import (
+    ParserError,
+    parse_statement,
+    parse_string_to_ast,
+    split_statements,
+)
+from STLC.Checker.Engine import CheckEngine, CheckContext, ErrorSink
+from STLC.Checker.Checks import (
+    CheckError,
+    DeclarationPairingCheck,
+    MultipleDeclarationOrDefinitionCheck,
+    UndefinedVariableCheck,
+    ShadowingCheck,
+)
+from STLC.Checker.TypeChecker import TypeChecker, TypeCheckError
+from STLC.Range import LineIndex, Range
+from STLC.SymbolTable import SymbolTable
+
+# Incremental checks of a source that changes between runs.
+#
+# The text is split in statements (see `split_statements`), the AST of
+# every statement is cached by the hash of its text. The results of the
+# per definition checks (undefined variables, shadowing and the type
+# checks) are cached by the hash of the text of the definition and the
+# signatures of the top level names it depends on. A dependency of a
+# definition is every top level name among its free variables, the names
+# it binds (for shadowing) and its own name (for its declaration); the
+# signature of a name is what the checks read from it: how many times
+# it's defined and its declared type. So after an edit only the edited
+# statements are parsed, and only the edited definitions and the ones
+# using a name whose signature changed are checked again. The checks
+# over the whole program (declaration pairing, multiple definitions) are
+# linear in the number of statements and always run.
+#
+# Ranges are cached relative to the start of their statement (ASTs) or
+# definition (errors) and rebuilt over the `LineIndex` of the new text, so
+# moving a definition doesn't invalidate it. Definitions and declarations
+# mentioned by errors are cached by reference (name and index).
+
+# Bump it after any change to the cached data or to the checks.
+CHECK_CACHE_VERSION = 1
+
+
+def content_hash(text: str) -> str:
+    return sha256(text.encode("utf8")).hexdigest()
+
+
+class _RelativePickler(pickle.Pickler):
+    def __init__(
+        self,
+        file: Any,
+        base: int,
+        references: Optional[dict[int, tuple[bool, str, int]]] = None,
+        ranges: Optional[dict[int, Range]] = None,
+    ):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.base = base
+        self.references = references
+        self.ranges = ranges
+
+    def persistent_id(self, obj: Any) -> Any:
+        if type(obj) is Range:
+            if self.ranges is not None:
+                self.ranges[id(obj)] = obj
+            return (
+                obj.position_start - self.base,
+                obj.position_end - self.base,
+            )
+        if self.references is not None:
+            return self.references.get(id(obj), None)
+        return None
+
+
+class _RelativeUnpickler(pickle.Unpickler):
+    def __init__(
+        self,
+        file: Any,
+        base: int,
+        lines: LineIndex,
+        symbols: Optional[SymbolTable] = None,
+        ranges: Optional[list[Range]] = None,
+    ):
+        super().__init__(file)
+        self.base = base
+        self.lines = lines
+        self.symbols = symbols
+        self.ranges = ranges
+
+    def persistent_load(self, pid: Any) -> Any:
+        if len(pid) == 2:
+            _range = Range(pid[0] + self.base, pid[1] + self.base, self.lines)
+            if self.ranges is not None:
+                self.ranges.append(_range)
+            return _range
+        is_definition, name, index = pid
+        if is_definition:
+            statements = self.symbols.definitions_of(name)  # type: ignore
+        else:
+            statements = self.symbols.declarations_of(name)  # type: ignore
+        return statements if index < 0 else statements[index]
+
+
+def references_of(symbols: SymbolTable) -> dict[int, tuple[bool, str, int]]:
+    # How `dump_relative` refers to the statements of `symbols`, index -1
+    # is the list of all the definitions (or declarations) of a name.
+    references: dict[int, tuple[bool, str, int]] = dict()
+    for symbol in symbols.symbols.values():
+        references[id(symbol.definitions)] = (True, symbol.name, -1)
+        references[id(symbol.declarations)] = (False, symbol.name, -1)
+        for index, definition in enumerate(symbol.definitions):
+            references[id(definition)] = (True, symbol.name, index)
+        for index, declaration in enumerate(symbol.declarations):
+            references[id(declaration)] = (False, symbol.name, index)
+    return references
+
+
+def dump_relative(
+    value: Any,
+    base: int,
+    references: Optional[dict[int, tuple[bool, str, int]]] = None,
+    ranges: Optional[dict[int, Range]] = None,
+) -> bytes:
+    # `ranges` collects the ranges of `value` by id
+    buffer = io.BytesIO()
+    _RelativePickler(buffer, base, references, ranges).dump(value)
+    return buffer.getvalue()
+
+
+def load_relative(
+    data: bytes,
+    base: int,
+    lines: LineIndex,
+    symbols: Optional[SymbolTable] = None,
+    ranges: Optional[list[Range]] = None,
+) -> Any:
+    # `ranges` collects the ranges of the loaded value
+    return _RelativeUnpickler(
+        io.BytesIO(data), base, lines, symbols, ranges
+    ).load()
+
+
+def bound_names(definition: Definition) -> set[str]:
+    names = {argument.name for argument in definition.arguments}
+    stack: list[Expression] = [definition.expression]
+    while stack:
+        expression = stack.pop()
+        match expression:
+            case Application(left=left, right=right) | OperatorApplication(
+                left=left, right=right
+            ):
+                stack.append(right)
+                stack.append(left)
+            case Function(argument=argument, expression=body):
+                names.add(argument.name)
+                stack.append(body)
+            case If(
+                condition=condition,
+                true_expression=true_expression,
+                false_expression=false_expression,
+            ):
+                stack.append(false_expression)
+                stack.append(true_expression)
+                stack.append(condition)
+            case Annotation(expression=inner):
+                stack.append(inner)
+    return names
+
+
+def dependency_names(definition: Definition) -> tuple[str, ...]:
+    # Every name whose signature may change the checks of `definition`
+    names = set(definition.free_names())
+    names.update(bound_names(definition))
+    names.add(definition.name)
+    return tuple(sorted(names))
+
+
+class DependencyGraph:
+    # Edges from every top level name to the top level names its
+    # definitions depend on, and back.
+    def __init__(self):
+        self.dependencies: dict[str, set[str]] = dict()
+        self.dependents: dict[str, set[str]] = dict()
+
+    def add(self, name: str, dependencies: Iterable[str]) -> None:
+        edges = self.dependencies.setdefault(name, set())
+        for dependency in dependencies:
+            if dependency == name or dependency in edges:
+                continue
+            edges.add(dependency)
+            self.dependents.setdefault(dependency, set()).add(name)
+
+    def dependents_of(self, names: Iterable[str]) -> set[str]:
+        # `names` and every name depending on them, directly or not
+        found = set(names)
+        pending = list(found)
+        while pending:
+            for dependent in self.dependents.get(pending.pop(), ()):
+                if dependent not in found:
+                    found.add(dependent)
+                    pending.append(dependent)
+        return found
+
+
+def signature(symbols: SymbolTable, name: str) -> str:
+    declarations = symbols.declarations_of(name)
+    _type = declarations[0]._type.pretty() if declarations else "-"
+    return f"{len(symbols.definitions_of(name))}:{_type}"
+
+
+@dataclass
+class DefinitionRecord:
+    content: str
+    # signature of every dependency
+    dependencies: dict[str, str]
+
+
+class CheckCache:
+    # The cached statements, results and the records of the definitions
+    # of the last run, optionally persisted in `path`. Every run keeps
+    # only the entries it used, so the cache doesn't outgrow the source.
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+        self.statements: dict[str, bytes] = dict()
+        self.results: dict[str, bytes] = dict()
+        self.records: dict[str, DefinitionRecord] = dict()
+        if path is not None:
+            try:
+                with open(path, "rb") as f:
+                    version, statements, results, records = pickle.load(f)
+                if version == CHECK_CACHE_VERSION:
+                    self.statements = statements
+                    self.results = results
+                    self.records = records
+            except Exception:
+                pass
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        try:
+            with open(self.path, "wb") as f:
+                pickle.dump(
+                    (
+                        CHECK_CACHE_VERSION,
+                        self.statements,
+                        self.results,
+                        self.records,
+                    ),
+                    f,
+                    pickle.HIGHEST_PROTOCOL,
+                )
+        except OSError:
+            pass
+
+
+@dataclass
+class IncrementalResult:
+    statements: list[Definition | Declaration]
+    symbols: SymbolTable
+    graph: DependencyGraph
+    # in the order `non_type_checks` and `type_checks` return them
+    errors: list[CheckError] = field(default_factory=list)
+    type_errors: list[TypeCheckError] = field(default_factory=list)
+    parsed: int = 0
+    checked: int = 0
+    reused: int = 0
+    # names whose definitions changed since the last run, and every name
+    # depending on them
+    changed: set[str] = field(default_factory=set)
+    affected: set[str] = field(default_factory=set)
+
+
+class LiveStatement:
+    # The nodes of a statement kept from the previous check, with every
+    # range in them: when the statement moves they are shifted in place.
+    __slots__ = ("statements", "dependencies", "ranges", "position")
+
+    def __init__(
+        self,
+        statements: list[Any],
+        dependencies: list[tuple[str, ...]],
+        ranges: list[Range],
+        position: int,
+    ):
+        self.statements = statements
+        self.dependencies = dependencies
+        self.ranges = ranges
+        self.position = position
+
+    def move(self, position: int) -> None:
+        delta = position - self.position
+        if delta:
+            for _range in self.ranges:
+                _range.position_start += delta
+                _range.position_end += delta
+            self.position = position
+
+
+class IncrementalChecker:
+    # `lark` must be a fused parser (see `load_fused_grammar`).
+    #
+    # Every result shares `lines`, which is updated in place by every
+    # check: statements found again reuse the nodes of the previous check,
+    # shifted to their new position, nothing is loaded from the cache for
+    # them. The line numbers and positions of an old result are the ones of
+    # the latest text. A caller passing its own `lines` keeps it up to date
+    # with the text of every check.
+    def __init__(
+        self,
+        lark: Lark,
+        cache: Optional[CheckCache] = None,
+        types: bool = True,
+        lines: Optional[LineIndex] = None,
+    ):
+        self.lark = lark
+        self.cache = CheckCache() if cache is None else cache
+        self.types = types
+        self.update_lines = lines is None
+        self.lines = LineIndex() if lines is None else lines
+        # by content hash, in the order of the text
+        self.live: dict[str, list[LiveStatement]] = dict()
+
+    def parse(
+        self, text: str, lines: LineIndex
+    ) -> ParserError | tuple[list[Any], list[tuple[str, ...]], int]:
+        cached = self.cache.statements
+        used: dict[str, bytes] = dict()
+        live: dict[str, list[LiveStatement]] = dict()
+        statements: list[Any] = []
+        dependencies: list[tuple[str, ...]] = []
+        parsed = 0
+        self.lark.options.transformer.lines = lines
+        for statement in split_statements([text]):
+            key = content_hash(statement.text)
+            position = statement.position
+            entries = live.setdefault(key, [])
+            previous = self.live.get(key, ())
+            data = cached.get(key, None)
+            if len(entries) < len(previous):
+                entry = previous[len(entries)]
+                entry.move(position)
+            elif data is None:
+                result = parse_statement(self.lark, statement)
+                if isinstance(result, ParserError):
+                    return result
+                parsed += 1
+                entry = LiveStatement(
+                    result,
+                    [
+                        dependency_names(i) if isinstance(i, Definition) else ()
+                        for i in result
+                    ],
+                    [],
+                    position,
+                )
+            else:
+                ranges: list[Range] = []
+                entry = LiveStatement(
+                    *load_relative(data, position, lines, None, ranges),
+                    ranges,
+                    position,
+                )
+            if data is None:
+                found: dict[int, Range] = dict()
+                data = dump_relative(
+                    (entry.statements, entry.dependencies),
+                    position,
+                    None,
+                    found,
+                )
+                entry.ranges = list(found.values())
+            used[key] = data
+            entries.append(entry)
+            statements.extend(entry.statements)
+            dependencies.extend(entry.dependencies)
+        self.cache.statements = used
+        self.live = live
+        return (statements, dependencies, parsed)
+
+    def check(self, text: str) -> ParserError | IncrementalResult:
+        lines = self.lines
+        if self.update_lines:
+            lines.replace(text)
+        parsed = self.parse(text, lines)
+        if isinstance(parsed, ParserError):
+            # the error of a full parse, as `non_type_checks` users expect
+            full = parse_string_to_ast(self.lark, text)
+            return full if isinstance(full, ParserError) else parsed
+        statements, dependencies, parsed_count = parsed
+        symbols = SymbolTable(statements)
+        graph = DependencyGraph()
+        names_of: dict[int, tuple[str, ...]] = dict()
+        for statement, names in zip(statements, dependencies):
+            if isinstance(statement, Definition):
+                names_of[id(statement)] = names
+                graph.add(statement.name, names)
+        result = IncrementalResult(
+            statements, symbols, graph, parsed=parsed_count
+        )
+
+        pairing = DeclarationPairingCheck()
+        multiple = MultipleDeclarationOrDefinitionCheck()
+        context = CheckContext(ErrorSink([pairing, multiple]), symbols)
+        for statement in statements:
+            pairing.statement(statement, context)
+        pairing.finish(context)
+        multiple.finish(context)
+        result.errors.extend(context.sink.errors())
+
+        undefined_errors: list[Any] = []
+        shadowing_errors: list[Any] = []
+        signatures: dict[str, str] = dict()
+        records: dict[str, DefinitionRecord] = dict()
+        used: dict[str, bytes] = dict()
+        references: Optional[dict[int, tuple[bool, str, int]]] = None
+        for symbol in symbols.defined_symbols():
+            for index, definition in enumerate(symbol.definitions):
+                start = definition._range.position_start
+                content = content_hash(
+                    text[start : definition._range.position_end]
+                )
+                record = DefinitionRecord(content, dict())
+                for name in names_of[id(definition)]:
+                    if name not in signatures:
+                        signatures[name] = signature(symbols, name)
+                    record.dependencies[name] = signatures[name]
+                if index == 0:
+                    records[symbol.name] = record
+                key = content_hash(
+                    f"{CHECK_CACHE_VERSION}:{self.types}:{index}:{content}:"
+                    + ",".join(
+                        f"{k}={v}" for k, v in record.dependencies.items()
+                    )
+                )
+                data = self.cache.results.get(key, None)
+                if data is None:
+                    checks = self.check_definition(definition, symbols)
+                    if references is None:
+                        references = references_of(symbols)
+                    data = dump_relative(checks, start, references)
+                    result.checked += 1
+                else:
+                    checks = load_relative(data, start, lines, symbols)
+                    result.reused += 1
+                used[key] = data
+                undefined, shadowing, type_errors = checks
+                undefined_errors.extend(undefined)
+                shadowing_errors.extend(shadowing)
+                result.type_errors.extend(type_errors)
+        result.errors.extend(undefined_errors)
+        result.errors.extend(shadowing_errors)
+
+        result.changed = {
+            name
+            for name, record in records.items()
+            if self.cache.records.get(name, None) != record
+        } | (self.cache.records.keys() - records.keys())
+        result.affected = graph.dependents_of(result.changed)
+        self.cache.results = used
+        self.cache.records = records
+        return result
+
+    def check_definition(
+        self, definition: Definition, symbols: SymbolTable
+    ) -> tuple[list[Any], list[Any], list[Any]]:
+        undefined = UndefinedVariableCheck()
+        shadowing = ShadowingCheck()
+        context = CheckContext(ErrorSink([undefined, shadowing]), symbols)
+        CheckEngine([undefined, shadowing]).walk_definition(definition, context)
+        type_errors: list[Any] = []
+        declarations = symbols.declarations_of(definition.name)
+        if self.types and declarations:
+            checker = TypeChecker(symbols)
+            checker.check_definition(definition, declarations[0])
+            type_errors = checker.errors
+        return (
+            context.sink.errors_of(undefined),
+            context.sink.errors_of(shadowing),
+            type_errors,
+        )
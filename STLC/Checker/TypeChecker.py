@@ -0,0 +1,302 @@
+from typing import Union, Optional
+from dataclasses import dataclass
+
+from STLC.Parser.AST import (
+    Definition,
+    Declaration,
+    Variable,
+    Expression,
+    BoolLiteral,
+    IntLiteral,
+    UnitLiteral,
+    Application,
+    OperatorApplication,
+    Function,
+    If,
+    Annotation,
+)
+from STLC.Checker.Checks import range2Report
+from STLC.Checker.Types import (
+    MonoType,
+    ArrowType,
+    BOOL,
+    INT,
+    UNIT,
+    from_ast,
+)
+from STLC.SymbolTable import SymbolTable
+from STLC.Timings import timed
+from STLC.Traversal import Task, run
+
+TypeCheckError = Union[
+    "TypeMismatch",
+    "NotAFunction",
+    "FunctionWithNonArrowType",
+    "CannotInferType",
+    "TooManyArguments",
+]
+
+# operator -> (type of both arguments, type of the result)
+OPERATOR_TYPES: dict[str, tuple[MonoType, MonoType]] = {
+    "+": (INT, INT),
+    "-": (INT, INT),
+    "*": (INT, INT),
+    "/": (INT, INT),
+    "<": (INT, BOOL),
+    ">": (INT, BOOL),
+    "<=": (INT, BOOL),
+    ">=": (INT, BOOL),
+    "==": (INT, BOOL),
+    "/=": (INT, BOOL),
+    "&": (BOOL, BOOL),
+    "|": (BOOL, BOOL),
+    "~": (BOOL, BOOL),
+}
+
+
+@dataclass
+class TypeMismatch:
+    expression: Expression
+    expected: MonoType
+    found: MonoType
+
+    def pretty(self) -> str:
+        return f"""The expression "{self.expression.pretty()}" was expected to have type "{self.expected.pretty()}" but it has type "{self.found.pretty()}".\n{range2Report(self.expression._range)}."""
+
+
+@dataclass
+class NotAFunction:
+    expression: Expression
+    found: MonoType
+
+    def pretty(self) -> str:
+        return f"""The expression "{self.expression.pretty()}" is applied to an argument but it's type "{self.found.pretty()}" is not a function type.\n{range2Report(self.expression._range)}."""
+
+
+@dataclass
+class FunctionWithNonArrowType:
+    expression: Function
+    expected: MonoType
+
+    def pretty(self) -> str:
+        return f"""The function "{self.expression.pretty()}" was expected to have the non function type "{self.expected.pretty()}".\n{range2Report(self.expression._range)}."""
+
+
+@dataclass
+class CannotInferType:
+    expression: Expression
+
+    def pretty(self) -> str:
+        return f"""Can't infer the type of "{self.expression.pretty()}", add a type annotation.\n{range2Report(self.expression._range)}."""
+
+
+@dataclass
+class TooManyArguments:
+    definition: Definition
+    declaration: Declaration
+
+    def pretty(self) -> str:
+        return f"""Definition of "{self.definition.name}" has more arguments than the type "{self.declaration._type.pretty()}" allows.\n{range2Report(self.definition._range)}."""
+
+
+class TypeChecker:
+    # Bidirectional checker for the typing rules of the README: `infer`
+    # synthesizes the type of an expression and `check` pushes a known type
+    # inside, that's how unannotated lambdas get their argument types.
+    # Expressions whose type can't be known because of an error already
+    # reported (or reported by `non_type_checks`) get `None`.
+    def __init__(self, symbols: SymbolTable):
+        self.symbols = symbols
+        self.errors: list[TypeCheckError] = []
+        self.globals: dict[str, Optional[MonoType]] = dict()
+        self.locals: dict[str, list[MonoType]] = dict()
+
+    def global_type(self, name: str) -> Optional[MonoType]:
+        if name in self.globals:
+            return self.globals[name]
+        declarations = self.symbols.declarations_of(name)
+        _type = from_ast(declarations[0]._type) if declarations else None
+        self.globals[name] = _type
+        return _type
+
+    def bind(self, variable: Variable, _type: MonoType) -> None:
+        previous = self.locals.get(variable.name, None)
+        if previous is None:
+            self.locals[variable.name] = [_type]
+        else:
+            previous.append(_type)
+
+    def unbind(self, variable: Variable) -> None:
+        previous = self.locals[variable.name]
+        previous.pop()
+        if not previous:
+            del self.locals[variable.name]
+
+    def infer(self, expression: Expression) -> Optional[MonoType]:
+        return run(self.infer_task(expression))
+
+    def check(self, expression: Expression, expected: MonoType) -> None:
+        run(self.check_task(expression, expected))
+
+    # `infer` and `check` as tasks of `STLC.Traversal.run`, every recursive
+    # call is yielded so the depth of the expression doesn't matter. The
+    # type of an atom is known right away, they don't get a task.
+    def infer_task(
+        self, expression: Expression
+    ) -> Task[Optional[MonoType]] | Optional[MonoType]:
+        match expression:
+            case Variable(name=name):
+                local = self.locals.get(name, None)
+                if local is not None:
+                    return local[-1]
+                return self.global_type(name)
+            case BoolLiteral():
+                return BOOL
+            case IntLiteral():
+                return INT
+            case UnitLiteral():
+                return UNIT
+            case Function():
+                self.errors.append(CannotInferType(expression))
+                return None
+        return self.infer_composite(expression)
+
+    def infer_composite(
+        self, expression: Expression, expected: Optional[MonoType] = None
+    ) -> Task[Optional[MonoType]]:
+        # With `expected` it's also the `check` of the expression
+        _type: Optional[MonoType] = None
+        match expression:
+            case OperatorApplication(left=left, right=right, operator=op):
+                argument, _type = OPERATOR_TYPES[op]
+                yield self.check_task(left, argument)
+                yield self.check_task(right, argument)
+            case Application():
+                # `f a b c` in a single task, from `f` to `c`
+                applications: list[Application] = []
+                function: Expression = expression
+                while isinstance(function, Application):
+                    applications.append(function)
+                    function = function.left
+                _type = yield self.infer_task(function)
+                for application in reversed(applications):
+                    if _type is None:
+                        break
+                    if not isinstance(_type, ArrowType):
+                        self.errors.append(
+                            NotAFunction(application.left, _type)
+                        )
+                        _type = None
+                        break
+                    yield self.check_task(application.right, _type.left)
+                    _type = _type.right
+            case If(
+                condition=condition,
+                true_expression=true_expression,
+                false_expression=false_expression,
+            ):
+                yield self.check_task(condition, BOOL)
+                _type = yield self.infer_task(true_expression)
+                if _type is None:
+                    _type = yield self.infer_task(false_expression)
+                else:
+                    yield self.check_task(false_expression, _type)
+            case Annotation(expression=inner, annotation=annotation):
+                _type = from_ast(annotation)
+                yield self.check_task(inner, _type)
+        if expected is not None:
+            self.compare(expression, expected, _type)
+        return _type
+
+    def check_task(
+        self, expression: Expression, expected: MonoType
+    ) -> Optional[Task[None]]:
+        match expression:
+            case Variable() | BoolLiteral() | IntLiteral() | UnitLiteral():
+                found = self.infer_task(expression)
+                self.compare(expression, expected, found)  # type: ignore
+                return None
+            case Function(argument=argument, expression=body):
+                if not isinstance(expected, ArrowType):
+                    self.errors.append(
+                        FunctionWithNonArrowType(expression, expected)
+                    )
+                    return None
+                return self.check_function(argument, body, expected)
+            case If(
+                condition=condition,
+                true_expression=true_expression,
+                false_expression=false_expression,
+            ):
+                return self.check_if(
+                    condition, true_expression, false_expression, expected
+                )
+        return self.infer_composite(expression, expected)  # type: ignore
+
+    def check_function(
+        self, argument: Variable, body: Expression, expected: ArrowType
+    ) -> Task[None]:
+        self.bind(argument, expected.left)
+        yield self.check_task(body, expected.right)
+        self.unbind(argument)
+
+    def check_if(
+        self,
+        condition: Expression,
+        true_expression: Expression,
+        false_expression: Expression,
+        expected: MonoType,
+    ) -> Task[None]:
+        yield self.check_task(condition, BOOL)
+        yield self.check_task(true_expression, expected)
+        yield self.check_task(false_expression, expected)
+
+    def compare(
+        self,
+        expression: Expression,
+        expected: MonoType,
+        found: Optional[MonoType],
+    ) -> None:
+        # types are hash-consed, identity is equality
+        if found is not None and found is not expected:
+            self.errors.append(TypeMismatch(expression, expected, found))
+
+    def check_definition(
+        self, definition: Definition, declaration: Declaration
+    ) -> None:
+        # the declared types of the globals are kept by the checker while it
+        # runs, see `STLC.Checker.Types.arrow`
+        if declaration is self.symbols.declarations_of(definition.name)[0]:
+            _type = self.global_type(definition.name)
+        else:
+            _type = from_ast(declaration._type)
+        bound: list[Variable] = []
+        for argument in definition.arguments:
+            if not isinstance(_type, ArrowType):
+                self.errors.append(TooManyArguments(definition, declaration))
+                break
+            self.bind(argument, _type.left)
+            bound.append(argument)
+            _type = _type.right
+        else:
+            self.check(definition.expression, _type)
+        for argument in reversed(bound):
+            self.unbind(argument)
+
+
+# Definitions without a declaration are skipped, `non_type_checks` already
+# reports them.
+@timed("type_checks")
+def type_checks(
+    statements: list[Definition | Declaration],
+    symbols: Optional[SymbolTable] = None,
+) -> list[TypeCheckError]:
+    if symbols is None:
+        symbols = SymbolTable(statements)
+    checker = TypeChecker(symbols)
+    for symbol in symbols.defined_symbols():
+        if not symbol.declarations:
+            continue
+        for definition in symbol.definitions:
+            checker.check_definition(definition, symbol.declarations[0])
+    return checker.errors
@@ -0,0 +1,107 @@
+from typing import Any, Union
+from weakref import ref
+
+from STLC.Parser.AST import Type, BoolType, IntType, UnitType, Arrow, children
+from STLC.Traversal import fold, preorder
+
+# Types used by the type checker. Unlike the `Type` nodes of the AST they
+# don't have a range and are hash-consed: there is a single instance of
+# every type, so two types are equal only if they are the same object and
+# comparing them never walks them.
+
+
+class BaseType:
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def pretty(self) -> str:
+        return self.name
+
+    def __repr__(self) -> str:
+        return self.name
+
+    def __reduce__(self) -> str:
+        # pickled by reference to BOOL, INT or UNIT, so they stay unique
+        return self.name.upper()
+
+
+class ArrowType:
+    __slots__ = ("left", "right", "__weakref__")
+
+    def __init__(self, left: "MonoType", right: "MonoType"):
+        self.left = left
+        self.right = right
+
+    def pretty(self) -> str:
+        return "".join(
+            [item for item in preorder(self, _pieces) if type(item) is str]
+        )
+
+    def __repr__(self) -> str:
+        return f"ArrowType({self.left!r}, {self.right!r})"
+
+    def __reduce__(self):
+        return (arrow, (self.left, self.right))
+
+
+MonoType = Union[BaseType, ArrowType]
+
+BOOL = BaseType("Bool")
+INT = BaseType("Int")
+UNIT = BaseType("Unit")
+
+# The arguments of an arrow are already unique, so their ids identify the
+# arrow. The table only keeps weak references: an arrow keeps its
+# arguments alive, so the ids of a live entry can't be reused, and the
+# dead entries are dropped whenever the table doubles its size, so long
+# running servers only keep the types in use.
+_arrows: dict[tuple[int, int], "ref[ArrowType]"] = dict()
+_prune_at = 1024
+
+
+def arrow(left: MonoType, right: MonoType) -> ArrowType:
+    global _prune_at
+    key = (id(left), id(right))
+    reference = _arrows.get(key, None)
+    if reference is not None:
+        value = reference()
+        if value is not None:
+            return value
+    value = ArrowType(left, right)
+    _arrows[key] = ref(value)
+    if len(_arrows) >= _prune_at:
+        for dead in [k for k, v in _arrows.items() if v() is None]:
+            del _arrows[dead]
+        _prune_at = max(1024, 2 * len(_arrows))
+    return value
+
+
+def _pieces(item: Any) -> tuple[Any, ...]:
+    if isinstance(item, ArrowType):
+        if isinstance(item.left, ArrowType):
+            return ("(", item.left, ") -> ", item.right)
+        return (item.left, " -> ", item.right)
+    if isinstance(item, BaseType):
+        return (item.name,)
+    return ()
+
+
+def _from_ast(_type: Type, types: list[MonoType]) -> MonoType:
+    match _type:
+        case BoolType():
+            return BOOL
+        case IntType():
+            return INT
+        case UnitType():
+            return UNIT
+        case Arrow():
+            return arrow(types[0], types[1])
+    raise TypeError(_type)
+
+
+def from_ast(_type: Type) -> MonoType:
+    if isinstance(_type, Arrow):
+        return fold(_type, _from_ast, children)
+    return _from_ast(_type, [])
@@ -0,0 +1,301 @@
+from dataclasses import dataclass, field
+from typing import Any, Optional, Union
+from zlib import crc32
+
+from STLC.Range import Range
+from STLC.Traversal import preorder
+
+# Nameless core language. Variables bound by a lambda are `Local`s with
+# their De Bruijn index (0 is the innermost lambda), so resolving them is
+# O(1) and two alpha-equivalent expressions are equal (`==`) and hash the
+# same. Argument names (`hint`) and source ranges (`origin`) are kept for
+# reports but don't take part in equality or hashing. Type annotations
+# are erased.
+#
+# Every node computes its hash from the hashes of its children when it's
+# built, so hashing is O(1) and comparing two different expressions
+# almost never walks them. The hash only combines ints (names go through
+# crc32), so it's the same in every run regardless of PYTHONHASHSEED.
+
+CoreExpression = Union[
+    "Local", "Global", "Bool", "Int", "Unit", "App", "Op", "Lam", "Cond"
+]
+
+
+class CoreNode:
+    __slots__ = ()
+
+    def __hash__(self) -> int:
+        return self._hash  # type: ignore
+
+    def __eq__(self, other) -> bool:
+        if self is other:
+            return True
+        if not isinstance(other, CoreNode):
+            return NotImplemented
+        return alpha_equal(self, other)  # type: ignore
+
+    def children(self) -> tuple["CoreExpression", ...]:
+        return ()
+
+    def label(self) -> tuple:
+        # what, apart from the children, makes two nodes different
+        return ()
+
+
+LOCAL_TAG = 0
+GLOBAL_TAG = 1
+BOOL_TAG = 2
+INT_TAG = 3
+UNIT_TAG = 4
+APP_TAG = 5
+OP_TAG = 6
+LAM_TAG = 7
+COND_TAG = 8
+
+
+def _hash(*values: int) -> int:
+    return hash(values)
+
+
+def name_hash(name: str) -> int:
+    return crc32(name.encode("utf8"))
+
+
+@dataclass(frozen=True, slots=True, eq=False, repr=False)
+class Local(CoreNode):
+    index: int
+    hint: str = field(default="", compare=False)
+    origin: Optional[Range] = field(default=None, compare=False)
+    _hash: int = field(init=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "_hash", _hash(LOCAL_TAG, self.index))
+
+    def label(self) -> tuple:
+        return (self.index,)
+
+    def pretty(self) -> str:
+        return f"#{self.index}"
+
+
+@dataclass(frozen=True, slots=True, eq=False, repr=False)
+class Global(CoreNode):
+    name: str
+    origin: Optional[Range] = field(default=None, compare=False)
+    _hash: int = field(init=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(
+            self, "_hash", _hash(GLOBAL_TAG, name_hash(self.name))
+        )
+
+    def label(self) -> tuple:
+        return (self.name,)
+
+    def pretty(self) -> str:
+        return self.name
+
+
+@dataclass(frozen=True, slots=True, eq=False, repr=False)
+class Bool(CoreNode):
+    value: bool
+    origin: Optional[Range] = field(default=None, compare=False)
+    _hash: int = field(init=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "_hash", _hash(BOOL_TAG, self.value))
+
+    def label(self) -> tuple:
+        return (self.value,)
+
+    def pretty(self) -> str:
+        return str(self.value)
+
+
+@dataclass(frozen=True, slots=True, eq=False, repr=False)
+class Int(CoreNode):
+    value: int
+    origin: Optional[Range] = field(default=None, compare=False)
+    _hash: int = field(init=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "_hash", _hash(INT_TAG, self.value))
+
+    def label(self) -> tuple:
+        return (self.value,)
+
+    def pretty(self) -> str:
+        return str(self.value)
+
+
+@dataclass(frozen=True, slots=True, eq=False, repr=False)
+class Unit(CoreNode):
+    origin: Optional[Range] = field(default=None, compare=False)
+    _hash: int = field(init=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "_hash", _hash(UNIT_TAG))
+
+    def pretty(self) -> str:
+        return "unit"
+
+
+@dataclass(frozen=True, slots=True, eq=False, repr=False)
+class App(CoreNode):
+    function: CoreExpression
+    argument: CoreExpression
+    origin: Optional[Range] = field(default=None, compare=False)
+    _hash: int = field(init=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(
+            self,
+            "_hash",
+            _hash(APP_TAG, self.function._hash, self.argument._hash),
+        )
+
+    def children(self) -> tuple[CoreExpression, ...]:
+        return (self.function, self.argument)
+
+    def pretty(self) -> str:
+        return pretty(self)
+
+
+@dataclass(frozen=True, slots=True, eq=False, repr=False)
+class Op(CoreNode):
+    operator: str
+    left: CoreExpression
+    right: CoreExpression
+    origin: Optional[Range] = field(default=None, compare=False)
+    _hash: int = field(init=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(
+            self,
+            "_hash",
+            _hash(
+                OP_TAG,
+                name_hash(self.operator),
+                self.left._hash,
+                self.right._hash,
+            ),
+        )
+
+    def children(self) -> tuple[CoreExpression, ...]:
+        return (self.left, self.right)
+
+    def label(self) -> tuple:
+        return (self.operator,)
+
+    def pretty(self) -> str:
+        return pretty(self)
+
+
+@dataclass(frozen=True, slots=True, eq=False, repr=False)
+class Lam(CoreNode):
+    body: CoreExpression
+    hint: str = field(default="", compare=False)
+    origin: Optional[Range] = field(default=None, compare=False)
+    _hash: int = field(init=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "_hash", _hash(LAM_TAG, self.body._hash))
+
+    def children(self) -> tuple[CoreExpression, ...]:
+        return (self.body,)
+
+    def pretty(self) -> str:
+        return pretty(self)
+
+
+@dataclass(frozen=True, slots=True, eq=False, repr=False)
+class Cond(CoreNode):
+    condition: CoreExpression
+    true_expression: CoreExpression
+    false_expression: CoreExpression
+    origin: Optional[Range] = field(default=None, compare=False)
+    _hash: int = field(init=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(
+            self,
+            "_hash",
+            _hash(
+                COND_TAG,
+                self.condition._hash,
+                self.true_expression._hash,
+                self.false_expression._hash,
+            ),
+        )
+
+    def children(self) -> tuple[CoreExpression, ...]:
+        return (self.condition, self.true_expression, self.false_expression)
+
+    def pretty(self) -> str:
+        return pretty(self)
+
+
+@dataclass(frozen=True, slots=True)
+class CoreDefinition:
+    # The arguments of the definition are its outermost `Lam`s.
+    name: str
+    arity: int
+    body: CoreExpression
+    origin: Optional[Range] = field(default=None, compare=False)
+
+    def pretty(self) -> str:
+        return f"{self.name} = {pretty(self.body)};"
+
+
+def alpha_equal(left: CoreNode, right: CoreNode) -> bool:
+    # Iterative, so deep expressions don't reach the recursion limit.
+    stack: list[tuple[CoreNode, CoreNode]] = [(left, right)]
+    while stack:
+        a, b = stack.pop()
+        if a is b:
+            continue
+        if (
+            type(a) is not type(b)
+            or a._hash != b._hash  # type: ignore
+            or a.label() != b.label()
+        ):
+            return False
+        stack.extend(zip(a.children(), b.children()))
+    return True
+
+
+def _pieces(item: Any) -> tuple[Any, ...]:
+    # The text of a node as strings and nodes to print
+    match item:
+        case str():
+            return ()
+        case App(function=function, argument=argument):
+            return ("(", function, " ", argument, ")")
+        case Op(operator=operator, left=left, right=right):
+            return ("(", left, f" {operator} ", right, ")")
+        case Lam(body=body):
+            return ("(\\ -> ", body, ")")
+        case Cond(
+            condition=condition,
+            true_expression=true_expression,
+            false_expression=false_expression,
+        ):
+            return (
+                "(if ",
+                condition,
+                " then ",
+                true_expression,
+                " else ",
+                false_expression,
+                ")",
+            )
+    return (item.pretty(),)
+
+
+def pretty(expression: CoreExpression) -> str:
+    # Joined once at the end, nested f-strings would copy the text of
+    # every node once per enclosing node
+    return "".join(
+        [item for item in preorder(expression, _pieces) if type(item) is str]
+    )
@@ -0,0 +1,160 @@
+from typing import Any, Callable, Optional
+
+from STLC.Parser.AST import (
+    Definition,
+    Variable,
+    Expression,
+    BoolLiteral,
+    IntLiteral,
+    UnitLiteral,
+    Application,
+    OperatorApplication,
+    Function,
+    If,
+    Annotation,
+)
+from STLC.Core.IR import (
+    CoreExpression,
+    CoreDefinition,
+    Local,
+    Global,
+    Bool,
+    Int,
+    Unit,
+    App,
+    Op,
+    Lam,
+    Cond,
+)
+from STLC.Core.Sharing import SharingTable
+
+# Work items of the lowering, `expression` is lowered at lambda depth
+# `depth`, `build` combines the lowered children of `expression` and
+# `unbind` leaves the scope of a lambda argument.
+_VISIT = 0
+_BUILD = 1
+_UNBIND = 2
+
+
+def _no_sharing(node: Any) -> Any:
+    return node
+
+
+def _sharing(table: Optional[SharingTable]) -> Callable[[Any], Any]:
+    return _no_sharing if table is None else table.share
+
+
+def lower_expression(
+    expression: Expression,
+    scope: dict[str, list[int]],
+    depth: int,
+    table: Optional[SharingTable] = None,
+) -> CoreExpression:
+    # `scope` maps every bound name to the depths of its binders, the
+    # De Bruijn index of a use at depth `d` of a binder at depth `b` is
+    # `d - b - 1`. With a `table` every node built is hash-consed.
+    share = _sharing(table)
+    results: list[CoreExpression] = []
+    work: list[tuple[int, Any, int]] = [(_VISIT, expression, depth)]
+    while work:
+        action, node, depth = work.pop()
+        if action == _UNBIND:
+            binders = scope[node]
+            binders.pop()
+            if not binders:
+                del scope[node]
+            continue
+        if action == _BUILD:
+            match node:
+                case Application():
+                    argument = results.pop()
+                    function = results.pop()
+                    results.append(share(App(function, argument, node._range)))
+                case OperatorApplication(operator=op):
+                    right = results.pop()
+                    left = results.pop()
+                    results.append(share(Op(op, left, right, node._range)))
+                case Function(argument=argument):
+                    body = results.pop()
+                    results.append(share(Lam(body, argument.name, node._range)))
+                case If():
+                    false_expression = results.pop()
+                    true_expression = results.pop()
+                    condition = results.pop()
+                    results.append(
+                        share(
+                            Cond(
+                                condition,
+                                true_expression,
+                                false_expression,
+                                node._range,
+                            )
+                        )
+                    )
+            continue
+        match node:
+            case Variable(name=name):
+                binders = scope.get(name, None)
+                if binders:
+                    results.append(
+                        share(Local(depth - binders[-1] - 1, name, node._range))
+                    )
+                else:
+                    results.append(share(Global(name, node._range)))
+            case BoolLiteral(value=value):
+                results.append(share(Bool(value, node._range)))
+            case IntLiteral(value=value):
+                results.append(share(Int(value, node._range)))
+            case UnitLiteral():
+                results.append(share(Unit(node._range)))
+            case Application(left=left, right=right) | OperatorApplication(
+                left=left, right=right
+            ):
+                work.append((_BUILD, node, depth))
+                work.append((_VISIT, right, depth))
+                work.append((_VISIT, left, depth))
+            case Function(argument=argument, expression=body):
+                scope.setdefault(argument.name, []).append(depth)
+                work.append((_BUILD, node, depth))
+                work.append((_UNBIND, argument.name, depth))
+                work.append((_VISIT, body, depth + 1))
+            case If(
+                condition=condition,
+                true_expression=true_expression,
+                false_expression=false_expression,
+            ):
+                work.append((_BUILD, node, depth))
+                work.append((_VISIT, false_expression, depth))
+                work.append((_VISIT, true_expression, depth))
+                work.append((_VISIT, condition, depth))
+            case Annotation(expression=inner):
+                work.append((_VISIT, inner, depth))
+    return results[0]
+
+
+def lower_definition(
+    definition: Definition, table: Optional[SharingTable] = None
+) -> CoreDefinition:
+    share = _sharing(table)
+    scope: dict[str, list[int]] = dict()
+    for depth, argument in enumerate(definition.arguments):
+        scope.setdefault(argument.name, []).append(depth)
+    body = lower_expression(
+        definition.expression, scope, len(definition.arguments), table
+    )
+    for argument in reversed(definition.arguments):
+        body = share(Lam(body, argument.name, argument._range))
+    return CoreDefinition(
+        definition.name, len(definition.arguments), body, definition._range
+    )
+
+
+def lower_program(
+    statements: list[Any], table: Optional[SharingTable] = None
+) -> dict[str, CoreDefinition]:
+    # The first definition of every name, as the evaluators use.
+    program: dict[str, CoreDefinition] = dict()
+    for statement in statements:
+        if isinstance(statement, Definition) and statement.name not in program:
+            program[statement.name] = lower_definition(statement, table)
+    return program
@@ -0,0 +1,97 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from STLC.Core.IR import CoreNode, CoreExpression, Global, Lam, Local
+
+# Hash-consing of core expressions: `SharingTable.share` returns the one
+# node of the table equal to the given one, so every structurally equal
+# subterm (alpha-equivalent, ranges ignored) becomes the same object and
+# the program is a DAG. The lowering shares nodes bottom-up, their
+# children are already shared and comparing a new node with the one in
+# the table is O(1).
+#
+# A shared node keeps the `origin` of its first occurrence.
+
+
+@dataclass
+class SharingReport:
+    nodes: int
+    unique: int
+
+    def pretty(self) -> str:
+        shared = self.nodes - self.unique
+        percentage = 100 * shared / self.nodes if self.nodes else 0.0
+        return f"""{self.nodes} nodes, {self.unique} unique, {shared} shared ({percentage:.1f}%)."""
+
+
+class SharingTable:
+    def __init__(self):
+        self.nodes: dict[CoreNode, CoreNode] = dict()
+        self.requests = 0
+
+    def share(self, node: CoreNode) -> CoreNode:
+        self.requests += 1
+        return self.nodes.setdefault(node, node)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def report(self) -> SharingReport:
+        return SharingReport(self.requests, len(self.nodes))
+
+
+def free_globals(
+    expression: CoreExpression,
+    memo: Optional[dict[int, frozenset[str]]] = None,
+) -> frozenset[str]:
+    # The global names used by `expression`, computed once per unique
+    # node of a shared DAG (`memo` is keyed by `id`).
+    if memo is None:
+        memo = dict()
+    stack: list[tuple[CoreNode, bool]] = [(expression, False)]
+    while stack:
+        node, leaving = stack.pop()
+        if id(node) in memo:
+            continue
+        children = node.children()
+        if not leaving and children:
+            stack.append((node, True))
+            stack.extend((child, False) for child in children)
+            continue
+        if isinstance(node, Global):
+            memo[id(node)] = frozenset((node.name,))
+        else:
+            memo[id(node)] = frozenset().union(
+                *(memo[id(child)] for child in children)
+            )
+    return memo[id(expression)]
+
+
+def free_locals(
+    expression: CoreExpression,
+    memo: Optional[dict[int, frozenset[int]]] = None,
+) -> frozenset[int]:
+    # The De Bruijn indices that escape `expression`, relative to it.
+    if memo is None:
+        memo = dict()
+    stack: list[tuple[CoreNode, bool]] = [(expression, False)]
+    while stack:
+        node, leaving = stack.pop()
+        if id(node) in memo:
+            continue
+        children = node.children()
+        if not leaving and children:
+            stack.append((node, True))
+            stack.extend((child, False) for child in children)
+            continue
+        if isinstance(node, Local):
+            memo[id(node)] = frozenset((node.index,))
+        elif isinstance(node, Lam):
+            memo[id(node)] = frozenset(
+                i - 1 for i in memo[id(node.body)] if i > 0
+            )
+        else:
+            memo[id(node)] = frozenset().union(
+                *(memo[id(child)] for child in children)
+            )
+    return memo[id(expression)]
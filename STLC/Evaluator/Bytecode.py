@@ -0,0 +1,335 @@
+import pickle
+from array import array
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Optional
+
+from STLC.Parser.AST import (
+    Definition,
+    Variable,
+    Expression,
+    BoolLiteral,
+    IntLiteral,
+    UnitLiteral,
+    Application,
+    OperatorApplication,
+    Function,
+    If,
+    Annotation,
+)
+from STLC.Evaluator.Evaluator import UNIT
+from STLC.Traversal import Task, run
+
+# Bump it after any change to the instructions or `CodeObject`, it's part
+# of the key of every cached code object.
+BYTECODE_VERSION = 3
+
+# Every instruction is two ints in `CodeObject.instructions`: the opcode
+# and its argument (0 when unused).
+CONST = 0  # push constants[arg]
+LOCAL = 1  # push environment[arg]
+GLOBAL = 2  # push the value of the global names[arg]
+CLOSURE = 3  # push a closure of functions[arg]
+APPLY = 4  # pop an argument and a function, call it
+BINARY = 5  # pop two values, push OPERATOR_NAMES[arg] applied to them
+JUMP_IF_FALSE = 6  # pop a value, jump to arg if it's False
+JUMP = 7  # jump to arg
+RETURN = 8  # return the top of the stack to the caller
+TAIL_APPLY = 9  # APPLY in tail position, the callee replaces the caller
+
+OPCODE_NAMES = [
+    "CONST",
+    "LOCAL",
+    "GLOBAL",
+    "CLOSURE",
+    "APPLY",
+    "BINARY",
+    "JUMP_IF_FALSE",
+    "JUMP",
+    "RETURN",
+    "TAIL_APPLY",
+]
+
+OPERATOR_NAMES = [
+    "+",
+    "-",
+    "*",
+    "/",
+    "<",
+    ">",
+    "<=",
+    ">=",
+    "==",
+    "/=",
+    "&",
+    "|",
+    "~",
+]
+OPERATOR_INDEX = {name: i for i, name in enumerate(OPERATOR_NAMES)}
+
+
+class CodeObject:
+    # The code of a definition or a lambda. Its environment is the captured
+    # values followed by its `arity` arguments. `positions` has the offsets
+    # (relative to the start of `owner`, the definition it comes from) of
+    # the expression of every instruction, for error reports.
+    __slots__ = (
+        "name",
+        "owner",
+        "arity",
+        "instructions",
+        "positions",
+        "constants",
+        "names",
+        "functions",
+        "constant_index",
+        "name_index",
+    )
+
+    def __init__(self, name: str, owner: str, arity: int):
+        self.name = name
+        self.owner = owner
+        self.arity = arity
+        self.instructions = array("i")
+        self.positions = array("i")
+        self.constants: list[Any] = []
+        self.names: list[str] = []
+        # (code of the lambda, indices of the environment it captures)
+        self.functions: list[tuple["CodeObject", tuple[int, ...]]] = []
+        # indices of the constants (by type and value) and names, only
+        # while compiling
+        self.constant_index: dict[tuple[type, Any], int] = dict()
+        self.name_index: dict[str, int] = dict()
+
+    def __getstate__(self):
+        return tuple(getattr(self, i) for i in self.__slots__[:-2])
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+        self.constant_index = dict()
+        self.name_index = dict()
+
+
+class Compiler:
+    def __init__(self, definition: Definition):
+        self.base = definition._range.position_start
+        self.owner = definition.name
+
+    def emit(
+        self, code: CodeObject, opcode: int, argument: int, node: Any
+    ) -> int:
+        code.instructions.append(opcode)
+        code.instructions.append(argument)
+        code.positions.append(node._range.position_start - self.base)
+        code.positions.append(node._range.position_end - self.base)
+        return len(code.instructions) - 2
+
+    def constant(self, code: CodeObject, value: Any) -> int:
+        key = (type(value), value)
+        index = code.constant_index.get(key, None)
+        if index is None:
+            index = len(code.constants)
+            code.constants.append(value)
+            code.constant_index[key] = index
+        return index
+
+    def name(self, code: CodeObject, name: str) -> int:
+        index = code.name_index.get(name, None)
+        if index is None:
+            index = len(code.names)
+            code.names.append(name)
+            code.name_index[name] = index
+        return index
+
+    def compile_definition(self, definition: Definition) -> CodeObject:
+        code = CodeObject(
+            definition.name, definition.name, len(definition.arguments)
+        )
+        frame = {arg.name: i for i, arg in enumerate(definition.arguments)}
+        run(self.expression(code, definition.expression, frame, True))
+        self.emit(code, RETURN, 0, definition.expression)
+        return code
+
+    def expression(
+        self,
+        code: CodeObject,
+        expression: Expression,
+        frame: dict[str, int],
+        tail: bool = False,
+    ) -> Task[None]:
+        # A task of `STLC.Traversal.run`, subexpressions are compiled by
+        # yielding their tasks. `tail` is set when the value of `expression`
+        # is returned right away: its calls are `TAIL_APPLY` and the branches
+        # of its ifs return instead of jumping to the end.
+        match expression:
+            case Variable(name=name):
+                if name in frame:
+                    self.emit(code, LOCAL, frame[name], expression)
+                else:
+                    self.emit(code, GLOBAL, self.name(code, name), expression)
+            case BoolLiteral(value=value) | IntLiteral(value=value):
+                self.emit(code, CONST, self.constant(code, value), expression)
+            case UnitLiteral():
+                self.emit(code, CONST, self.constant(code, UNIT), expression)
+            case Application(left=left, right=right):
+                yield self.expression(code, left, frame)
+                yield self.expression(code, right, frame)
+                self.emit(code, TAIL_APPLY if tail else APPLY, 0, expression)
+            case OperatorApplication(left=left, right=right, operator=op):
+                yield self.expression(code, left, frame)
+                yield self.expression(code, right, frame)
+                self.emit(code, BINARY, OPERATOR_INDEX[op], expression)
+            case Function(argument=argument, expression=body):
+                captured = sorted(
+                    name for name in expression.free_names() if name in frame
+                )
+                function = CodeObject("<lambda>", self.owner, 1)
+                inner = {name: i for i, name in enumerate(captured)}
+                inner[argument.name] = len(captured)
+                yield self.expression(function, body, inner, True)
+                self.emit(function, RETURN, 0, body)
+                code.functions.append(
+                    (function, tuple(frame[name] for name in captured))
+                )
+                self.emit(code, CLOSURE, len(code.functions) - 1, expression)
+            case If(
+                condition=condition,
+                true_expression=true_expression,
+                false_expression=false_expression,
+            ):
+                yield self.expression(code, condition, frame)
+                jump_false = self.emit(code, JUMP_IF_FALSE, 0, expression)
+                yield self.expression(code, true_expression, frame, tail)
+                if tail:
+                    self.emit(code, RETURN, 0, true_expression)
+                else:
+                    jump_end = self.emit(code, JUMP, 0, expression)
+                code.instructions[jump_false + 1] = len(code.instructions)
+                yield self.expression(code, false_expression, frame, tail)
+                if not tail:
+                    code.instructions[jump_end + 1] = len(code.instructions)
+            case Annotation(expression=inner_expression):
+                yield self.expression(code, inner_expression, frame, tail)
+
+
+def compile_definition(definition: Definition) -> CodeObject:
+    return Compiler(definition).compile_definition(definition)
+
+
+def fingerprint(definition: Definition) -> str:
+    # Structural hash of a definition: the key of its code in
+    # `BytecodeCache`. It includes the offsets of the expressions from the
+    # start of the definition, as `CodeObject.positions` keeps them: moving
+    # a definition keeps its code, reformatting it compiles it again.
+    base = definition._range.position_start
+    digest = sha256(f"{BYTECODE_VERSION}:{definition.name}".encode("utf8"))
+    for argument in definition.arguments:
+        digest.update(f" {argument.name}".encode("utf8"))
+    stack: list[Expression] = [definition.expression]
+    while stack:
+        expression = stack.pop()
+        start = expression._range.position_start - base
+        end = expression._range.position_end - base
+        digest.update(f"@{start}:{end}".encode("utf8"))
+        match expression:
+            case Variable(name=name):
+                digest.update(f"(v {name})".encode("utf8"))
+            case BoolLiteral(value=value):
+                digest.update(f"(b {value})".encode("utf8"))
+            case IntLiteral(value=value):
+                digest.update(f"(i {value})".encode("utf8"))
+            case UnitLiteral():
+                digest.update(b"(u)")
+            case Application(left=left, right=right):
+                digest.update(b"(a")
+                stack.append(right)
+                stack.append(left)
+            case OperatorApplication(left=left, right=right, operator=op):
+                digest.update(f"(o {op}".encode("utf8"))
+                stack.append(right)
+                stack.append(left)
+            case Function(argument=argument, expression=body):
+                digest.update(f"(f {argument.name}".encode("utf8"))
+                stack.append(body)
+            case If(
+                condition=condition,
+                true_expression=true_expression,
+                false_expression=false_expression,
+            ):
+                digest.update(b"(c")
+                stack.append(false_expression)
+                stack.append(true_expression)
+                stack.append(condition)
+            case Annotation(expression=inner):
+                stack.append(inner)
+    return digest.hexdigest()
+
+
+class BytecodeCache:
+    # Code objects by `fingerprint`, optionally persisted in `path` so later
+    # runs of the same definitions skip compilation. Keeps at most
+    # `max_entries`, dropping the oldest ones.
+    def __init__(self, path: Optional[Path] = None, max_entries: int = 10000):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries: dict[str, CodeObject] = dict()
+        self.dirty = False
+        if path is not None:
+            try:
+                with open(path, "rb") as f:
+                    version, entries = pickle.load(f)
+                if version == BYTECODE_VERSION:
+                    self.entries = entries
+            except Exception:
+                pass
+
+    def get(self, definition: Definition) -> CodeObject:
+        key = fingerprint(definition)
+        code = self.entries.get(key, None)
+        if code is None:
+            code = compile_definition(definition)
+            self.entries[key] = code
+            self.dirty = True
+            while len(self.entries) > self.max_entries:
+                del self.entries[next(iter(self.entries))]
+        return code
+
+    def save(self) -> None:
+        if self.path is None or not self.dirty:
+            return
+        try:
+            with open(self.path, "wb") as f:
+                pickle.dump(
+                    (BYTECODE_VERSION, self.entries),
+                    f,
+                    pickle.HIGHEST_PROTOCOL,
+                )
+            self.dirty = False
+        except OSError:
+            pass
+
+
+def disassemble(code: CodeObject, indent: str = "") -> str:
+    lines = [f"{indent}{code.name} (arity {code.arity}, from {code.owner}):"]
+    instructions = code.instructions
+    for pc in range(0, len(instructions), 2):
+        opcode, argument = instructions[pc], instructions[pc + 1]
+        name = OPCODE_NAMES[opcode]
+        if opcode == CONST:
+            detail = f"{argument} ({code.constants[argument]!r})"
+        elif opcode == GLOBAL:
+            detail = f"{argument} ({code.names[argument]})"
+        elif opcode == CLOSURE:
+            captures = code.functions[argument][1]
+            detail = f"{argument} (captures {list(captures)})"
+        elif opcode == BINARY:
+            detail = f"{argument} ({OPERATOR_NAMES[argument]})"
+        elif opcode in (LOCAL, JUMP_IF_FALSE, JUMP):
+            detail = str(argument)
+        else:
+            detail = ""
+        lines.append(f"{indent}  {pc:>4} {name:<13} {detail}".rstrip())
+    for function, _ in code.functions:
+        lines.append(disassemble(function, indent + "  "))
+    return "\n".join(lines)
@@ -0,0 +1,446 @@
+from typing import Union, Optional, Any
+from dataclasses import dataclass
+
+from STLC.Error import STLCError
+from STLC.Parser.AST import (
+    Definition,
+    Declaration,
+    Variable,
+    Expression,
+    BoolLiteral,
+    IntLiteral,
+    UnitLiteral,
+    Application,
+    OperatorApplication,
+    Function,
+    If,
+    Annotation,
+)
+from STLC.Checker.Checks import range2Report
+from STLC.SymbolTable import SymbolTable
+
+# A CEK machine: the control is an expression, the environment a tuple
+# and the continuation an explicit list of frames, so the depth of the
+# STLC program never touches the Python stack.
+#
+# Cost model: before running a definition its body is resolved once
+# (`Resolver`), every variable becomes an index into the environment
+# tuple of its frame or a global name. Closures are flat, they copy the
+# values of the variables they use when created (proportional to the
+# number of free variables of the lambda), so every variable lookup is a
+# dict lookup by node plus a tuple index, O(1) regardless of nesting, and
+# applying a function builds one tuple. No expression is ever copied or
+# substituted.
+
+
+class UnitValue:
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "unit"
+
+    def __reduce__(self) -> str:
+        # pickled by reference, so `UNIT` stays the only instance
+        return "UNIT"
+
+
+UNIT = UnitValue()
+
+
+@dataclass(slots=True)
+class Closure:
+    # `environment` holds the captured values followed by the arguments
+    # already received, `arity` counts the ones still missing.
+    environment: tuple[Any, ...]
+    arity: int
+    body: Expression
+
+
+Value = Union[bool, int, UnitValue, Closure]
+
+
+class EvaluationError(STLCError):
+    pass
+
+
+@dataclass
+class UnknownDefinition(EvaluationError):
+    name: str
+
+    def pretty(self) -> str:
+        return f"""There is no definition of "{self.name}" to evaluate."""
+
+
+@dataclass
+class UnknownVariable(EvaluationError):
+    variable: Variable
+
+    def pretty(self) -> str:
+        return f"""Evaluation of the undefined variable "{self.variable.name}".\n{range2Report(self.variable._range)}."""
+
+
+@dataclass
+class ApplicationOfNonFunction(EvaluationError):
+    expression: Application
+    value: Value
+
+    def pretty(self) -> str:
+        return f"""Can't apply the value {pretty_value(self.value)} to an argument.\n{range2Report(self.expression._range)}."""
+
+
+@dataclass
+class DivisionByZero(EvaluationError):
+    expression: OperatorApplication
+
+    def pretty(self) -> str:
+        return f"""Division by zero.\n{range2Report(self.expression._range)}."""
+
+
+@dataclass
+class InvalidOperands(EvaluationError):
+    expression: OperatorApplication
+    left: Value
+    right: Value
+
+    def pretty(self) -> str:
+        return f"""Can't apply the operator {self.expression.operator} to the values {pretty_value(self.left)} and {pretty_value(self.right)}.\n{range2Report(self.expression._range)}."""
+
+
+@dataclass
+class NonBoolCondition(EvaluationError):
+    expression: If
+    value: Value
+
+    def pretty(self) -> str:
+        return f"""The condition of an if evaluated to {pretty_value(self.value)} instead of a boolean.\n{range2Report(self.expression._range)}."""
+
+
+@dataclass
+class StepLimitExceeded(EvaluationError):
+    steps: int
+
+    def pretty(self) -> str:
+        return f"The evaluation was stopped after {self.steps} function calls."
+
+
+@dataclass
+class CyclicDefinition(EvaluationError):
+    definition: Definition
+
+    def pretty(self) -> str:
+        return f"""The value of "{self.definition.name}" depends on itself.\n{range2Report(self.definition._range)}."""
+
+
+def pretty_value(value: Value) -> str:
+    match value:
+        case Closure():
+            return "<function>"
+        case int() if type(value) is int:
+            return _int_text(value)
+        case _:
+            return repr(value)
+
+
+# Digits of every chunk of `_int_text`, below the default limit of `str`
+_CHUNK_DIGITS = 1000
+
+
+def _int_text(value: int) -> str:
+    # `str` refuses ints of more than `sys.get_int_max_str_digits()`
+    # digits, the limit is global so big values are converted by chunks
+    try:
+        return str(value)
+    except ValueError:
+        pass
+    sign = "-" if value < 0 else ""
+    value = abs(value)
+    base = 10**_CHUNK_DIGITS
+    chunks: list[int] = []
+    while value:
+        value, chunk = divmod(value, base)
+        chunks.append(chunk)
+    head = str(chunks.pop())
+    return (
+        sign
+        + head
+        + "".join(f"{chunk:0{_CHUNK_DIGITS}d}" for chunk in reversed(chunks))
+    )
+
+
+# Operators work on the python values, `~` on booleans is the exclusive or.
+OPERATORS: dict[str, Any] = {
+    "+": lambda x, y: x + y,
+    "-": lambda x, y: x - y,
+    "*": lambda x, y: x * y,
+    "/": lambda x, y: x // y,
+    "<": lambda x, y: x < y,
+    ">": lambda x, y: x > y,
+    "<=": lambda x, y: x <= y,
+    ">=": lambda x, y: x >= y,
+    "==": lambda x, y: x == y,
+    "/=": lambda x, y: x != y,
+    "&": lambda x, y: x and y,
+    "|": lambda x, y: x or y,
+    "~": lambda x, y: x != y,
+}
+
+# The type of both operands of every operator, as the type checker has
+# it. Ill-typed programs can still be evaluated, the operands are checked
+# before applying an operator (by exact type, `bool` is a subclass of
+# `int`).
+OPERAND_TYPES: dict[str, type] = {
+    "+": int,
+    "-": int,
+    "*": int,
+    "/": int,
+    "<": int,
+    ">": int,
+    "<=": int,
+    ">=": int,
+    "==": int,
+    "/=": int,
+    "&": bool,
+    "|": bool,
+    "~": bool,
+}
+
+
+class Resolver:
+    # Maps (by `id`) every `Variable` to its index in the environment or
+    # -1 for globals, and every `Function` to the indices of the enclosing
+    # environment it captures. A lambda's environment is its captured
+    # values (sorted by name) followed by its argument, a definition's
+    # environment is its arguments.
+    def __init__(self):
+        self.variables: dict[int, int] = dict()
+        self.functions: dict[int, tuple[int, ...]] = dict()
+        self.resolved: set[int] = set()
+
+    def resolve(self, definition: Definition) -> None:
+        if id(definition) in self.resolved:
+            return
+        self.resolved.add(id(definition))
+        frame = {arg.name: i for i, arg in enumerate(definition.arguments)}
+        stack: list[tuple[Expression, dict[str, int]]] = [
+            (definition.expression, frame)
+        ]
+        while stack:
+            expression, frame = stack.pop()
+            match expression:
+                case Variable(name=name):
+                    self.variables[id(expression)] = frame.get(name, -1)
+                case BoolLiteral() | IntLiteral() | UnitLiteral():
+                    pass
+                case Application(left=left, right=right) | OperatorApplication(
+                    left=left, right=right
+                ):
+                    stack.append((right, frame))
+                    stack.append((left, frame))
+                case Function(argument=argument, expression=body):
+                    captured = sorted(
+                        name
+                        for name in expression.free_names()
+                        if name in frame
+                    )
+                    self.functions[id(expression)] = tuple(
+                        frame[name] for name in captured
+                    )
+                    inner = {name: i for i, name in enumerate(captured)}
+                    inner[argument.name] = len(captured)
+                    stack.append((body, inner))
+                case If(
+                    condition=condition,
+                    true_expression=true_expression,
+                    false_expression=false_expression,
+                ):
+                    stack.append((false_expression, frame))
+                    stack.append((true_expression, frame))
+                    stack.append((condition, frame))
+                case Annotation(expression=inner_expression):
+                    stack.append((inner_expression, frame))
+
+
+# Continuation frames
+APPLICATION_ARGUMENT = 0
+APPLICATION_CALL = 1
+OPERATOR_RIGHT = 2
+OPERATOR_APPLY = 3
+IF_BRANCH = 4
+GLOBAL_DONE = 5
+
+# Marks a global whose value is being computed
+_IN_PROGRESS = object()
+
+
+class Evaluator:
+    # With `max_steps` an evaluation making more function calls than that
+    # stops with `StepLimitExceeded`: a program that doesn't terminate
+    # makes infinitely many calls.
+    def __init__(self, symbols: SymbolTable, max_steps: Optional[int] = None):
+        self.symbols = symbols
+        self.resolver = Resolver()
+        self.globals: dict[str, Any] = dict()
+        self.max_steps = max_steps
+
+    def global_definition(self, name: str) -> Optional[Definition]:
+        definitions = self.symbols.definitions_of(name)
+        if not definitions:
+            return None
+        definition = definitions[0]
+        self.resolver.resolve(definition)
+        return definition
+
+    def evaluate_global(self, name: str) -> Value | EvaluationError:
+        definition = self.global_definition(name)
+        if definition is None:
+            return UnknownDefinition(name)
+        result = self.run(Variable(definition._range, name), ())
+        if isinstance(result, EvaluationError):
+            # globals interrupted by the error aren't cycles
+            for key in [
+                k for k, v in self.globals.items() if v is _IN_PROGRESS
+            ]:
+                del self.globals[key]
+        return result
+
+    def run(
+        self, expression: Expression, environment: tuple[Any, ...]
+    ) -> Value | EvaluationError:
+        variables = self.resolver.variables
+        functions = self.resolver.functions
+        globals = self.globals
+        stack: list[tuple[Any, ...]] = []
+        value: Any = None
+        # counts down to 0, without a limit it starts below and never gets
+        # there
+        steps = -1 if self.max_steps is None else self.max_steps + 1
+        while True:
+            # Evaluate `expression` in `environment` until a value is found
+            match expression:
+                case Variable(name=name):
+                    index = variables.get(id(expression), -1)
+                    if index >= 0:
+                        value = environment[index]
+                    else:
+                        value = globals.get(name, None)
+                        if value is _IN_PROGRESS:
+                            return CyclicDefinition(
+                                self.global_definition(name)  # type: ignore
+                            )
+                        if value is None:
+                            definition = self.global_definition(name)
+                            if definition is None:
+                                return UnknownVariable(expression)
+                            if definition.arguments:
+                                value = Closure(
+                                    (),
+                                    len(definition.arguments),
+                                    definition.expression,
+                                )
+                                globals[name] = value
+                            else:
+                                globals[name] = _IN_PROGRESS
+                                stack.append((GLOBAL_DONE, name, environment))
+                                expression = definition.expression
+                                environment = ()
+                                continue
+                case BoolLiteral(value=literal) | IntLiteral(value=literal):
+                    value = literal
+                case UnitLiteral():
+                    value = UNIT
+                case Function(expression=body):
+                    value = Closure(
+                        tuple(
+                            environment[i] for i in functions[id(expression)]
+                        ),
+                        1,
+                        body,
+                    )
+                case Application(left=left, right=right):
+                    stack.append(
+                        (APPLICATION_ARGUMENT, expression, environment)
+                    )
+                    expression = left
+                    continue
+                case OperatorApplication(left=left):
+                    stack.append((OPERATOR_RIGHT, expression, environment))
+                    expression = left
+                    continue
+                case If(condition=condition):
+                    stack.append((IF_BRANCH, expression, environment))
+                    expression = condition
+                    continue
+                case Annotation(expression=inner):
+                    expression = inner
+                    continue
+
+            # Pass `value` to the continuation until a new expression has
+            # to be evaluated
+            while True:
+                if not stack:
+                    return value
+                frame = stack.pop()
+                kind = frame[0]
+                if kind == APPLICATION_ARGUMENT:
+                    stack.append((APPLICATION_CALL, frame[1], value))
+                    expression = frame[1].right
+                    environment = frame[2]
+                    break
+                elif kind == APPLICATION_CALL:
+                    function = frame[2]
+                    if not isinstance(function, Closure):
+                        return ApplicationOfNonFunction(frame[1], function)
+                    arguments = function.environment + (value,)
+                    if function.arity > 1:
+                        value = Closure(
+                            arguments, function.arity - 1, function.body
+                        )
+                        continue
+                    steps -= 1
+                    if steps == 0:
+                        return StepLimitExceeded(self.max_steps)  # type: ignore
+                    # the call frame is already gone: tail calls don't grow
+                    # the stack
+                    expression = function.body
+                    environment = arguments
+                    break
+                elif kind == OPERATOR_RIGHT:
+                    stack.append((OPERATOR_APPLY, frame[1], value))
+                    expression = frame[1].right
+                    environment = frame[2]
+                    break
+                elif kind == OPERATOR_APPLY:
+                    operation: OperatorApplication = frame[1]
+                    operand_type = OPERAND_TYPES[operation.operator]
+                    if (
+                        type(frame[2]) is not operand_type
+                        or type(value) is not operand_type
+                    ):
+                        return InvalidOperands(operation, frame[2], value)
+                    if operation.operator == "/" and value == 0:
+                        return DivisionByZero(operation)
+                    value = OPERATORS[operation.operator](frame[2], value)
+                elif kind == IF_BRANCH:
+                    conditional: If = frame[1]
+                    if value is True:
+                        expression = conditional.true_expression
+                    elif value is False:
+                        expression = conditional.false_expression
+                    else:
+                        return NonBoolCondition(conditional, value)
+                    environment = frame[2]
+                    break
+                else:
+                    globals[frame[1]] = value
+                    environment = frame[2]
+
+
+def evaluate(
+    statements: list[Definition | Declaration],
+    name: str,
+    symbols: Optional[SymbolTable] = None,
+    max_steps: Optional[int] = None,
+) -> Value | EvaluationError:
+    if symbols is None:
+        symbols = SymbolTable(statements)
+    return Evaluator(symbols, max_steps).evaluate_global(name)
@@ -0,0 +1,252 @@
+from typing import Any, Optional
+from dataclasses import dataclass
+
+from STLC.Parser.AST import Definition, Declaration
+from STLC.Checker.Checks import range2Report
+from STLC.Evaluator.Evaluator import (
+    EvaluationError,
+    UnknownDefinition,
+    OPERATORS,
+    OPERAND_TYPES,
+    pretty_value,
+)
+from STLC.Evaluator.Bytecode import (
+    CodeObject,
+    BytecodeCache,
+    OPERATOR_NAMES,
+    CONST,
+    LOCAL,
+    GLOBAL,
+    CLOSURE,
+    APPLY,
+    BINARY,
+    JUMP_IF_FALSE,
+    JUMP,
+    RETURN,
+    TAIL_APPLY,
+)
+from STLC.Range import Range
+from STLC.SymbolTable import SymbolTable
+
+
+@dataclass(slots=True)
+class VMClosure:
+    code: CodeObject
+    environment: tuple[Any, ...]
+    arity: int
+
+
+@dataclass
+class VMError(EvaluationError):
+    message: str
+    _range: Optional[Range]
+
+    def pretty(self) -> str:
+        if self._range is None:
+            return f"{self.message}."
+        return f"{self.message}.\n{range2Report(self._range)}."
+
+
+def pretty_vm_value(value: Any) -> str:
+    if isinstance(value, VMClosure):
+        return "<function>"
+    return pretty_value(value)
+
+
+_IN_PROGRESS = object()
+
+_OPERATIONS = [OPERATORS[name] for name in OPERATOR_NAMES]
+_OPERAND_TYPES = [OPERAND_TYPES[name] for name in OPERATOR_NAMES]
+_DIVISION = OPERATOR_NAMES.index("/")
+
+
+class VM:
+    # Runs the bytecode of `STLC.Evaluator.Bytecode`. Every call pushes
+    # (code, pc, environment, global) on `frames`, where `global` is the
+    # name of the zero-argument definition whose value is being computed
+    # by the callee, if any. Values live in a single operand stack.
+    # `TAIL_APPLY` doesn't push a frame, the callee returns straight to the
+    # caller of the current code: loops written as tail calls, also
+    # between definitions, run in constant space. `max_steps` limits the
+    # function calls of an evaluation, as in the CEK evaluator.
+    def __init__(
+        self,
+        symbols: SymbolTable,
+        cache: Optional[BytecodeCache] = None,
+        max_steps: Optional[int] = None,
+    ):
+        self.symbols = symbols
+        self.cache = BytecodeCache() if cache is None else cache
+        self.globals: dict[str, Any] = dict()
+        self.max_steps = max_steps
+
+    def code_of(self, name: str) -> Optional[CodeObject]:
+        definitions = self.symbols.definitions_of(name)
+        if not definitions:
+            return None
+        return self.cache.get(definitions[0])
+
+    def error(self, message: str, code: CodeObject, pc: int) -> VMError:
+        definitions = self.symbols.definitions_of(code.owner)
+        if not definitions:
+            return VMError(message, None)
+        start = definitions[0]._range.position_start
+        return VMError(
+            message,
+            Range(
+                start + code.positions[pc],
+                start + code.positions[pc + 1],
+                definitions[0]._range.lines,
+            ),
+        )
+
+    def evaluate_global(self, name: str) -> Any | EvaluationError:
+        code = self.code_of(name)
+        if code is None:
+            return UnknownDefinition(name)
+        if code.arity > 0:
+            return VMClosure(code, (), code.arity)
+        self.globals[name] = _IN_PROGRESS
+        result = self.run(code, (), name)
+        if isinstance(result, EvaluationError):
+            for key in [
+                k for k, v in self.globals.items() if v is _IN_PROGRESS
+            ]:
+                del self.globals[key]
+        return result
+
+    def run(
+        self, code: CodeObject, environment: tuple[Any, ...], name: str
+    ) -> Any | EvaluationError:
+        globals = self.globals
+        stack: list[Any] = []
+        frames: list[tuple[Any, ...]] = [(None, 0, (), name)]
+        instructions = code.instructions
+        pc = 0
+        steps = -1 if self.max_steps is None else self.max_steps + 1
+        while True:
+            opcode = instructions[pc]
+            argument = instructions[pc + 1]
+            pc += 2
+            if opcode == LOCAL:
+                stack.append(environment[argument])
+            elif opcode == CONST:
+                stack.append(code.constants[argument])
+            elif opcode == APPLY or opcode == TAIL_APPLY:
+                value = stack.pop()
+                function = stack.pop()
+                if not isinstance(function, VMClosure):
+                    return self.error(
+                        f"Can't apply the value {pretty_vm_value(function)}"
+                        " to an argument",
+                        code,
+                        pc - 2,
+                    )
+                arguments = function.environment + (value,)
+                if function.arity > 1:
+                    stack.append(
+                        VMClosure(function.code, arguments, function.arity - 1)
+                    )
+                    continue
+                steps -= 1
+                if steps == 0:
+                    return VMError(
+                        "The evaluation was stopped after"
+                        f" {self.max_steps} function calls",
+                        None,
+                    )
+                if opcode == APPLY:
+                    frames.append((code, pc, environment, None))
+                code = function.code
+                instructions = code.instructions
+                environment = arguments
+                pc = 0
+            elif opcode == BINARY:
+                right = stack.pop()
+                operand_type = _OPERAND_TYPES[argument]
+                if (
+                    type(stack[-1]) is not operand_type
+                    or type(right) is not operand_type
+                ):
+                    return self.error(
+                        "Can't apply the operator"
+                        f" {OPERATOR_NAMES[argument]} to the values"
+                        f" {pretty_vm_value(stack[-1])} and"
+                        f" {pretty_vm_value(right)}",
+                        code,
+                        pc - 2,
+                    )
+                if argument == _DIVISION and right == 0:
+                    return self.error("Division by zero", code, pc - 2)
+                stack[-1] = _OPERATIONS[argument](stack[-1], right)
+            elif opcode == JUMP_IF_FALSE:
+                value = stack.pop()
+                if value is False:
+                    pc = argument
+                elif value is not True:
+                    return self.error(
+                        "The condition of an if evaluated to"
+                        f" {pretty_vm_value(value)} instead of a boolean",
+                        code,
+                        pc - 2,
+                    )
+            elif opcode == JUMP:
+                pc = argument
+            elif opcode == RETURN:
+                code, pc, environment, computed = frames.pop()
+                if computed is not None:
+                    globals[computed] = stack[-1]
+                if code is None:
+                    return stack.pop()
+                instructions = code.instructions
+            elif opcode == GLOBAL:
+                global_name = code.names[argument]
+                value = globals.get(global_name, None)
+                if value is _IN_PROGRESS:
+                    # at the definition, as `CyclicDefinition`
+                    return VMError(
+                        f'The value of "{global_name}" depends on itself',
+                        self.symbols.definitions_of(global_name)[0]._range,
+                    )
+                if value is not None:
+                    stack.append(value)
+                    continue
+                callee = self.code_of(global_name)
+                if callee is None:
+                    return self.error(
+                        f'Evaluation of the undefined variable "{global_name}"',
+                        code,
+                        pc - 2,
+                    )
+                if callee.arity > 0:
+                    value = VMClosure(callee, (), callee.arity)
+                    globals[global_name] = value
+                    stack.append(value)
+                    continue
+                globals[global_name] = _IN_PROGRESS
+                frames.append((code, pc, environment, global_name))
+                code = callee
+                instructions = code.instructions
+                environment = ()
+                pc = 0
+            elif opcode == CLOSURE:
+                function, captures = code.functions[argument]
+                stack.append(
+                    VMClosure(
+                        function,
+                        tuple(environment[i] for i in captures),
+                        1,
+                    )
+                )
+
+
+def evaluate(
+    statements: list[Definition | Declaration],
+    name: str,
+    symbols: Optional[SymbolTable] = None,
+    cache: Optional[BytecodeCache] = None,
+    max_steps: Optional[int] = None,
+) -> Any | EvaluationError:
+    if symbols is None:
+        symbols = SymbolTable(statements)
+    return VM(symbols, cache, max_steps).evaluate_global(name)
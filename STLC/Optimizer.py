@@ -0,0 +1,462 @@
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+from STLC.Parser.AST import (
+    Definition,
+    Declaration,
+    Variable,
+    Expression,
+    BoolLiteral,
+    IntLiteral,
+    UnitLiteral,
+    Application,
+    OperatorApplication,
+    Function,
+    If,
+    Annotation,
+    children,
+)
+from STLC.Evaluator.Evaluator import OPERATORS, OPERAND_TYPES
+from STLC.Timings import timed
+from STLC.Traversal import fold, preorder
+
+# Rewrites of the program between the checks and its evaluation. The
+# passes keep the result of evaluating any definition, errors and
+# nontermination included, so under call by value a subexpression is only
+# removed or duplicated when evaluating it can't fail, loop or cost
+# anything: literals, local variables, globals defined with arguments and
+# lambdas (used once, or small).
+#
+#   constants     `1 + 2` is `3`, both operands must be literals and a
+#                 division by zero is left to fail at run time
+#   conditionals  `if True then a else b` is `a`
+#   beta          `(\x -> e) v` is `e` with `v` for `x`, if `v` is one of
+#                 the values above and no binder of `e` captures it
+#   inline        a call of a small non-recursive definition becomes a
+#                 copy of it, only if `beta` reduces the copy, and a use of
+#                 a definition whose value is a literal becomes the literal
+#   dead          only the definitions reachable from the entry point stay
+#
+# The first four are applied bottom-up to every definition, in rounds
+# until one of them changes nothing: the result of a rewrite is only
+# simplified again in the next round. Rewritten nodes are new objects,
+# every node appears once in the program (the evaluators key their tables
+# by node).
+
+PASSES = ["constants", "conditionals", "beta", "inline", "dead"]
+
+# Definitions with up to this many nodes are inlined
+INLINE_SIZE = 24
+# Lambdas with up to this many nodes are copied to every use by `beta`
+DUPLICATE_SIZE = 8
+MAX_ROUNDS = 10
+
+
+@dataclass
+class PassReport:
+    name: str
+    rewrites: int = 0
+    # Nodes of the program before the rewrites minus after them, inlining
+    # usually adds nodes.
+    removed: int = 0
+
+    def pretty(self) -> str:
+        return f"""{self.name}: {self.rewrites} rewrites, {self.removed} nodes removed."""
+
+
+@dataclass
+class OptimizationReport:
+    nodes: int
+    optimized: int
+    rounds: int
+    passes: list[PassReport]
+
+    def pretty(self) -> str:
+        lines = [report.pretty() for report in self.passes]
+        lines.append(
+            f"{self.nodes} nodes before, {self.optimized} after"
+            f" ({self.rounds} rounds)."
+        )
+        return "\n".join(lines)
+
+
+def _subexpressions(node: Any) -> tuple[Any, ...]:
+    # `children` without binders and annotations, the nodes that are
+    # rewritten
+    match node:
+        case Application(left=left, right=right) | OperatorApplication(
+            left=left, right=right
+        ):
+            return (left, right)
+        case Function(expression=body) | Annotation(expression=body):
+            return (body,)
+        case If(
+            condition=condition,
+            true_expression=true_expression,
+            false_expression=false_expression,
+        ):
+            return (condition, true_expression, false_expression)
+    return ()
+
+
+def _with_subexpressions(node: Any, expressions: list[Any]) -> Any:
+    # A new node like `node` with `expressions` as `_subexpressions`
+    match node:
+        case Variable(name=name):
+            return Variable(node._range, name)
+        case BoolLiteral(value=value):
+            return BoolLiteral(node._range, value)
+        case IntLiteral(value=value):
+            return IntLiteral(node._range, value)
+        case UnitLiteral():
+            return UnitLiteral(node._range)
+        case Application():
+            return Application(node._range, expressions[0], expressions[1])
+        case OperatorApplication(operator=operator):
+            return OperatorApplication(
+                node._range, expressions[0], expressions[1], operator
+            )
+        case Function(argument=argument):
+            return Function(
+                node._range,
+                Variable(argument._range, argument.name),
+                expressions[0],
+            )
+        case If():
+            return If(node._range, *expressions)
+        case Annotation(annotation=annotation):
+            return Annotation(node._range, expressions[0], annotation)
+    raise TypeError(f"Not an expression: {node!r}")
+
+
+def _rebuild(node: Any, expressions: list[Any]) -> Any:
+    if all(map(lambda x, y: x is y, expressions, _subexpressions(node))):
+        return node
+    return _with_subexpressions(node, expressions)
+
+
+def copy(expression: Expression) -> Expression:
+    return fold(expression, _with_subexpressions, _subexpressions)
+
+
+def size(node: Any) -> int:
+    # Nodes of `node`, binders and types included
+    return sum(1 for _ in preorder(node, children))
+
+
+def substitute(body: Expression, name: str, value: Expression) -> Expression:
+    # `body` with a copy of `value` for every free `name`, capture isn't
+    # checked
+    def inner(node: Any) -> tuple[Any, ...]:
+        return _subexpressions(node) if name in node.free_names() else ()
+
+    def replace(node: Any, expressions: list[Any]) -> Any:
+        if type(node) is Variable and node.name == name:
+            return copy(value)
+        return _rebuild(node, expressions)
+
+    return fold(body, replace, inner)
+
+
+def references(definition: Definition, names: Iterable[str]) -> set[str]:
+    return {name for name in definition.free_names() if name in names}
+
+
+def recursive_names(graph: dict[str, set[str]]) -> set[str]:
+    # The nodes of `graph` on a cycle: the strongly connected components
+    # (Tarjan's algorithm) with more than one node or a loop.
+    index: dict[str, int] = dict()
+    low: dict[str, int] = dict()
+    stack: list[str] = []
+    on_stack: set[str] = set()
+    recursive: set[str] = set()
+    for root in graph:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph[root]))]
+        while work:
+            node, targets = work[-1]
+            for target in targets:
+                if target not in index:
+                    index[target] = low[target] = len(index)
+                    stack.append(target)
+                    on_stack.add(target)
+                    work.append((target, iter(graph[target])))
+                    break
+                if target in on_stack:
+                    low[node] = min(low[node], index[target])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] != index[node]:
+                    continue
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                if len(component) > 1 or node in graph[node]:
+                    recursive.update(component)
+    return recursive
+
+
+def _literal(value: Any, node: Any) -> Optional[Expression]:
+    if type(value) is bool:
+        return BoolLiteral(node._range, value)
+    if type(value) is int:
+        return IntLiteral(node._range, value)
+    return None
+
+
+_LITERALS = (BoolLiteral, IntLiteral, UnitLiteral)
+
+
+class Optimizer:
+    def __init__(
+        self,
+        passes: Iterable[str] = PASSES,
+        inline_size: int = INLINE_SIZE,
+        max_rounds: int = MAX_ROUNDS,
+    ):
+        self.passes = frozenset(passes)
+        unknown = self.passes.difference(PASSES)
+        if unknown:
+            raise ValueError(f"Unknown passes: {', '.join(sorted(unknown))}")
+        self.inline_size = inline_size
+        self.max_rounds = max_rounds
+        self.reports = {
+            name: PassReport(name) for name in PASSES if name in self.passes
+        }
+        # The first definition of every name, as the evaluators use them
+        self.globals: dict[str, Definition] = dict()
+        # name -> the expression a use of it is replaced with
+        self.inlinable: dict[str, Expression] = dict()
+        # Names bound anywhere in the definition being rewritten, and the
+        # ones of them that are never free in it: every use of these is a
+        # local variable
+        self.bound: frozenset[str] = frozenset()
+        self.local: frozenset[str] = frozenset()
+        self.changed = False
+
+    def count(self, name: str, removed: int) -> None:
+        report = self.reports[name]
+        report.rewrites += 1
+        report.removed += removed
+        self.changed = True
+
+    def optimize(
+        self,
+        statements: list[Definition | Declaration],
+        entry: Optional[str] = None,
+    ) -> tuple[list[Definition | Declaration], OptimizationReport]:
+        nodes = sum(size(statement) for statement in statements)
+        rounds = 0
+        local = self.passes.difference(["dead"])
+        while local and rounds < self.max_rounds:
+            rounds += 1
+            self.changed = False
+            statements = self.round(statements)
+            if not self.changed:
+                break
+        if "dead" in self.passes and entry is not None:
+            statements = self.remove_dead(statements, entry)
+        report = OptimizationReport(
+            nodes,
+            sum(size(statement) for statement in statements),
+            rounds,
+            list(self.reports.values()),
+        )
+        return statements, report
+
+    def round(
+        self, statements: list[Definition | Declaration]
+    ) -> list[Definition | Declaration]:
+        self.globals = dict()
+        counts: dict[str, int] = dict()
+        for statement in statements:
+            if isinstance(statement, Definition):
+                self.globals.setdefault(statement.name, statement)
+                counts[statement.name] = counts.get(statement.name, 0) + 1
+        self.inlinable = dict()
+        if "inline" in self.passes:
+            graph = {
+                name: references(definition, self.globals)
+                for name, definition in self.globals.items()
+            }
+            recursive = recursive_names(graph)
+            for name, definition in self.globals.items():
+                if counts[name] > 1 or name in recursive:
+                    continue
+                template = self.template(definition)
+                if template is not None:
+                    self.inlinable[name] = template
+        result: list[Definition | Declaration] = []
+        for statement in statements:
+            if isinstance(statement, Definition):
+                statement = self.definition(statement)
+            result.append(statement)
+        return result
+
+    def template(self, definition: Definition) -> Optional[Expression]:
+        # What a use of `definition` can be replaced with (copied)
+        expression = definition.expression
+        if isinstance(expression, _LITERALS) and not definition.arguments:
+            return expression
+        if size(definition) > self.inline_size:
+            return None
+        if not definition.arguments:
+            return expression if type(expression) is Function else None
+        for argument in reversed(definition.arguments):
+            expression = Function(definition._range, argument, expression)
+        return expression
+
+    def definition(self, definition: Definition) -> Definition:
+        self.bound = frozenset(
+            [argument.name for argument in definition.arguments]
+            + [
+                node.argument.name
+                for node in preorder(definition.expression, _subexpressions)
+                if type(node) is Function
+            ]
+        )
+        self.local = self.bound.difference(definition.free_names())
+        expression = fold(definition.expression, self.simplify, _subexpressions)
+        if expression is definition.expression:
+            return definition
+        return Definition(
+            definition._range, definition.name, definition.arguments, expression
+        )
+
+    def simplify(self, node: Any, expressions: list[Any]) -> Any:
+        match node:
+            case Variable(name=name):
+                template = self.inlinable.get(name, None)
+                if isinstance(template, _LITERALS) and name not in self.bound:
+                    self.count("inline", 0)
+                    return copy(template)
+                return node
+            case OperatorApplication(operator=operator):
+                left, right = expressions
+                if (
+                    "constants" in self.passes
+                    and type(left) in (BoolLiteral, IntLiteral)
+                    and type(right) in (BoolLiteral, IntLiteral)
+                    # ill-typed operands are an error of the evaluation
+                    and type(left.value) is OPERAND_TYPES[operator]
+                    and type(right.value) is OPERAND_TYPES[operator]
+                    and not (operator == "/" and right.value == 0)
+                ):
+                    value = OPERATORS[operator](left.value, right.value)
+                    literal = _literal(value, node)
+                    if literal is not None:
+                        self.count("constants", 2)
+                        return literal
+            case If():
+                condition, true_expression, false_expression = expressions
+                if (
+                    "conditionals" in self.passes
+                    and type(condition) is BoolLiteral
+                ):
+                    if condition.value:
+                        kept, removed = true_expression, false_expression
+                    else:
+                        kept, removed = false_expression, true_expression
+                    self.count("conditionals", 2 + size(removed))
+                    return kept
+            case Application():
+                function, argument = expressions
+                if "beta" not in self.passes:
+                    pass
+                elif type(function) is Function:
+                    if self.reducible(function, argument):
+                        return self.reduce(function, argument)
+                elif type(function) is Variable:
+                    template = self.inlinable.get(function.name, None)
+                    if (
+                        type(template) is Function
+                        and function.name not in self.bound
+                        and self.bound.isdisjoint(template.free_names())
+                        and self.reducible(template, argument)
+                    ):
+                        inlined = copy(template)
+                        self.count("inline", 1 - size(inlined))
+                        return self.reduce(inlined, argument)
+        return _rebuild(node, expressions)
+
+    def is_value(self, expression: Expression, uses: int) -> bool:
+        match expression:
+            case BoolLiteral() | IntLiteral() | UnitLiteral():
+                return True
+            case Variable(name=name):
+                if name in self.local:
+                    return True
+                # a global without arguments is computed when used
+                definition = self.globals.get(name, None)
+                return (
+                    definition is not None
+                    and name not in self.bound
+                    and len(definition.arguments) > 0
+                )
+            case Function():
+                return uses <= 1 or size(expression) <= DUPLICATE_SIZE
+        return False
+
+    def reducible(self, function: Function, argument: Expression) -> bool:
+        body = function.expression
+        uses = len(body.free_occurrences(function.argument.name))
+        if not self.is_value(argument, uses):
+            return False
+        free = argument.free_names()
+        return not free or not any(
+            type(node) is Function and node.argument.name in free
+            for node in preorder(body, _subexpressions)
+        )
+
+    def reduce(self, function: Function, argument: Expression) -> Expression:
+        name = function.argument.name
+        body = function.expression
+        uses = len(body.free_occurrences(name))
+        argument_size = size(argument)
+        self.count("beta", 3 + argument_size - uses * (argument_size - 1))
+        return substitute(body, name, argument) if uses else body
+
+    def remove_dead(
+        self, statements: list[Definition | Declaration], entry: str
+    ) -> list[Definition | Declaration]:
+        definitions: dict[str, list[Definition]] = dict()
+        for statement in statements:
+            if isinstance(statement, Definition):
+                definitions.setdefault(statement.name, []).append(statement)
+        if entry not in definitions:
+            return statements
+        reachable = {entry}
+        pending = [entry]
+        while pending:
+            for definition in definitions[pending.pop()]:
+                for name in references(definition, definitions):
+                    if name not in reachable:
+                        reachable.add(name)
+                        pending.append(name)
+        result: list[Definition | Declaration] = []
+        for statement in statements:
+            if statement.name in reachable:
+                result.append(statement)
+            else:
+                self.count("dead", size(statement))
+        return result
+
+
+@timed("optimize")
+def optimize(
+    statements: list[Definition | Declaration],
+    entry: Optional[str] = None,
+    passes: Iterable[str] = PASSES,
+) -> tuple[list[Definition | Declaration], OptimizationReport]:
+    return Optimizer(passes).optimize(statements, entry)
@@ -1,7 +1,16 @@
-from dataclasses import dataclass
-from typing import Union
+from dataclasses import dataclass, field
+from typing import Any, Callable, Union, Optional
 
 from STLC.Range import HasRange
+from STLC.Pretty import (
+    Doc,
+    text,
+    line,
+    concat,
+    nest,
+    group,
+)
+from STLC.Traversal import fold, preorder
 
 Literal = Union["BoolLiteral", "IntLiteral", "UnitLiteral"]
 Expression = Union[
@@ -15,14 +24,57 @@ Expression = Union[
 ]
 Type = Union["BoolType", "IntType", "UnitType", "Arrow"]
 
+# Free variables are computed bottom-up (with a `fold`) the first time they
+# are requested and cached as a frozenset of names on every node of the
+# expression, the `Variable` nodes are only looked up again (with
+# `free_occurrences`) to report them. Every traversal of this module uses
+# the explicit-stack traversals of `STLC.Traversal`, so the depth of an
+# expression is only limited by memory.
+EMPTY_NAMES: frozenset[str] = frozenset()
 
-@dataclass
+
+def union(names1: frozenset[str], names2: frozenset[str]) -> frozenset[str]:
+    if not names1:
+        return names2
+    if not names2:
+        return names1
+    return names1 | names2
+
+
+def diference(names1: frozenset[str], names2: frozenset[str]) -> frozenset[str]:
+    if names1.isdisjoint(names2):
+        return names1
+    return names1 - names2
+
+
+def first_occurrences(
+    node: Union[Expression, "Definition"], names: frozenset[str]
+) -> list["Variable"]:
+    occurrences = [node.free_occurrences(name)[0] for name in names]
+    occurrences.sort(key=lambda var: var._range.position_start)
+    return occurrences
+
+
+@dataclass(slots=True)
 class Variable(HasRange):
     name: str
+    _free_names: Optional[frozenset[str]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def pretty(self) -> str:
         return self.name
 
+    def free_names(self) -> frozenset[str]:
+        if self._free_names is None:
+            self._free_names = frozenset((self.name,))
+        return self._free_names
+
+    def free_occurrences(self, name: str) -> list["Variable"]:
+        if self.name == name:
+            return [self]
+        return []
+
     def free_variables(self) -> list["Variable"]:
         return [self]
 
@@ -30,172 +82,542 @@ class Variable(HasRange):
         return isinstance(other, type(self)) and self.name == other.name
 
 
-@dataclass
+@dataclass(slots=True)
 class BoolLiteral(HasRange):
     value: bool
 
     def pretty(self) -> str:
         return str(self.value)
 
+    def free_names(self) -> frozenset[str]:
+        return EMPTY_NAMES
+
+    def free_occurrences(self, name: str) -> list["Variable"]:
+        return []
+
     def free_variables(self) -> list["Variable"]:
         return []
 
 
-@dataclass
+@dataclass(slots=True)
 class IntLiteral(HasRange):
     value: int
 
     def pretty(self) -> str:
         return str(self.value)
 
+    def free_names(self) -> frozenset[str]:
+        return EMPTY_NAMES
+
+    def free_occurrences(self, name: str) -> list["Variable"]:
+        return []
+
     def free_variables(self) -> list["Variable"]:
         return []
 
 
-@dataclass
+@dataclass(slots=True)
 class UnitLiteral(HasRange):
     def pretty(self) -> str:
         return "unit"
 
-    def free_variables(self) -> list["Variable"]:
-        return []
-
-
-def union(vars1: list[Variable], vars2: list[Variable]) -> list[Variable]:
-    new_list = vars2.copy()
-    for var in vars1:
-        if var not in vars2:
-            new_list.append(var)
-    return new_list
+    def free_names(self) -> frozenset[str]:
+        return EMPTY_NAMES
 
+    def free_occurrences(self, name: str) -> list["Variable"]:
+        return []
 
-def diference(vars1: list[Variable], vars2: list[Variable]) -> list[Variable]:
-    return [i for i in vars1 if i not in vars2]
+    def free_variables(self) -> list["Variable"]:
+        return []
 
 
-@dataclass
+@dataclass(slots=True)
 class Application(HasRange):
     left: Expression
     right: Expression
+    _free_names: Optional[frozenset[str]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def pretty(self) -> str:
-        if (
-            isinstance(self.right, Function)
-            or isinstance(self.right, If)
-            or isinstance(self.right, Application)
-        ):
-            return f"{self.left.pretty()} ({self.right.pretty()})"
-        return f"{self.left.pretty()} {self.right.pretty()}"
+        return pretty(self)
+
+    def free_names(self) -> frozenset[str]:
+        return free_names(self)
+
+    def free_occurrences(self, name: str) -> list[Variable]:
+        return free_occurrences(self, name)
 
     def free_variables(self) -> list[Variable]:
-        return union(self.left.free_variables(), self.right.free_variables())
+        return first_occurrences(self, self.free_names())
 
 
-@dataclass
+@dataclass(slots=True)
 class OperatorApplication(HasRange):
     left: Expression
     right: Expression
     operator: str
+    _free_names: Optional[frozenset[str]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def pretty(self) -> str:
-        return f"({self.left.pretty()} {self.operator} {self.right.pretty()})"
+        return pretty(self)
+
+    def free_names(self) -> frozenset[str]:
+        return free_names(self)
+
+    def free_occurrences(self, name: str) -> list[Variable]:
+        return free_occurrences(self, name)
 
     def free_variables(self) -> list[Variable]:
-        return union(self.left.free_variables(), self.right.free_variables())
+        return first_occurrences(self, self.free_names())
 
 
-@dataclass
+@dataclass(slots=True)
 class Function(HasRange):
     argument: Variable
     expression: Expression
+    _free_names: Optional[frozenset[str]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def pretty(self) -> str:
-        return f"\\ {self.argument.pretty()} -> {self.expression.pretty()}"
+        return pretty(self)
+
+    def free_names(self) -> frozenset[str]:
+        return free_names(self)
+
+    def free_occurrences(self, name: str) -> list[Variable]:
+        return free_occurrences(self, name)
 
     def free_variables(self) -> list[Variable]:
-        return diference(
-            self.expression.free_variables(), self.argument.free_variables()
-        )
+        return first_occurrences(self, self.free_names())
 
 
-@dataclass
+@dataclass(slots=True)
 class If(HasRange):
     condition: Expression
     true_expression: Expression
     false_expression: Expression
+    _free_names: Optional[frozenset[str]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def pretty(self) -> str:
-        return f"if {self.condition.pretty()} then {self.true_expression.pretty()} else {self.false_expression.pretty()}"
+        return pretty(self)
+
+    def free_names(self) -> frozenset[str]:
+        return free_names(self)
+
+    def free_occurrences(self, name: str) -> list[Variable]:
+        return free_occurrences(self, name)
 
     def free_variables(self) -> list[Variable]:
-        return union(
-            union(
-                self.condition.free_variables(),
-                self.true_expression.free_variables(),
-            ),
-            self.false_expression.free_variables(),
-        )
+        return first_occurrences(self, self.free_names())
 
 
-@dataclass
+@dataclass(slots=True)
 class Annotation(HasRange):
     expression: Expression
     annotation: Type
 
     def pretty(self) -> str:
-        return f"({self.expression.pretty()} : {self.annotation.pretty()})"
+        return pretty(self)
+
+    def free_names(self) -> frozenset[str]:
+        return free_names(self)
+
+    def free_occurrences(self, name: str) -> list[Variable]:
+        return free_occurrences(self, name)
 
     def free_variables(self) -> list[Variable]:
-        return self.expression.free_variables()
+        return first_occurrences(self, self.free_names())
 
 
-@dataclass
+@dataclass(slots=True)
 class BoolType(HasRange):
     def pretty(self) -> str:
         return "Bool"
 
 
-@dataclass
+@dataclass(slots=True)
 class IntType(HasRange):
     def pretty(self) -> str:
         return "Int"
 
 
-@dataclass
+@dataclass(slots=True)
 class UnitType(HasRange):
     def pretty(self) -> str:
         return "Unit"
 
 
-@dataclass
+@dataclass(slots=True)
 class Arrow(HasRange):
     left: Type
     right: Type
 
     def pretty(self) -> str:
-        if isinstance(self.left, Arrow):
-            return f"({self.left.pretty()}) -> {self.right.pretty()}"
-        return f"{self.left.pretty()} -> {self.right.pretty()}"
+        return pretty(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class Definition(HasRange):
     name: str
     arguments: list[Variable]
     expression: Expression
+    _free_names: Optional[frozenset[str]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def pretty(self) -> str:
-        arguments = " ".join((i.name for i in self.arguments))
-        return f"{self.name} {arguments} = {self.expression.pretty()};"
+        return pretty(self)
+
+    def free_names(self) -> frozenset[str]:
+        return free_names(self)
+
+    def free_occurrences(self, name: str) -> list[Variable]:
+        return free_occurrences(self, name)
 
     def free_variables(self) -> list[Variable]:
-        return diference(self.expression.free_variables(), self.arguments)
+        return first_occurrences(self, self.free_names())
 
 
-@dataclass
+@dataclass(slots=True)
 class Declaration(HasRange):
     name: str
     _type: Type
 
     def pretty(self) -> str:
-        return f"{self.name} : {self._type.pretty()};"
+        return pretty(self)
+
+
+def _binary(node: Any) -> tuple[Any, ...]:
+    return (node.left, node.right)
+
+
+# The nodes with a range directly inside a node, in source order
+_CHILDREN: dict[type, Callable[[Any], tuple[Any, ...]]] = {
+    Application: _binary,
+    OperatorApplication: _binary,
+    Arrow: _binary,
+    Function: lambda node: (node.argument, node.expression),
+    If: lambda node: (
+        node.condition,
+        node.true_expression,
+        node.false_expression,
+    ),
+    Annotation: lambda node: (node.expression, node.annotation),
+    Definition: lambda node: (*node.arguments, node.expression),
+    Declaration: lambda node: (node._type,),
+}
+
+
+def children(node: Any) -> tuple[Any, ...]:
+    get = _CHILDREN.get(type(node), None)
+    if get is None:
+        return ()
+    return get(node)
+
+
+def _unknown_free_names(node: Any) -> tuple[Any, ...]:
+    # The subexpressions of `node` if its free names aren't cached yet
+    match node:
+        case Application(left=left, right=right) | OperatorApplication(
+            left=left, right=right
+        ):
+            if node._free_names is None:
+                return (left, right)
+        case Function(expression=expression) | Definition(
+            expression=expression
+        ):
+            if node._free_names is None:
+                return (expression,)
+        case If(
+            condition=condition,
+            true_expression=true_expression,
+            false_expression=false_expression,
+        ):
+            if node._free_names is None:
+                return (condition, true_expression, false_expression)
+        case Annotation(expression=expression):
+            return (expression,)
+    return ()
+
+
+def _combine_free_names(
+    node: Any, names: list[frozenset[str]]
+) -> frozenset[str]:
+    match node:
+        case Variable():
+            return node.free_names()
+        case Application() | OperatorApplication() | If():
+            if node._free_names is None:
+                result = names[0]
+                for other in names[1:]:
+                    result = union(result, other)
+                node._free_names = result
+            return node._free_names
+        case Function(argument=argument):
+            if node._free_names is None:
+                node._free_names = diference(names[0], argument.free_names())
+            return node._free_names
+        case Definition(arguments=arguments):
+            if node._free_names is None:
+                node._free_names = diference(
+                    names[0], frozenset(i.name for i in arguments)
+                )
+            return node._free_names
+        case Annotation():
+            return names[0]
+    return EMPTY_NAMES
+
+
+def free_names(node: Expression | Definition) -> frozenset[str]:
+    return fold(node, _combine_free_names, _unknown_free_names)
+
+
+def free_occurrences(
+    node: Expression | Definition, name: str
+) -> list[Variable]:
+    # In source order, the subexpressions where `name` isn't free are
+    # skipped
+    def inner(node: Any) -> tuple[Any, ...]:
+        if type(node) is Variable or name not in node.free_names():
+            return ()
+        match node:
+            case (
+                Function(expression=expression)
+                | Annotation(expression=expression)
+                | Definition(expression=expression)
+            ):
+                return (expression,)
+        return children(node)
+
+    return [
+        node
+        for node in preorder(node, inner)
+        if type(node) is Variable and node.name == name
+    ]
+
+
+def _enclosed(expression: Expression, doc: Doc) -> Doc:
+    # A lambda or an if would take everything after them as part of their
+    # last expression
+    if isinstance(expression, (Function, If)):
+        return concat(text("("), doc, text(")"))
+    return doc
+
+
+def _build(
+    node: Expression | Type | Definition | Declaration, docs: list[Doc]
+) -> Doc:
+    match node:
+        case Variable(name=name):
+            return text(name)
+        case (
+            BoolLiteral()
+            | IntLiteral()
+            | UnitLiteral()
+            | BoolType()
+            | IntType()
+            | UnitType()
+        ):
+            return text(node.pretty())
+        case Application():
+            expressions = spine(node)
+            arguments = [
+                (
+                    concat(line(), concat(text("("), doc, text(")")))
+                    if isinstance(argument, (Function, If, Application))
+                    else concat(line(), doc)
+                )
+                for argument, doc in zip(expressions[1:], docs[1:])
+            ]
+            return group(
+                _enclosed(expressions[0], docs[0]), nest(2, *arguments)
+            )
+        case OperatorApplication(left=left, operator=operator):
+            return group(
+                text("("),
+                _enclosed(left, docs[0]),
+                text(" " + operator),
+                nest(2, line(), docs[1]),
+                text(")"),
+            )
+        case Function(expression=expression):
+            # the body of a lambda in a chain of them (`\\ x -> \\ y -> ...`)
+            # is hung at the indentation of the chain
+            if isinstance(expression, Function):
+                return group(text("\\ "), docs[0], text(" ->"), line(), docs[1])
+            return group(
+                text("\\ "), docs[0], text(" ->"), nest(2, line(), docs[1])
+            )
+        case If():
+            return group(
+                text("if "),
+                docs[0],
+                line(),
+                text("then "),
+                docs[1],
+                line(),
+                text("else "),
+                docs[2],
+            )
+        case Annotation():
+            return group(
+                text("("),
+                docs[0],
+                text(" :"),
+                nest(2, line(), docs[1]),
+                text(")"),
+            )
+        case Arrow(left=left):
+            if isinstance(left, Arrow):
+                return group(text("("), docs[0], text(") ->"), line(), docs[1])
+            return group(docs[0], text(" ->"), line(), docs[1])
+        case Definition(name=name, arguments=arguments):
+            arguments_text = " ".join((i.name for i in arguments))
+            return group(
+                text(f"{name} {arguments_text} ="),
+                nest(2, line(), docs[0]),
+                text(";"),
+            )
+        case Declaration(name=name):
+            return group(text(f"{name} :"), nest(2, line(), docs[0]), text(";"))
+    raise TypeError(node)
+
+
+def spine(application: "Application") -> list[Expression]:
+    # `f a b c` as [f, a, b, c]
+    arguments: list[Expression] = []
+    node: Expression = application
+    while isinstance(node, Application):
+        arguments.append(node.right)
+        node = node.left
+    arguments.append(node)
+    arguments.reverse()
+    return arguments
+
+
+def _document_children(
+    node: Expression | Type | Definition | Declaration,
+) -> list[Expression | Type]:
+    match node:
+        case Application():
+            return spine(node)
+        case OperatorApplication(left=left, right=right) | Arrow(
+            left=left, right=right
+        ):
+            return [left, right]
+        case Function(argument=argument, expression=expression):
+            return [argument, expression]
+        case If(
+            condition=condition,
+            true_expression=true_expression,
+            false_expression=false_expression,
+        ):
+            return [condition, true_expression, false_expression]
+        case Annotation(expression=expression, annotation=annotation):
+            return [expression, annotation]
+        case Definition(expression=expression):
+            return [expression]
+        case Declaration(_type=_type):
+            return [_type]
+    return []
+
+
+def document(node: Expression | Type | Definition | Declaration) -> Doc:
+    return fold(node, _build, _document_children)
+
+
+def _application_pieces(node: "Application") -> list[Any]:
+    arguments = spine(node)
+    pieces: list[Any] = _enclosed_pieces(arguments[0])
+    for argument in arguments[1:]:
+        if isinstance(argument, (Function, If, Application)):
+            pieces.extend((" (", argument, ")"))
+        else:
+            pieces.extend((" ", argument))
+    return pieces
+
+
+def _enclosed_pieces(expression: Expression) -> list[Any]:
+    if isinstance(expression, (Function, If)):
+        return ["(", expression, ")"]
+    return [expression]
+
+
+def _operator_pieces(node: "OperatorApplication") -> list[Any]:
+    return [
+        "(",
+        *_enclosed_pieces(node.left),
+        f" {node.operator} ",
+        node.right,
+        ")",
+    ]
+
+
+def _arrow_pieces(node: "Arrow") -> list[Any]:
+    if isinstance(node.left, Arrow):
+        return ["(", node.left, ") -> ", node.right]
+    return [node.left, " -> ", node.right]
+
+
+def _definition_pieces(node: "Definition") -> list[Any]:
+    arguments = " ".join((i.name for i in node.arguments))
+    return [f"{node.name} {arguments} = ", node.expression, ";"]
+
+
+# The text of a node printed flat, as strings and nodes to print
+_PIECES: dict[type, Callable[[Any], list[Any]]] = {
+    Variable: lambda node: [node.name],
+    BoolLiteral: lambda node: [str(node.value)],
+    IntLiteral: lambda node: [str(node.value)],
+    UnitLiteral: lambda node: ["unit"],
+    BoolType: lambda node: ["Bool"],
+    IntType: lambda node: ["Int"],
+    UnitType: lambda node: ["Unit"],
+    Application: _application_pieces,
+    OperatorApplication: _operator_pieces,
+    Function: lambda node: ["\\ ", node.argument, " -> ", node.expression],
+    If: lambda node: [
+        "if ",
+        node.condition,
+        " then ",
+        node.true_expression,
+        " else ",
+        node.false_expression,
+    ],
+    Annotation: lambda node: [
+        "(",
+        node.expression,
+        " : ",
+        node.annotation,
+        ")",
+    ],
+    Arrow: _arrow_pieces,
+    Definition: _definition_pieces,
+    Declaration: lambda node: [f"{node.name} : ", node._type, ";"],
+}
+
+
+def pretty(node: Expression | Type | Definition | Declaration) -> str:
+    # Flat, the same text `render_string(document(node))` gives, without
+    # building the document
+    output: list[str] = []
+    stack: list[Any] = [node]
+    append, pop, extend = output.append, stack.pop, stack.extend
+    while stack:
+        item = pop()
+        kind = type(item)
+        if kind is str:
+            append(item)
+        elif kind is Variable:
+            append(item.name)
+        else:
+            pieces = _PIECES[kind](item)
+            pieces.reverse()
+            extend(pieces)
+    return "".join(output)
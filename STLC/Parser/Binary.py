@@ -0,0 +1,448 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from dataclasses import dataclass
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Optional
+
+from lark import Lark
+
+from STLC.Parser.AST import (
+    Variable,
+    BoolLiteral,
+    IntLiteral,
+    UnitLiteral,
+    Application,
+    OperatorApplication,
+    Function,
+    If,
+    Annotation,
+    BoolType,
+    IntType,
+    UnitType,
+    Arrow,
+    Definition,
+    Declaration,
+    children,
+)
+from STLC.Parser.Parser import parse_string_to_ast, ParserError, cache_directory
+from STLC.Range import LineIndex, Range
+from STLC.Traversal import fold
+
+# A compact binary format for parsed programs, to load a file again
+# without lexing or parsing it. Little endian, laid out as:
+#
+#   header     magic, version and the length of every section (`HEADER`)
+#   kinds      u8 per node
+#   starts     u32 per node, offset where the range of the node starts
+#   ends       u32 per node
+#   a, b, c    u32 per node each, the operands of the node (see below)
+#   ints       i64 per int literal
+#   extra      u32, the arguments of definitions: count, then the nodes
+#   roots      u32 per statement, the nodes of the statements
+#   lines      u32 per line, the `LineIndex` of the source
+#   strings    u32 per string, its length in characters, then all of
+#              them encoded as a single utf8 blob
+#
+# Sections start at multiples of 8. Nodes are stored in postorder, so the
+# children of a node are always read before it. Operands are node
+# indices, except for names and operators (string indices), booleans (0
+# or 1) and int literals (an index in `ints`, or a string index for the
+# ones that don't fit in 64 bits).
+#
+# The reader maps the file and reads the sections through memoryviews,
+# nothing is copied before building the nodes.
+
+MAGIC = b"STLCAST\x00"
+FORMAT_VERSION = 1
+
+# magic, version, unused, nodes, ints, extra, roots, lines, strings,
+# length of the source, sha256 of the source
+HEADER = struct.Struct("<8sHHIIIIIIQ32s")
+
+SUFFIX = ".stlcast"
+
+VARIABLE = 0
+BOOL = 1
+INT = 2
+BIG_INT = 3
+UNIT = 4
+APPLICATION = 5
+OPERATOR = 6
+FUNCTION = 7
+IF = 8
+ANNOTATION = 9
+BOOL_TYPE = 10
+INT_TYPE = 11
+UNIT_TYPE = 12
+ARROW = 13
+DEFINITION = 14
+DECLARATION = 15
+
+INT64_MIN = -(2**63)
+INT64_MAX = 2**63 - 1
+
+_LITTLE = sys.byteorder == "little"
+
+
+@dataclass
+class BinaryLoadError:
+    msg: str
+
+    def pretty(self) -> str:
+        return f"Can't load the binary AST: {self.msg}"
+
+
+@dataclass
+class BinaryAST:
+    statements: list[Definition | Declaration]
+    lines: LineIndex
+    # sha256 of the source it was parsed from
+    source_hash: bytes
+
+
+def _padding(size: int) -> bytes:
+    return b"\x00" * (-size % 8)
+
+
+class _Writer:
+    def __init__(self):
+        self.kinds = array("B")
+        self.starts = array("I")
+        self.ends = array("I")
+        self.a = array("I")
+        self.b = array("I")
+        self.c = array("I")
+        self.ints = array("q")
+        self.extra = array("I")
+        self.strings: dict[str, int] = dict()
+
+    def string(self, value: str) -> int:
+        index = self.strings.get(value, None)
+        if index is None:
+            index = len(self.strings)
+            self.strings[value] = index
+        return index
+
+    def add(
+        self, node: Any, kind: int, a: int = 0, b: int = 0, c: int = 0
+    ) -> int:
+        self.kinds.append(kind)
+        self.starts.append(node._range.position_start)
+        self.ends.append(node._range.position_end)
+        self.a.append(a)
+        self.b.append(b)
+        self.c.append(c)
+        return len(self.kinds) - 1
+
+    def node(self, node: Any, children: list[int]) -> int:
+        match node:
+            case Variable(name=name):
+                return self.add(node, VARIABLE, self.string(name))
+            case BoolLiteral(value=value):
+                return self.add(node, BOOL, int(value))
+            case IntLiteral(value=value):
+                if INT64_MIN <= value <= INT64_MAX:
+                    self.ints.append(value)
+                    return self.add(node, INT, len(self.ints) - 1)
+                return self.add(node, BIG_INT, self.string(str(value)))
+            case UnitLiteral():
+                return self.add(node, UNIT)
+            case Application():
+                return self.add(node, APPLICATION, *children)
+            case OperatorApplication(operator=operator):
+                return self.add(
+                    node, OPERATOR, *children, self.string(operator)
+                )
+            case Function():
+                return self.add(node, FUNCTION, *children)
+            case If():
+                return self.add(node, IF, *children)
+            case Annotation():
+                return self.add(node, ANNOTATION, *children)
+            case BoolType():
+                return self.add(node, BOOL_TYPE)
+            case IntType():
+                return self.add(node, INT_TYPE)
+            case UnitType():
+                return self.add(node, UNIT_TYPE)
+            case Arrow():
+                return self.add(node, ARROW, *children)
+            case Definition(name=name, arguments=arguments):
+                offset = len(self.extra)
+                self.extra.append(len(arguments))
+                self.extra.extend(children[:-1])
+                return self.add(
+                    node, DEFINITION, self.string(name), offset, children[-1]
+                )
+            case Declaration(name=name):
+                return self.add(node, DECLARATION, self.string(name), *children)
+        raise TypeError(node)
+
+
+def dumps(
+    statements: list[Definition | Declaration],
+    lines: LineIndex,
+    source_hash: bytes = bytes(32),
+) -> bytes:
+    writer = _Writer()
+    roots = array("I")
+    for statement in statements:
+        # postorder, the children of a node are written before it
+        roots.append(fold(statement, writer.node, children))
+    line_starts = array("I", lines.line_starts)
+    strings = list(writer.strings)
+    lengths = array("I", map(len, strings))
+    blob = "".join(strings).encode("utf8")
+    sections = [
+        writer.kinds,
+        writer.starts,
+        writer.ends,
+        writer.a,
+        writer.b,
+        writer.c,
+        writer.ints,
+        writer.extra,
+        roots,
+        line_starts,
+        lengths,
+    ]
+    if not _LITTLE:
+        for section in sections:
+            section.byteswap()
+    output = [
+        HEADER.pack(
+            MAGIC,
+            FORMAT_VERSION,
+            0,
+            len(writer.kinds),
+            len(writer.ints),
+            len(writer.extra),
+            len(roots),
+            len(line_starts),
+            len(strings),
+            lines.length,
+            source_hash,
+        ),
+        _padding(HEADER.size),
+    ]
+    for section in sections:
+        data = section.tobytes()
+        output.append(data)
+        output.append(_padding(len(data)))
+    output.append(blob)
+    return b"".join(output)
+
+
+def loads(buffer: Any) -> BinaryLoadError | BinaryAST:
+    if len(buffer) < HEADER.size:
+        return BinaryLoadError("truncated header")
+    (
+        magic,
+        version,
+        _,
+        node_count,
+        int_count,
+        extra_count,
+        root_count,
+        line_count,
+        string_count,
+        length,
+        source_hash,
+    ) = HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        return BinaryLoadError("not a binary AST")
+    if version != FORMAT_VERSION:
+        return BinaryLoadError(
+            f"format version {version}, expected {FORMAT_VERSION}"
+        )
+    view = memoryview(buffer)
+    offset = HEADER.size + len(_padding(HEADER.size))
+    views: list[memoryview] = []
+
+    def section(count: int, typecode: str, size: int) -> Any:
+        nonlocal offset
+        end = offset + count * size
+        if end > len(view):
+            raise IndexError
+        data = view[offset:end]
+        offset = end + len(_padding(count * size))
+        if typecode == "B":
+            views.append(data)
+            return data
+        if not _LITTLE:
+            copy = array(typecode, data)
+            copy.byteswap()
+            return copy
+        cast = data.cast(typecode)
+        views.extend((data, cast))
+        return cast
+
+    try:
+        try:
+            kinds = section(node_count, "B", 1)
+            starts = section(node_count, "I", 4)
+            ends = section(node_count, "I", 4)
+            a = section(node_count, "I", 4)
+            b = section(node_count, "I", 4)
+            c = section(node_count, "I", 4)
+            ints = section(int_count, "q", 8)
+            extra = section(extra_count, "I", 4)
+            roots = section(root_count, "I", 4)
+            line_starts = section(line_count, "I", 4)
+            lengths = section(string_count, "I", 4)
+        except IndexError:
+            return BinaryLoadError("truncated sections")
+        try:
+            blob = str(view[offset:], "utf8")
+        except UnicodeDecodeError:
+            return BinaryLoadError("corrupted string table")
+        if sum(lengths) != len(blob):
+            return BinaryLoadError("truncated string table")
+        strings: list[str] = []
+        position = 0
+        for size in lengths:
+            strings.append(sys.intern(blob[position : position + size]))
+            position += size
+        lines = LineIndex()
+        lines.line_starts = array("q", line_starts)
+        lines.length = length
+        try:
+            nodes = _build(
+                kinds, starts, ends, a, b, c, ints, extra, strings, lines
+            )
+            statements = [nodes[i] for i in roots]
+        except (IndexError, KeyError):
+            return BinaryLoadError("corrupted nodes")
+    finally:
+        # the buffer (a mmap) can't be closed while views into it exist
+        for v in reversed(views):
+            v.release()
+        view.release()
+    return BinaryAST(statements, lines, source_hash)
+
+
+def _build(
+    kinds: Any,
+    starts: Any,
+    ends: Any,
+    a: Any,
+    b: Any,
+    c: Any,
+    ints: Any,
+    extra: Any,
+    strings: list[str],
+    lines: LineIndex,
+) -> list[Any]:
+    nodes: list[Any] = []
+    append = nodes.append
+    for i in range(len(kinds)):
+        kind = kinds[i]
+        _range = Range(starts[i], ends[i], lines)
+        if kind == VARIABLE:
+            append(Variable(_range, strings[a[i]]))
+        elif kind == APPLICATION:
+            append(Application(_range, nodes[a[i]], nodes[b[i]]))
+        elif kind == INT:
+            append(IntLiteral(_range, ints[a[i]]))
+        elif kind == OPERATOR:
+            append(
+                OperatorApplication(
+                    _range, nodes[a[i]], nodes[b[i]], strings[c[i]]
+                )
+            )
+        elif kind == FUNCTION:
+            append(Function(_range, nodes[a[i]], nodes[b[i]]))
+        elif kind == IF:
+            append(If(_range, nodes[a[i]], nodes[b[i]], nodes[c[i]]))
+        elif kind == BOOL:
+            append(BoolLiteral(_range, bool(a[i])))
+        elif kind == UNIT:
+            append(UnitLiteral(_range))
+        elif kind == ANNOTATION:
+            append(Annotation(_range, nodes[a[i]], nodes[b[i]]))
+        elif kind == ARROW:
+            append(Arrow(_range, nodes[a[i]], nodes[b[i]]))
+        elif kind == INT_TYPE:
+            append(IntType(_range))
+        elif kind == BOOL_TYPE:
+            append(BoolType(_range))
+        elif kind == UNIT_TYPE:
+            append(UnitType(_range))
+        elif kind == DEFINITION:
+            offset = b[i]
+            arguments = [
+                nodes[j] for j in extra[offset + 1 : offset + 1 + extra[offset]]
+            ]
+            append(Definition(_range, strings[a[i]], arguments, nodes[c[i]]))
+        elif kind == DECLARATION:
+            append(Declaration(_range, strings[a[i]], nodes[b[i]]))
+        elif kind == BIG_INT:
+            append(IntLiteral(_range, int(strings[a[i]])))
+        else:
+            raise KeyError(kind)
+    return nodes
+
+
+def write_ast(
+    path: Path,
+    statements: list[Definition | Declaration],
+    lines: LineIndex,
+    source_hash: bytes = bytes(32),
+) -> None:
+    # Written to a temporary file first, so a reader never maps half a file
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(temporary, "wb") as file:
+        file.write(dumps(statements, lines, source_hash))
+    os.replace(temporary, path)
+
+
+def read_ast(path: Path) -> BinaryLoadError | BinaryAST:
+    try:
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return BinaryLoadError("empty file")
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return loads(data)
+    except OSError as e:
+        return BinaryLoadError(str(e))
+
+
+def ast_cache_path(path: Path) -> Optional[Path]:
+    # One entry per source file, replaced when the file changes
+    directory = cache_directory()
+    if directory is None:
+        return None
+    directory = directory / "ast"
+    try:
+        directory.mkdir(exist_ok=True)
+    except OSError:
+        return None
+    key = sha256(str(path.resolve()).encode("utf8")).hexdigest()
+    return directory / f"{key}{SUFFIX}"
+
+
+def parse_cached(
+    lark: Lark, path: Path, text: str
+) -> ParserError | list[Definition | Declaration]:
+    # The statements of `text` (the content of `path`), loaded from the
+    # AST cache if it was parsed before
+    source_hash = sha256(text.encode("utf8")).digest()
+    cache = ast_cache_path(path)
+    if cache is not None and cache.exists():
+        loaded = read_ast(cache)
+        if isinstance(loaded, BinaryAST) and loaded.source_hash == source_hash:
+            return loaded.statements
+    statements = parse_string_to_ast(lark, text)
+    if isinstance(statements, ParserError):
+        return statements
+    if cache is not None:
+        lines = statements[0]._range.lines if statements else LineIndex(text)
+        try:
+            write_ast(cache, statements, lines, source_hash)
+        except OSError:
+            pass
+    return statements
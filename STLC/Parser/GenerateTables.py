@@ -0,0 +1,91 @@
+# Writes `STLC/Parser/Tables.py`, the pre-generated LALR tables that
+# `load_grammar` uses instead of analysing `Grammar.lark` at start up.
+# Run it again (`make gen-tables`) after any change to the grammar, stale
+# tables are detected by their hash and ignored.
+import base64
+import pickle
+import zlib
+from argparse import ArgumentParser
+from pathlib import Path
+
+from lark import Lark
+from lark.grammar import Rule
+from lark.lexer import TerminalDef
+
+from STLC.Parser.Parser import (
+    LARK_OPTIONS,
+    LoadGrammarError,
+    read_grammar,
+    grammar_hash,
+)
+
+
+def encode(value: object) -> str:
+    compressed = zlib.compress(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+    encoded = base64.b64encode(compressed).decode("ascii")
+    lines = [encoded[i : i + 76] for i in range(0, len(encoded), 76)]
+    return "\n".join(f'            "{line}"' for line in lines)
+
+
+def generate(start_symbols: list[str]) -> str:
+    grammar = read_grammar()
+    if isinstance(grammar, LoadGrammarError):
+        raise OSError("Can't read the STLC grammar")
+    lark = Lark(grammar, start=start_symbols, **LARK_OPTIONS)
+    data, memo = lark.memo_serialize([TerminalDef, Rule])
+    return f"""# Generated by `python -m STLC.Parser.GenerateTables`, don't edit.
+import base64
+import pickle
+import zlib
+
+GRAMMAR_HASH = (
+    "{grammar_hash(grammar, start_symbols)}"
+)
+
+DATA = pickle.loads(
+    zlib.decompress(
+        base64.b64decode(
+{encode(data)}
+        )
+    )
+)
+
+MEMO = pickle.loads(
+    zlib.decompress(
+        base64.b64decode(
+{encode(memo)}
+        )
+    )
+)
+"""
+
+
+def main():
+    parser = ArgumentParser(
+        prog="Generate the pre-computed STLC parser tables",
+    )
+    parser.add_argument(
+        "-s",
+        "--symbol",
+        nargs="+",
+        type=str,
+        default=["top"],
+        metavar="Lark_rule",
+        help="The start rules to generate tables for",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        default=str(Path(__file__).parent / "Tables.py"),
+        metavar="FILE",
+        help="Where to write the generated module",
+    )
+    args = parser.parse_args()
+    with open(args.output, "w") as f:
+        f.write(generate(args.symbol))
+    return 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import re
+from array import array
+from typing import NamedTuple
+
+# A lexer for the terminals of `Grammar.lark` that scans a whole text with a
+# single regular expression and keeps the tokens in three arrays instead of
+# a lark `Token` per token: the parser (`Parser.parse_lexemes`) only builds
+# the `Token` of a terminal when it shifts it.
+#
+# It must split a text exactly as lark's basic lexer does, so the
+# alternatives are in the order lark tries them (priority first, then
+# length) and the quirks are kept: "iffy" is `IF` and `VARIABLE`, "a-1" is
+# `VARIABLE` and `INT_LITERAL`. The keywords of types are only keywords if
+# they are a whole word, lark checks them after matching a `VARIABLE`.
+# Update it with the grammar.
+
+# Names of the kinds of tokens: the kind of a token is the number of the
+# group of `_SCANNER` that matched it. Every text ends in an `$END` and a
+# character that no terminal matches is an `<ERROR>`, that no parser state
+# accepts.
+_TERMINALS = [
+    ("$END", r"\Z"),
+    ("INT_LITERAL", r"-?[1-9][0-9_]*|0[0_]*"),
+    ("FALSE", r"False"),
+    ("ELSE", r"else"),
+    ("THEN", r"then"),
+    ("TRUE", r"True"),
+    ("CMP", r"=="),
+    ("GEQ", r">="),
+    ("IF", r"if"),
+    ("LEQ", r"<="),
+    ("NEQ", r"/="),
+    ("BOOL", r"Bool(?![a-zA-Z_])"),
+    ("UNIT_TYPE", r"Unit(?![a-zA-Z_])"),
+    ("INT_TYPE", r"Int(?![a-zA-Z_])"),
+    ("VARIABLE", r"[a-zA-Z_]+"),
+    ("ARROW", r"->"),
+    ("AND", r"&"),
+    ("COLON", r":"),
+    ("DIV", r"/"),
+    ("EQUAL", r"="),
+    ("GE", r">"),
+    ("LAMBDA", r"\\"),
+    ("LE", r"<"),
+    ("LPAREN", r"\("),
+    ("MINUS", r"-"),
+    ("NOT", r"~"),
+    ("OR", r"\|"),
+    ("PLUS", r"\+"),
+    ("RPAREN", r"\)"),
+    ("SEMICOLON", r";"),
+    ("STAR", r"\*"),
+    ("<ERROR>", r"."),
+]
+
+KINDS = ["", *(name for name, _ in _TERMINALS)]
+END = KINDS.index("$END")
+ERROR = KINDS.index("<ERROR>")
+
+# Spaces and comments are skipped by the match of the token after them
+# (possessively, a space can't be given back to `<ERROR>`).
+_SCANNER = re.compile(
+    r"(?:[ \n]+|#[^\n]*)*+(?:"
+    + "|".join(f"({pattern})" for _, pattern in _TERMINALS)
+    + ")",
+    re.DOTALL,
+)
+
+Lexemes = NamedTuple(
+    "Lexemes",
+    [
+        ("kinds", array),
+        ("starts", array),
+        ("ends", array),
+    ],
+)
+
+
+def lex(text: str) -> Lexemes:
+    # The last token is always an `$END`, after an `<ERROR>` the rest of the
+    # tokens are meaningless.
+    kinds, starts, ends = array("B"), array("q"), array("q")
+    add_kind, add_start, add_end = kinds.append, starts.append, ends.append
+    for match in _SCANNER.finditer(text):
+        kind = match.lastindex
+        add_kind(kind)
+        add_start(match.start(kind))
+        add_end(match.end())
+    if len(kinds) > 1 and kinds[-2] == END:
+        # the spaces at the end matched with an `$END`, and then the empty
+        # end of the text matched again
+        kinds.pop()
+        starts.pop()
+        ends.pop()
+    return Lexemes(kinds, starts, ends)
@@ -1,5 +1,7 @@
-from typing import Optional
+import os
+from typing import Optional, Any, Iterable, Iterator, NamedTuple, TextIO
 from pathlib import Path
+from hashlib import sha256
 from dataclasses import dataclass
 from importlib.resources import files
 
@@ -8,10 +10,27 @@ from lark import (
     Lark,
     Tree,
     UnexpectedInput,
+    UnexpectedCharacters,
     Token,
+    Transformer,
+    __version__ as lark_version,
 )
 
 from STLC.Error import STLCError
+from STLC.Parser.AST import Definition, Declaration
+from STLC.Parser.Lexer import KINDS, Lexemes, lex
+from STLC.Parser.Transformation import ToAST
+from STLC.Range import LineIndex
+from STLC.Timings import timed
+
+# The fast paths read internals of lark 1.3: the LALR tables, callbacks
+# and lexer of a parser, and the pregenerated tables are loaded with
+# `Lark._load_from_dict`. With another version they fall back to the
+# public API of lark.
+try:
+    from lark.parsers.lalr_analysis import Shift
+except ImportError:
+    Shift = None  # type: ignore
 
 
 class ParserStageError(STLCError):
@@ -37,43 +56,206 @@ class ParserError(ParserStageError):
     exception: UnexpectedInput
 
 
+GRAMMAR_PATH = "Parser/Grammar.lark"
+
+# Shared by `load_grammar` and `STLC.Parser.GenerateTables`, changing any
+# of them changes the hash of the grammar and invalidates every cache.
+LARK_OPTIONS: dict[str, Any] = {
+    "propagate_positions": False,
+    "maybe_placeholders": True,
+    "keep_all_tokens": True,
+    "parser": "lalr",
+    "lexer": "basic",
+}
+
+
+def read_grammar() -> LoadGrammarError | str:
+    try:
+        return files("STLC").joinpath(GRAMMAR_PATH).read_text()
+    except OSError:
+        return LoadGrammarError()
+
+
+def grammar_hash(grammar: str, start_symbols: list[str]) -> str:
+    digest = sha256()
+    digest.update(lark_version.encode("utf8"))
+    digest.update(grammar.encode("utf8"))
+    digest.update(",".join(start_symbols).encode("utf8"))
+    digest.update(repr(sorted(LARK_OPTIONS.items())).encode("utf8"))
+    return digest.hexdigest()
+
+
+def cache_directory() -> Optional[Path]:
+    base = os.environ.get("XDG_CACHE_HOME")
+    if base:
+        directory = Path(base) / "stlc"
+    else:
+        directory = Path.home() / ".cache" / "stlc"
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return None
+    return directory
+
+
+def load_pregenerated(
+    grammar: str, start_symbols: list[str], **options: Any
+) -> Optional[Lark]:
+    try:
+        from STLC.Parser import Tables
+    except ImportError:
+        return None
+    if Tables.GRAMMAR_HASH != grammar_hash(grammar, start_symbols):
+        return None
+    try:
+        return Lark._load_from_dict(Tables.DATA, Tables.MEMO, **options)
+    except Exception:
+        return None
+
+
+@timed("load_grammar")
 def load_grammar(
-    debug: Optional[bool] = None, start_symbols: Optional[list[str]] = ["top"]
+    debug: Optional[bool] = None,
+    start_symbols: Optional[list[str]] = ["top"],
+    use_cache: bool = True,
+    transformer: Optional[Transformer] = None,
 ) -> LoadGrammarError | LarkLoadError | Lark:
     if debug is None:
         debug = False
-    grammarPath = "Parser/Grammar.lark"
     if start_symbols is None:
         start_symbols = ["top"]
-    try:
-        grammar = files("STLC").joinpath(grammarPath).read_text()
-    except OSError:
-        return LoadGrammarError()
+    grammar = read_grammar()
+    if isinstance(grammar, LoadGrammarError):
+        return grammar
+    cache: Optional[str] = None
+    if use_cache and not debug:
+        pregenerated = load_pregenerated(
+            grammar, start_symbols, transformer=transformer
+        )
+        if pregenerated is not None:
+            return pregenerated
+        directory = cache_directory()
+        if directory is not None:
+            key = grammar_hash(grammar, start_symbols)
+            cache = str(directory / f"grammar-{key}.lark-cache")
     try:
         parser = Lark(
             grammar,
             start=start_symbols,
             debug=debug,
-            cache=None,
-            propagate_positions=False,
-            maybe_placeholders=True,
-            keep_all_tokens=True,
-            parser="lalr",
-            lexer="basic",
+            cache=cache,
+            transformer=transformer,
+            **LARK_OPTIONS,
         )
     except Exception as e:
         return LarkLoadError(str(e))
     return parser
 
 
+# The fused parser calls the `ToAST` callbacks at every LALR reduction, so
+# the lark `Tree` is never built and tokens are released as soon as the
+# rule that consumed them is reduced.
+def load_fused_grammar(
+    debug: Optional[bool] = None,
+    start_symbols: Optional[list[str]] = ["top"],
+    use_cache: bool = True,
+) -> LoadGrammarError | LarkLoadError | Lark:
+    return load_grammar(debug, start_symbols, use_cache, ToAST())
+
+
+# Returned by `parse_lexemes` for a text that isn't in the language
+REJECTED = object()
+
+
+def parse_lexemes(
+    lark: Lark, text: str, lexemes: Lexemes, offset: int = 0
+) -> Any:
+    # The LALR loop of lark (`ParserState.feed_token`) over the tokens of
+    # `STLC.Parser.Lexer`, positions are moved by `offset`. Rejected texts
+    # are reported by parsing them again with lark, that builds the error
+    # with the expected terminals and the context.
+    if Shift is None:
+        return REJECTED
+    try:
+        parser = lark.parser.parser.parser
+        table = parser.parse_table
+        callbacks = parser.callbacks
+    except AttributeError:
+        return REJECTED
+    start = lark.options.start[0]
+    states = table.states
+    end_state = table.end_states[start]
+    state_stack = [table.start_states[start]]
+    value_stack: list[Any] = []
+    kinds, starts, ends = lexemes
+    for kind, position_start, position_end in zip(kinds, starts, ends):
+        name = KINDS[kind]
+        while True:
+            try:
+                action, argument = states[state_stack[-1]][name]
+            except KeyError:
+                return REJECTED
+            if action is Shift:
+                token = Token(
+                    name,
+                    text[position_start:position_end],
+                    position_start + offset,
+                    end_pos=position_end + offset,
+                )
+                state_stack.append(argument)
+                value_stack.append(
+                    callbacks[name](token) if name in callbacks else token
+                )
+                break
+            # reduce, `argument` is the rule
+            size = len(argument.expansion)
+            if size:
+                values = value_stack[-size:]
+                del state_stack[-size:]
+                del value_stack[-size:]
+            else:
+                values = []
+            _, state = states[state_stack[-1]][argument.origin.name]
+            state_stack.append(state)
+            value_stack.append(callbacks[argument](values))
+            if state == end_state and name == "$END":
+                return value_stack[-1]
+    return REJECTED
+
+
+def parse_text(lark: Lark, text: str) -> Any:
+    # `lark.parse(text)`, faster
+    result = parse_lexemes(lark, text, lex(text))
+    if result is REJECTED:
+        return lark.parse(text)
+    return result
+
+
+@timed("parse_string")
 def parse_string(lark: Lark, text: str) -> ParserError | Tree[Token]:
     try:
-        result = lark.parse(text)
+        result = parse_text(lark, text)
         return result
     except UnexpectedInput as uinput:
         return ParserError(uinput)
 
 
+@timed("parse_string_to_ast")
+def parse_string_to_ast(
+    lark: Lark, text: str
+) -> ParserError | list[Definition | Declaration]:
+    if lark.options.transformer is None:
+        tree = parse_string(lark, text)
+        if isinstance(tree, ParserError):
+            return tree
+        return ToAST(LineIndex(text)).transform(tree)
+    lark.options.transformer.lines = LineIndex(text)
+    try:
+        return parse_text(lark, text)
+    except UnexpectedInput as uinput:
+        return ParserError(uinput)
+
+
 def parse(
     path: Path, lark: Lark, debug: bool
 ) -> FileLoadError | ParserError | Tree[Token]:
@@ -84,3 +266,138 @@ def parse(
             return maybe_tree
     except OSError:
         return FileLoadError()
+
+
+StatementText = NamedTuple(
+    "StatementText",
+    [
+        ("text", str),
+        ("position", int),
+        ("line", int),
+        ("column", int),
+    ],
+)
+
+
+def read_chunks(file: TextIO, chunk_size: int) -> Iterator[str]:
+    while chunk := file.read(chunk_size):
+        yield chunk
+
+
+def split_statements(chunks: Iterable[str]) -> Iterator[StatementText]:
+    # Every statement ends in the first `;` outside of a comment, so we only
+    # need to keep the text of the current statement in memory.
+    buffer = ""
+    index = 0
+    in_comment = False
+    position, line, column = 0, 1, 1
+    for chunk in chunks:
+        buffer += chunk
+        start = 0
+        while index < len(buffer):
+            if in_comment:
+                newline = buffer.find("\n", index)
+                if newline < 0:
+                    index = len(buffer)
+                    break
+                in_comment = False
+                index = newline + 1
+                continue
+            semicolon = buffer.find(";", index)
+            end = len(buffer) if semicolon < 0 else semicolon
+            comment = buffer.find("#", index, end)
+            if comment >= 0:
+                in_comment = True
+                index = comment + 1
+                continue
+            if semicolon < 0:
+                index = len(buffer)
+                break
+            text = buffer[start : semicolon + 1]
+            yield StatementText(text, position, line, column)
+            newlines = text.count("\n")
+            if newlines:
+                line += newlines
+                column = len(text) - text.rfind("\n")
+            else:
+                column += len(text)
+            position += len(text)
+            start = index = semicolon + 1
+        buffer = buffer[start:]
+        index -= start
+    if buffer:
+        yield StatementText(buffer, position, line, column)
+
+
+def relocate_token(token: Token, statement: StatementText) -> Token:
+    token.start_pos += statement.position  # type: ignore
+    token.end_pos += statement.position  # type: ignore
+    return token
+
+
+def relocate_error(
+    uinput: UnexpectedInput, statement: StatementText
+) -> UnexpectedInput:
+    if not isinstance(uinput.line, int) or not isinstance(uinput.column, int):
+        return uinput
+    if uinput.line == 1:
+        uinput.column += statement.column - 1
+    uinput.line += statement.line - 1
+    if isinstance(uinput, UnexpectedCharacters):
+        uinput.pos_in_stream += statement.position
+    return uinput
+
+
+def parse_statement(
+    lark: Lark, statement: StatementText
+) -> ParserError | list[Definition | Declaration]:
+    result = parse_lexemes(
+        lark, statement.text, lex(statement.text), statement.position
+    )
+    if result is not REJECTED:
+        return result
+    if not hasattr(lark, "lexer") and hasattr(lark, "_build_lexer"):
+        # parsers loaded from tables don't keep one, and `Lark.lex` would
+        # build a new lexer for every statement
+        lark.lexer = lark._build_lexer()
+    interactive = lark.parse_interactive()
+    try:
+        for token in lark.lex(statement.text):
+            interactive.feed_token(relocate_token(token, statement))
+        return interactive.feed_eof()
+    except UnexpectedInput as uinput:
+        return ParserError(relocate_error(uinput, statement))
+
+
+# `lark` must be a fused parser for the "top" symbol (see
+# `load_fused_grammar`), statements are yielded as soon as their `;` is
+# read and the stream stops after the first `ParserError`.
+def parse_stream(
+    lark: Lark, file: TextIO, chunk_size: int = 1 << 16
+) -> Iterator[ParserError | Definition | Declaration]:
+    # Every statement gets the index of its own lines, the ones already
+    # read are released with the statements using them
+    for statement in split_statements(read_chunks(file, chunk_size)):
+        lark.options.transformer.lines = LineIndex(
+            statement.text, statement.position, statement.line, statement.column
+        )
+        result = parse_statement(lark, statement)
+        if isinstance(result, ParserError):
+            yield result
+            return
+        yield from result
+
+
+def parse_file_stream(
+    path: Path, lark: Lark, chunk_size: int = 1 << 16
+) -> Iterator[FileLoadError | ParserError | Definition | Declaration]:
+    try:
+        file = open(path, "r")
+    except OSError:
+        yield FileLoadError()
+        return
+    with file:
+        try:
+            yield from parse_stream(lark, file, chunk_size)
+        except OSError:
+            yield FileLoadError()
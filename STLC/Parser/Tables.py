@@ -0,0 +1,166 @@
+# Generated by `python -m STLC.Parser.GenerateTables`, don't edit.
+import base64
+import pickle
+import zlib
+
+GRAMMAR_HASH = (
+    "2f2290b0043c05fec5b01f151533478f90df6233607bfe17471d2f37a3fd7bab"
+)
+
+DATA = pickle.loads(
+    zlib.decompress(
+        base64.b64decode(
+            "eJzt3PlzE2eex3GDbbC5A4SEXOiWbCxbPiRbF8GAIU4b3egMUXS0blke2d5Naouq/WFLNVPVP/b+"
+            "v/v082D8hjEBMrM7s1WzU7XfPFJL/fTr831aLSHrP2f/e6M6Jf/vlekzLhzUxof62LT++9JA/1Uf"
+            "Vxuj/ZYczx/p42F3vzY4NF+avlemce6hqU0dvjI7c9o5Vc6rMq3KjCqzqlxQ5aIqc6rMq3JJlcuq"
+            "XFHlqirXVLmuyg1VPlPlpiq3VLmtyueq3FHlC1W+VOWuKl+p8rUq36jyrSrfqXLvUDcudNv7o7Fu"
+            "Ha5xIZvafryTNY3bj5PPn+8kctXMTjZXTT6t7u0mdkzduNqujvW2/mu1Nai1D4WMMX98qFfrvx3p"
+            "h+ZfTjSPfjvQTWO2XjvsNkxjripvqFZNY37Puv+xhX1sXFYxnNrPjo8H+mt3MTmbmqNdFYcqTlVc"
+            "qrhV8ajiVcWnyoIqi6rcV2VJFb8qy6qsqBJQZVWVNVXWVdlQJahKSJVNVbZUCasSUSWqSkyVuCoP"
+            "VPlelYeqbKvySJXHqjxRZUeVp6o8U+UHVXZV+VEVTZU9VZ6rklAlqUpKlbQqGVWyquRUeaFKXpWC"
+            "KkVVSqqUVamo8pMqL1X5WZWqKr+oUlOlrkpDlaYquiotVdqqdFTpqtJTpa/KQJWh6NvZw6Pa+Eh0"
+            "izF9NDowa2/6SXXfzKA2GJudgHEpJW9WTdc5J08AR6O+vn9oNZ3o4Lv6rwdj/fCwO9qvDo8HR92D"
+            "QbdRO+r+m25q54y5/HZmd/vR3o6pnTfuYNPawevtRvumNm2c331qajPGCrYYHejj2tFo/B+JZG4J"
+            "tzdGQzFVuYdXpjZrXNhLbWd2EqZ2wZj7t9q4W6sPxK4vGjf4XOOmOGNpc29NAU9kavPGTC7zQkzz"
+            "krFz1iTeObY3dxwunX1QYmqXjeu872g0NLUrxuzT7b2s2M9VMfHt54+ebJvaNePyrjhZ7O3mdjLb"
+            "e6Z23bjFBzabXTXHG8Y13L4/OjK1z4zYmbPFsZ09VSkiJnnTeHTmE5zs9exHv40hnubWW1Or7TdN"
+            "7bZx9a39mdrnhvesfW0nniy9fVziCe8Yl05vM7UvDM9ZD01mlt7erXjkl8ZWtfqJfVQ9GBwfVkOm"
+            "dteYFpuZ2lfG7PPdxIusqX1tzOzIwL4xzj8T5Vtj+vHzlKl9Z8w+Tu4lRd/dM6af7aRNzWZMP9nN"
+            "m5pdPIc1dhjnkxlTcxrTe9bQJTrsB6tP3cZ8duf57utHe4wLmdcN7DWmhYWp+YyZbG5bPHTBmEnt"
+            "WZNYNM5bS+i+cfe9fWhqS+Ll13qlqI9GA1PzG/MvEru5aq6UEo9cNmYeJZOit1aMOavX1K0BY0Yu"
+            "d2319UOP97uiqdaMy3IkeKx1rq0bl+S4Nh6P/t3UNow5Oezui22Dxux2JpMsmFrImN1Jv7D6d9O4"
+            "dbIQq0291RVPKkPcMm7j9sZA6lt3hI0Z14515BHj3lvZYUGpiAKmFjVundGdphYzVs7O/a+bRD3X"
+            "lqnFjRtqJfCJHhh3zl4/pva9cbNaPTmGQ/U0q6b20Jh/c6OpbXcm2iPjinjdHh1UrdNsdc3UHhuJ"
+            "s2f3yScWtdd1U3tiaO95yk9avOr5Nkxtxwic/XxnLFD1oE1Te2rsvGcSH3kKUs8UFFc0F4SVdSEk"
+            "X1fk/xP/K03Ey4iod0U9L+quqNOiVkSdEXVP1FlRM6JeEPWGqBdFHYs6J+qMqPOifiXqJVF/EPWy"
+            "qFdFvSJqTdSron4v6jVRPxP1uqg+UW+I+kzUz0T9RtSbotYn5rF27vdmd0vUe5il9SzDv2G2t0X1"
+            "Ytafi+r8ndnfEfUmjuJk9l+IGuRRnBcny+l/xJFYM3R/whF98EhmrKP4UoyK4ta7oj4V9SsrJnlV"
+            "Jg8Ng685uMLBPAffcPAtB99xcI+DaQ6ucWDjwM6BgwMnBy4O3Bxc5cDDgZeDWQ58HCxwsIjBsTZr"
+            "ad4XigvyQVNaQ05/SktDNUHVBFUTVE1QNUHVBFUTVE1QNUHVBFUThEwQMkHIBCEThEwQMkFIObjL"
+            "gZeDWQ4WOFjE4Fi7YEEuCbi2uMsv6nevF82GqMuiZkVdEfW5qAFRfxF1VdSUqGuihkVdFzUn6oao"
+            "mvWsF61nPZnp99Zegxy4MTjW5sQaD4lHvpiYh9q89ciTRW4t2jVRN0UdiLolalXU8OvH78nHXzrr"
+            "/GCt89uTvz4fv3s++KPn3Tfr+rK195OO67Ljuuy4Ljuuy47rsuO67LguO67Ljuuy47rsuC7XcZft"
+            "12X7ddl+XbZflwF12X5dtl+X7ddl+3XZfl0u6i57scte7Mogr/xeL1q99+0ZPfnBXrxqPWtEjJ4g"
+            "7pM2OWkHK/YHZ8R+0iYn8Z+00UngC8x4gUkuMMkFJrnAJBeY1wLzWmBeC8xrgXktMK8FRrTAiBYY"
+            "0QJTWWAqC0xlQaZyzfILiuO+IJ97Srto3Xr9lbXXKe2ltWhvcA3YuQbs9LFzDdi5BuyUs1POTjk7"
+            "5excA3auATtN7TS109ROUztN7TS1cw3YCWwnsJ3Adq4BO7Xt1LZT2y61PyOlg5QOUjpI6SClg5QO"
+            "UjpI6SClg5QOUjpI6SClg5QOUjpI6SClg5QOUjpI6SClg5QOUjpI6SClQ1LeJKWblG5SuknpJqWb"
+            "lG5SuknpJqWblG5SuknpJqWblG5SuknpJqWblG5SuknpJqWblG5SuknpJqVbUt56ZXlNadPWar9N"
+            "1zZd23Rt07VN1zZd23Rt07VN1zZd23Rt07VN1zZd23Rt07VN1zZd23Rt07VN1zZd23Rt07VN17Z0"
+            "/dyijArYHfmaMqWF5PZT2mOopqiaomqKqimqpqiaomqKqimqpqiaomqKqimqpqiaomqKqimqpqia"
+            "omqKqimqpqiaImRKQt75lPeI1nu7W5P/+3e9H3yP+AVXlo8ry8ce8LEHfOwBH3vAxx7wsQd87AEf"
+            "e8DHHvCxB3zsAR97wMce8LEHfOwBH3vAxx7wsQd87AEfe8DHHvBxZfnYED7ZEF+q9xHqplXuepVg"
+            "qzz4VR78Kne9SvFVuYO7zMrGrGzMysZH2rhrG7OyMSsbs7IxKxuna+N0bczKxqxszMrGrGzMysas"
+            "bASzMSsbs7IxKxvBbMzKxqxszEoOQhwEMTjWviKyk8hOIjuJ7CSyk8hOIjuJ7CSyk8hOIjuJ7CSy"
+            "k8hOIjuJ7CSyk8hOIjuJ7CSyk8hOIjuJ7CSyU1J+/TGfVlpnxKW/4Yz4se+e/+rTym8YdJhBhxl0"
+            "mEGHGXSYQYcZdJhBhxl0mEGHGXSYQYcZdJhBhxl0mEGHGXSYQYcZdJhBhxl0mEGHGXSYQYcZdFgG"
+            "/e2779e+sG79jp/IPOJKe8SpPpJPcc/aOCYe+qM82CmtOzl9y1tiOiWmU2I6JaZTYjolplNiOiWm"
+            "U2I6JaZTYjolplNiICUGUuJRlhhIiYGUGEiJgZQYSImBlBhIiYGUpKaNve2lnpd6Xup5qeelnpd6"
+            "Xup5qeelnpd6Xup5qedlb3tJ6SWll5ReUnpJ6SWll5ReUnpJ6SWll5ReSWl/ZU1jSrtjvQ9xWK4n"
+            "HwVW6VqVGzvpHuX9UbpH6R6le5TuUbpH6R6le5TuUbpH6R6le5TuUbpH6R6le5TuUbpH6R6le5Tu"
+            "UbpH6R6le1RSukjZIWWHlB1SdkjZIWWHlB1SdkjZIWWHlB1SdkjZIWWHlB1SdkjZIWWHlB1SdkjZ"
+            "IWWHlB1SdkjZkZRuUnpI6SGlh5QeUnpI6SGlh5QeUnpI6SGlh5QeUnpI6SGlh5QeUnpI6SGlh5Qe"
+            "UnpI6SGlh5QeUnokpYevdNaHkY+sW70EjhM4TuA4geMEjhM4TuA4geMEjhM4TuA4geMEjhM4TuA4"
+            "geMEjhM4TuA4geMEjhM4TuA4geMEjktgn0V5T8CuS5Ep7b6ocVF/kptOaXk56Snty8np9UGI5CGS"
+            "h0geInmIyiEqhwgbImyIsCHChggbomWIliFahmgZomWIliFahmgZomVI8i1YfO/+i8PJJfLJpfX7"
+            "LpVPLrmtS/T9yZtL9GNtkf1dIXaF2BViV4hdYX9XKF+hfIX9XWEMFcZQYQwVxlBhDBX2d4WZVJhJ"
+            "hZlUmEmFmVSYSYWZVJhJhZlU2N8VGdB9fkiwwV1vEGyDB7/Bg9/grjcoviF3sMSs+syqz6z6fGSf"
+            "u+4zqz6z6jOrPrPqc7p9TrfPrPrMqs+s+syqz6z6zKpPsD6z6jOrPrPqE6zPrPrMqs+s+pLSb1Ha"
+            "xSLYEnc9EPWSxJjS4jj3ZEicIXGGxBkSZ0icoWqGqhmqZqiaoWqGkBlCZgiZIWSGkBlCZgiZIWSG"
+            "kBlCZgiZIWRGQi6zJ+sEqxOsTrA6weoEq7Mn69SrU69OvTr16tSrsyfrpKyTsk7KOinrpKyTsk7K"
+            "OinrpKyTsk7KOinrknLFovxO9OCViXqrbbNuDRB4QOABgQcEHhB4QOABgQcEHhB4QOABgQcEHhB4"
+            "QOABgQcEHhB4QOABgQcEHhB4QOABgQcEHhB4IIFXP+ZDq/d9SPWxH05ZH2ZdnnzEh1Rr1mysb6r0"
+            "MZvvRd2WqUxpLVEfijr3ejY961HrfJFZI98aQ19jgGsMcI18a+yaNYm0Ye3A+nrENXHXx36V54Nf"
+            "mwiyi2Ps4hi7OMb5xHhAMXZxjF0cYxfH2MUxIsSIEGMXx9jFMXZxjF0cYxfH2MUxxhBjF8fYxTF2"
+            "cYwxxNjFMXZxjF0ckwGF2AEr3PUKwVZ48Cs8+BXueoXiK3IHm9YOtkVy59GYj0Sdn5x+icr68lRn"
+            "or5M5ZicfonquXyKLc5xi3Pc4hy3OMctznGLc9ziHLfkDsL8APKpdX+QAzcGx1rk966cT9bzu1fQ"
+            "J+eF9313xzqPJCe4ko5ae/GK0deT00uIPFs9z1bP86DyVMmz1fNs9TxbPc9Wz1MyT8k8Wz3PVs+z"
+            "1fNs9TxbPU/QPLPMs9XzbPU848uzu/Ps7jy7Oy+zivFE0aJei3ot6rWo16Jei3ot6rWo16Jei3ot"
+            "6rWo16Jei3ot6rWo16Jei3ot6rV4omiRskXKFilbpGxJyjgX4SZ3vUmwTR78Jg9+k7vepPim3MED"
+            "ZlVmVmVmVeYjy9x1mVmVmVWZWZWZVZnTLXO6ZWZVZlZlZlVmVmVmVWZWZYKVmVWZWZWZVZlgZWZV"
+            "ZlZlZlWWlN+/+0XVP1m3PiSwTmCdwDqBdQLrBNYJrBNYJ7BOYJ3AOoF1AusE1gmsE1gnsE5gncA6"
+            "gXUC6wTWCawTWCewLoG33wUeTU7/rXhXbvKI/wLwA7V/kPc/5npa5uyXab5Mv2X6LXP2ywxtWe7g"
+            "ibUD63VpcfL+75Z+6BOed79TushOWWQ/LLIfFtkPi+yHRaa+yNQXmfoiU19k6otMfZFBLzLoRQa9"
+            "yGwXme0is12Ubjv/G6/vJ47W6/xDay9PP+Xdg/UuwDX54+8iPvju4RlPDT02a4+B99hlPbZpj63Q"
+            "Yyv02Ao9tkKPrd1ja/fYJD02SY9N0mOT9NgkPTZJj4urx47psWN67JgeF1eP7dNj+/TYPj3ZPj+Q"
+            "0k9KPyn9pPST0k9KPyn9pPST0k9KPyn9pPST0k9KPyn9pPST0k9KPyn9pPST0k9KPyn9pPST0i8p"
+            "dy3Kx6JHZyenf0Bj/WFNYnL6hzUn1ElSJ0mdJHWS1ElSJ0mdJHWS1ElSJ0mdpG6SuknqJqmbpG6S"
+            "uknqJqmbpG6SukmCJgmalKA/WqDWdyaagCsSrki4IuGKhCsSrki4IuGKhCsSrki4Inu0SMUi4YqE"
+            "KxKuSLgi4YqEKxKuSLgi27JIxSIVi1JR47vFJ9b9QQ7cGBxrezwdREgdIXWE1BFSR0gdIXWE1BFS"
+            "R0gdIXWE1BFSR9iwEbpH6B7hIUboHqF7hO4RukfoHqF7hO4Rukck5XO6b9N9m5PalhsnPubft6zX"
+            "2+XJR18FHWtJptlkmk2m2WSaTabZZJpNptlkmk2m2WSaTabZZJpNptlkmk2m2WSaTcI1mWaTaTaZ"
+            "ZpNpNplmk2k2mWaTaTZlQCmmucM0dzipHblxmhfL9znP+9S9T6n7lLrPed5nPPflDjKf+h3tlck/"
+            "4Xe0szR9SNOHNH0oDznHjZ9x42fc+Jnc+MXf8++cLb/r/wifPNtonW20zjZaZxuts43W2UbrbKN1"
+            "yVT4I/8m8Eev4i2+GA+vaO3d+vPt1cnpy3uOZ6kcz1I5zj9HgBzPUjmepXI8S+V4lsoRLUe0HM9S"
+            "OZ6lcjxL5XiWyvEslWM/5hhbjmepHE9MOSaV44kpxxNTjiemnMywpM7xb/+9yxNRPxfV+nuYCEDT"
+            "BE0TNE3QNEHTBE0TNE3QNEHTBE0TNE3QNEHTBE0TNE3QNEHTBE3ztJ+mbpq6aeqmCZqWoGV+EvIj"
+            "2/FHeX/ln/nXIN49p1jnLvtZ55afeBTvW9LvfvxiPbs++fSPEd7s9SVtNdpq0vbn138KW7a+lFrl"
+            "xr9w41/kxr+8/e1sddcD9soDuV2NV0EuPo+Ly8HF5eDicnBxObi4HFxcDi4uBxeXg4vLwcXl4OJy"
+            "cHE5uLgcXFwOLh6ii8vBxeXg4nJwcTm4uBxcXA4unmxcXBsuSVknZYCUAVIGSBkgZYCUAVIGSBkg"
+            "ZYCUAVIGSBkgZYCUAVIGSBkgZYCUAVIGSBkgZYCUAVIGSBkgZUBSNvjivsRdLxFsiQe/xINf4q6X"
+            "KL4kd9D8mBd363x18Hc4T/3R89ObM4POzgqys4LsrCCPM0ioIDsryM4KsrOC7KwgcYPEDbKzguys"
+            "IDsryM4KsrOC7Kwg4w2ys4LsrCA7K8h4g+ysIDsryM4KyuBbn/o7JJ7JR3yJoc3r78fWXoMcuDE4"
+            "1jo8df/MNH+W93c/9i+ohq97NPCP7M2e+rKKOoCfeDQ/yaPp/3+7Ivh5csYVwYCZ1XiUNXmUw5N/"
+            "4p8Sd+2IGp2cXrYXuH2BK7bAFVvgii1wxRa4YgtcsQWu2AJXbIErtsAVW+CKLXDFFrhiC1yxBbZx"
+            "gSu2wBVb4IotcJEWuEgLXKQFLtKC1Nzn+a5BvQb1GtRrUK9BvQb1GtRrUK9BvQb1GtRrUK9BvQb1"
+            "GtRrUK9BvQb1GtRr8HzXIGWDlA1SNkjZkJQjLs+XpHwp7z8g9ZD3D0k9JPWQ1ENSD0k9JPWQ1ENS"
+            "D0k9JPWQ1ENSD0k9JPWQ1ENSD0k9JPWQ1ENSD0k9JPWQ1ENJ+adXprziPmddn4/5NeKTrw9bXycu"
+            "iPpUVD9OEFm6Z+mepXuW7lm6Z0mdJXWW1FlSZ0mdpW6WulnqZqmbpW6WulnqZqmbpW6WulnqZqlr"
+            "DY6PjSvyV3qrb34YsTPRNg+NS/p+863bzh8edwLGdeunerv77afj0f6R2MQ87mz869eg//Vr0J0P"
+            "/xr0xdGB9duih+qHxJt6/bht/sX6Qc5xt3Ek/ut6X9cPqrXBoPr6t5//bFw6Gut6tTGoHR6aCWO2"
+            "UWt0dLHlVfkf1fa4NhzWxuKGiwejw6OB/quZ6Jzr/NmYlb9xbnZWjMtH49r+YWs0HopxovNfL0Un"
+            "14y5g3F3NO4e/WYaF/bFfbWBaczXhvVu+1jeOFM7PhqZxqz8HXXx9LcOxqODWlusharYUVcdhZjw"
+            "6x+mF1Ou1xp968CMm8Pab3Wx2aDW0DujQVMfW8dxTW92j6qnv1uf6Igr5Y7/L8YV+fukulhp+pG1"
+            "4ZXu8GAkFuNB7ahj/cy6cflwdDxu6PIGQTBn/ZJpuysRreU4s1cb983j5f8BBeaeAA=="
+        )
+    )
+)
+
+MEMO = pickle.loads(
+    zlib.decompress(
+        base64.b64decode(
+            "eJy1WstvG8cdFiWSekWWaytp7DaPMq1DyaIp5+mHJJeSKIXhSyYpp4nEbFfSUrvyikssl1bc2mnR"
+            "k1ssChTdnooCvdYo0LMToEBvObVoUfSFPtJL/4YeO7szq5mdmX0Zqg4SZrjf7/t+38zO/Gao76Z+"
+            "8ovckPPz0MqW7V9msiseSZaZbm4WVotNyxztiYYh6V3L/jB1T1QH4NOx7K0bLz+YmL1smamOKh70"
+            "rbZljujisVUz08Kxsm/IoCdbTvxgfAj9JCRzTBCM+z1JECxzfBNGbRStgTnW0xVNV4z7VnlInjIn"
+            "W5J+pHRFdU3qWINyAhDLw+bMar1aLdZaQqPYbAn1daFSqhUtOWl/mjbTr2x/ONGes+SxtiVPmON5"
+            "0N7ptufyljzJCJGn5DMDedomk88OysOQINlqbOGAyZYOEkXh0hm7lbGAuAkkvGnolh1jGMYYgTFS"
+            "64VKEwdJrYtq/yTKaMZp2mHkFwlsEmInSyC5SqlVbBQqJxEuAKNzt7av5q63txdy14X23IOF7QXw"
+            "ZxZFrQXkh+KnUH4r9ToOnFzRNBXnZ7ewMGRMGgLHbGGt9zdxXiOlruFiUxnQYKCjEDq+VStR2ORW"
+            "VzEwsd1i0GMQPVxaP4ENKx0XlMwoHcbEcXcQ3ynWMJchS13MZbcY4AQCFsmBS0rEuKUzEm/YJiEw"
+            "XSlUV9YKJ9DEDta5s8Ok9gzy9E6hUSqsVDDlGTDS22LuW4XcB0IbvFjhw4siTqGpV2g06u9hv3LL"
+            "WEdumdFxBqFW65U6NixxwwWNZG4wmGk0qM1itUThbmLcTQZ3FnEVb28RUzuxhDFLDOYLrrubhQYx"
+            "ooksBmUZ0DkEalCgWQyaZUDn0QTYrGw1MeQyhlxmIDMooWqpRmJyGJNjMM8immar0MCQOQyZYyDP"
+            "QcjIWukORuQxIs8gvoheHGJeJRYxYJEBPI8AGwRgGQPYeXMBaaoUb+O5triE59riEvOmXESYDRKz"
+            "TGCWWcyXEGa1uokxSwRmicV8GWFqJE+ewORZzAsIU6itYQcuYQcuMQ68iCyrE8P4AAMeMICXXFn1"
+            "FkZ8jBEfM4iX7b02DbbEA8XZd+0F456oK+KuKtmb0GRN67qbJNg/x6WPemK3r2hdsOnS64s50VFU"
+            "sGMJ2sCwvg/AYxgpmilN35d0sO+aKVFVxD7Yv0e1ngFC9Z0Nf/quJPUEUVUFQ7srgc5H5qjDtn8V"
+            "BJuumdOGdNRTRUMS+tpA35NAgCnQY9wXlO6+sif1rVlbcGOgSnUUdwA6knYH2Ny/Ysv9LdQ8DQLr"
+            "Ut/OQxAN7ch25fcD+Q9tjgXgA1H+C/Drr+bzFEzAj/3NBv79kfwPW6r8z5r8LyBG/hwIkP89KGdi"
+            "cHs35z8BH+U/OwoSQMF5WoFib4/B5K/EIEeVCcE6DFhnaFbDqViCab8ag9YtZgjeEcD7LM3bgUVO"
+            "MPHXIhFnqT0VUXPH37vteZ6cwATwWQloTwLtz9HaVfFod18ME38pjninagmW46lVIj1aJEciIMkU"
+            "SPIcMx07YQm+Gm900PYaRfnJXowetkWmeSPRE3V7fQkRmv2/CXUrIc+zSfu8EpbOKEjnIp2O2O1q"
+            "hmg4JMEpzRIpeVzp9VRlD4Xwvpn8zN0F8QV+EKGvdA/CV8W5OHKyQXrgZy8Jgo+enjroCwt47oKl"
+            "tBYi7jIh7oJwNFANBcW7JwlaT9IBu96n7YIFFLGMDYUzzT8VE6ruvPtDGFWOpCK88pLSVEXiSVfP"
+            "t32FzvPH4KFn5hBCH/GEXiGEnhfE/X0lxA1YUsczPh+TxC3C43m+QLKQ3iA+mmWF6zarbt53/OJZ"
+            "fZXQd1ZwirSA+e0U4/Fsfi0WwQZFEMHh1+MQOAcWb30TFv+NWPE3mDomLP6bZHxy9J2CmV4B/edQ"
+            "oMIwsBRttrwVTWsYGzuyXLa3yR1C2NOOwNYdtgI7x7h4M/TaU9DU4s/T6z77HUFI0yxyFwOuwnl6"
+            "NOItAzcIcWeIUKC2oEXleaLAkXOen1M8HTd9dIBzIK3jVZ4OcLqe98qPx79I8E95LKXpL/Ho6415"
+            "r+h47EsEO1M9YmqesIgMyySDc0cu6rp2zCwzTD3KPf4QT7ELCPcluEXwTzr8bjkeqaSOVCZHkPF1"
+            "Qsa4I2PXuaWmygp4kR1vNSkQocec0M4hnbphwDfd8aKvMMIHzi23Nzx5Gx4v/ioRnzCbCE25FXHe"
+            "rYXFpayKuEMUo8nFHrF7Pjfuelhcdu6yuz038kZYZOatFOGVQljgd4jAM+4FhrAv7anOQsw5TPGv"
+            "OSKdTsmb+XhvXomcwK4AZn89J5xcrvXh8e2q33TjsrxLVt2EGR0FzIToXqDvEaKc6v0dMS9wBAii"
+            "qnVDj8jlU0mDtvnUkotQ9FSIDEYMrUcP9DOCAHqFviHqwmuxhrjqGzmashrGH+4mhoZoKwOvJOAj"
+            "Nc+Nw9OfjeEMf92zkXqqZzcCM1/MCfB2372iSh+B8ttMteyrc+vH9pfrjS37Sp4bpPo4WS6UE4bV"
+            "sLyW1P0sgV0Hw6jLvY6+yInud/lzqNtoD90mQXfMGYGwKwr4VNlnEGIdmeEIvOEZgcNDWzGdRhd0"
+            "Zg818PuwB375ennbLznY9ZDy8vCYR/Y9xrMGEfYTjmc+hzL4YdHHqogHCmjSm6doUtMvG9hlRjLp"
+            "R4xJLSLsb0Jebeb0BR+5xrcq4JgD3XnrFN3Z8ksDdv00kjs/Z9y5Q4T9jOMO9/gHP1rgu8I5dEE3"
+            "3j5FN97zkw27Hkdy41eMG98gwv4uxI2TQyj8KM93gz0DQjOunaIZ7/uphl1PIpnxa8aMD4iwVSZs"
+            "8LcBYfvttl/sLNWHhthNIWKhsUOEvzbMSOd/pRsWtO0XNEv1weYfY2r+kAi/w2oOqOIj6heCCfxL"
+            "yohXWt/0i5+l+mDzc9KfCDevYrzw/yHDR7h43SXCK2z40G9jqKoo4gFoL5gV98Hmf73Ng5hTbJ9g"
+            "+w4nR/8vPqg6JWJ2UjAf7oPN9Iin+TBmdh2C7Yec7AJvc6kaI2KCB8GUuA82Z7wJmjETlAm2n3ES"
+            "hP/qQx7hcFkQMSElmAL3wWbGTsifMEJOhwThL3k5Of8h5aF4HDOnu8EUuA82F5icHsfMSSUIP+Xk"
+            "5PwPl4fhScyUjoIZcB9sLjMpPYmX0uDK/wD1lQIO"
+        )
+    )
+)
@@ -1,4 +1,7 @@
-from lark import Transformer, v_args, Token
+from sys import intern
+from typing import Any, Optional
+
+from lark import Transformer, Tree, v_args, Token
 from STLC.Parser.AST import (
     Variable,
     BoolLiteral,
@@ -19,25 +22,59 @@ from STLC.Parser.AST import (
     Expression,
     Type,
 )
-from STLC.Range import token2Range, mergeRanges
+from STLC.Range import LineIndex, token2Range, mergeRanges
+from STLC.Timings import timed
+from STLC.Traversal import fold
+
+
+def _subtrees(node: Tree[Token] | Token) -> list[Tree[Token] | Token]:
+    if isinstance(node, Tree):
+        return node.children
+    return []
 
 
 @v_args(inline=True)
 class ToAST(Transformer):
+    # Ranges only keep offsets and share `lines`, the index of the source
+    # being transformed. The fused parser reuses one instance, so callers
+    # must set `lines` before every parse.
+    def __init__(self, lines: Optional[LineIndex] = None):
+        super().__init__()
+        self.lines = LineIndex() if lines is None else lines
+        # rule -> method, lark looks them up (and wraps them again) at
+        # every node
+        self.callbacks: dict[str, Any] = dict()
+
+    @timed("ToAST.transform")
+    def transform(self, tree: Tree[Token]) -> Any:
+        # A `fold` instead of lark's recursive walk, for deep trees
+        return fold(tree, self.build, _subtrees)
+
+    def build(self, node: Tree[Token] | Token, children: list[Any]) -> Any:
+        if not isinstance(node, Tree):
+            return node
+        callback = self.callbacks.get(node.data, None)
+        if callback is None:
+            callback = getattr(self, node.data, None)
+            if callback is None:
+                return self.__default__(node.data, children, node.meta)
+            self.callbacks[node.data] = callback
+        return callback(*children)
+
     def variable(self, token: Token) -> Variable:
-        return Variable(token2Range(token), token.value)
+        return Variable(token2Range(token, self.lines), intern(token.value))
 
     def expression_atom_variable(self, value: Variable) -> Variable:
         return value
 
     def expression_atom_int(self, token: Token) -> IntLiteral:
-        return IntLiteral(token2Range(token), int(token.value))
+        return IntLiteral(token2Range(token, self.lines), int(token.value))
 
     def expression_atom_true(self, token: Token) -> BoolLiteral:
-        return BoolLiteral(token2Range(token), True)
+        return BoolLiteral(token2Range(token, self.lines), True)
 
     def expression_atom_false(self, token: Token) -> BoolLiteral:
-        return BoolLiteral(token2Range(token), False)
+        return BoolLiteral(token2Range(token, self.lines), False)
 
     def expression_atom_lambda(
         self,
@@ -47,7 +84,7 @@ class ToAST(Transformer):
         expression: Expression,
     ) -> Function:
         return Function(
-            mergeRanges(token2Range(_lambda), expression._range),
+            mergeRanges(token2Range(_lambda, self.lines), expression._range),
             variable,
             expression,
         )
@@ -62,7 +99,7 @@ class ToAST(Transformer):
         expression3: Expression,
     ) -> If:
         return If(
-            mergeRanges(token2Range(_if), expression3._range),
+            mergeRanges(token2Range(_if, self.lines), expression3._range),
             expression1,
             expression2,
             expression3,
@@ -82,7 +119,9 @@ class ToAST(Transformer):
         rparen: Token,
     ) -> Expression:
         return Annotation(
-            mergeRanges(token2Range(lparen), token2Range(rparen)),
+            mergeRanges(
+                token2Range(lparen, self.lines), token2Range(rparen, self.lines)
+            ),
             expression,
             _type,
         )
@@ -106,12 +145,11 @@ class ToAST(Transformer):
         self, start: Expression, *remain: Expression | Token
     ) -> Expression:
         current: Expression = start
-        print(remain)
         for i in range(0, len(remain), 2):
             # we can build a list with the right type for this, but
             # it would have a runtime overhead
-            op: Token = remain[i]  # type:ignore
-            right: Expression = remain[i + 1]  # type:ignore
+            op: Token = remain[i]  # type: ignore
+            right: Expression = remain[i + 1]  # type: ignore
             current = OperatorApplication(
                 mergeRanges(current._range, right._range),
                 current,
@@ -137,19 +175,19 @@ class ToAST(Transformer):
         return _type
 
     def type_bool(self, value: Token) -> BoolType:
-        return BoolType(token2Range(value))
+        return BoolType(token2Range(value, self.lines))
 
     def type_int(self, value: Token) -> IntType:
-        return IntType(token2Range(value))
+        return IntType(token2Range(value, self.lines))
 
     def type_unit(self, value: Token) -> UnitType:
-        return UnitType(token2Range(value))
+        return UnitType(token2Range(value, self.lines))
 
     def variable_declaration(
         self, variable: Variable, colon: Token, _type: Type, semicolon: Token
     ):
         return Declaration(
-            mergeRanges(variable._range, token2Range(semicolon)),
+            mergeRanges(variable._range, token2Range(semicolon, self.lines)),
             variable.name,
             _type,
         )
@@ -165,7 +203,7 @@ class ToAST(Transformer):
         semicolon: Token,
     ) -> Definition:
         return Definition(
-            mergeRanges(variable._range, token2Range(semicolon)),
+            mergeRanges(variable._range, token2Range(semicolon, self.lines)),
             variable.name,
             [],
             expression,
@@ -180,7 +218,7 @@ class ToAST(Transformer):
         semicolon: Token,
     ) -> Definition:
         return Definition(
-            mergeRanges(variable._range, token2Range(semicolon)),
+            mergeRanges(variable._range, token2Range(semicolon, self.lines)),
             variable.name,
             arguments,
             expression,
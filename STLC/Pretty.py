@@ -0,0 +1,216 @@
+from dataclasses import dataclass
+from typing import Optional, TextIO, Union
+
+# Document combinators in the style of Wadler's "A prettier printer". A
+# document is a tree of `Text`, `Line` (a space, or a new line when its
+# group doesn't fit), `Concat`, `Nest` and `Group`, the layout decides for
+# every group if it is printed flat (in a single line) or broken.
+#
+# Rendering never concatenates the text of subdocuments: the tree is
+# flattened to a stream of tokens with an explicit stack, two passes over
+# the tokens compute the flat width every group needs, and a last pass
+# writes the text to a stream in chunks. Every pass is linear in the size
+# of the document, whatever its width or depth. Indentation stops growing
+# at half the width, so the output of deeply nested documents is linear in
+# their size too.
+
+Doc = Union["Text", "Line", "Concat", "Nest", "Group"]
+
+
+@dataclass(slots=True)
+class Text:
+    text: str
+
+
+@dataclass(slots=True)
+class Line:
+    flat: str = " "
+
+
+@dataclass(slots=True)
+class Concat:
+    parts: tuple[Doc, ...]
+
+
+@dataclass(slots=True)
+class Nest:
+    indent: int
+    document: Doc
+
+
+@dataclass(slots=True)
+class Group:
+    document: Doc
+
+
+def text(value: str) -> Text:
+    return Text(value)
+
+
+def line(flat: str = " ") -> Line:
+    return Line(flat)
+
+
+def softline() -> Line:
+    return Line("")
+
+
+def concat(*parts: Doc) -> Concat:
+    return Concat(parts)
+
+
+def nest(indent: int, *parts: Doc) -> Nest:
+    return Nest(indent, Concat(parts))
+
+
+def group(*parts: Doc) -> Group:
+    return Group(Concat(parts))
+
+
+TEXT = 0
+LINE = 1
+BEGIN = 2
+END = 3
+INDENT = 4
+DEDENT = 5
+
+# Output is written to the stream once this many pieces are buffered
+CHUNK = 4096
+
+
+def tokens(document: Doc) -> tuple[list[int], list[Union[str, int, None]]]:
+    kinds: list[int] = []
+    values: list[Union[str, int, None]] = []
+    stack: list[Union[Doc, tuple[int, Union[str, int, None]]]] = [document]
+    while stack:
+        item = stack.pop()
+        match item:
+            case Text(value):
+                kinds.append(TEXT)
+                values.append(value)
+            case Line(flat):
+                kinds.append(LINE)
+                values.append(flat)
+            case Concat(parts):
+                stack.extend(reversed(parts))
+            case Nest(indent, inner):
+                kinds.append(INDENT)
+                values.append(indent)
+                stack.append((DEDENT, indent))
+                stack.append(inner)
+            case Group(inner):
+                kinds.append(BEGIN)
+                values.append(None)
+                stack.append((END, None))
+                stack.append(inner)
+            case (kind, value):
+                kinds.append(kind)
+                values.append(value)
+    return kinds, values
+
+
+def group_widths(
+    kinds: list[int], values: list[Union[str, int, None]]
+) -> list[int]:
+    # For every BEGIN, the flat width of its group plus the text that
+    # follows it up to the next line break: what must fit in the current
+    # line to print the group flat. Other positions are left at 0.
+    count = len(kinds)
+    widths = [0] * count
+    ends = [0] * count
+    opened: list[tuple[int, int]] = []
+    position = 0
+    for i in range(count):
+        kind = kinds[i]
+        if kind == TEXT or kind == LINE:
+            position += len(values[i])  # type: ignore
+        elif kind == BEGIN:
+            opened.append((i, position))
+        elif kind == END:
+            begin, start = opened.pop()
+            widths[begin] = position - start
+            ends[begin] = i
+    # distance from every token to the next line
+    following = [0] * (count + 1)
+    for i in range(count - 1, -1, -1):
+        kind = kinds[i]
+        if kind == LINE:
+            following[i] = 0
+        elif kind == TEXT:
+            following[i] = following[i + 1] + len(values[i])  # type: ignore
+        else:
+            following[i] = following[i + 1]
+    for i in range(count):
+        if kinds[i] == BEGIN:
+            widths[i] += following[ends[i] + 1]
+    return widths
+
+
+def render(document: Doc, stream: TextIO, width: Optional[int] = 80) -> None:
+    # `width=None` prints every group flat
+    kinds, values = tokens(document)
+    if width is None:
+        stream.write(
+            "".join(
+                [
+                    values[i]  # type: ignore
+                    for i in range(len(kinds))
+                    if kinds[i] == TEXT or kinds[i] == LINE
+                ]
+            )
+        )
+        return
+    widths = group_widths(kinds, values)
+    pieces: list[str] = []
+    column = 0
+    indent = 0
+    limit = width // 2
+    # number of flat groups currently open, nested groups of a flat group
+    # are flat too
+    flat = 0
+    for i in range(len(kinds)):
+        kind = kinds[i]
+        if kind == TEXT:
+            value: str = values[i]  # type: ignore
+            pieces.append(value)
+            column += len(value)
+        elif kind == LINE:
+            if flat:
+                value = values[i]  # type: ignore
+                pieces.append(value)
+                column += len(value)
+            else:
+                column = min(indent, limit)
+                pieces.append("\n" + " " * column)
+        elif kind == BEGIN:
+            if flat:
+                flat += 1
+            elif widths[i] <= width - column:
+                flat = 1
+        elif kind == END:
+            if flat:
+                flat -= 1
+        elif kind == INDENT:
+            indent += values[i]  # type: ignore
+        else:
+            indent -= values[i]  # type: ignore
+        if len(pieces) >= CHUNK:
+            stream.write("".join(pieces))
+            pieces.clear()
+    stream.write("".join(pieces))
+
+
+class _Buffer:
+    __slots__ = ("pieces",)
+
+    def __init__(self):
+        self.pieces: list[str] = []
+
+    def write(self, value: str) -> None:
+        self.pieces.append(value)
+
+
+def render_string(document: Doc, width: Optional[int] = None) -> str:
+    buffer = _Buffer()
+    render(document, buffer, width)  # type: ignore
+    return "".join(buffer.pieces)
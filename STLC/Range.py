@@ -1,51 +1,126 @@
+from array import array
+from bisect import bisect_right
 from dataclasses import dataclass
-from typing import NamedTuple
+from itertools import accumulate, islice
 
 from lark import Token
 
 
-Range = NamedTuple(
-    "Range",
-    [
-        ("line_start", int),
-        ("line_end", int),
-        ("column_start", int),
-        ("column_end", int),
-        ("position_start", int),
-        ("position_end", int),
-    ],
-)
+class LineIndex:
+    # Offsets of the first character of every line of a source, the line
+    # and column of a position are only computed when a report needs them.
+    # An index can cover only a piece of the source, `text` starting at
+    # offset `start`, `line` and `column`: then `line_starts` begins with
+    # the start of its first line, `first_line`.
+    __slots__ = ("line_starts", "length", "first_line")
 
+    def __init__(
+        self, text: str = "", start: int = 0, line: int = 1, column: int = 1
+    ):
+        self.line_starts = array("q", [start - column + 1])
+        self.length = start
+        self.first_line = line
+        self.extend(text)
 
-@dataclass
+    def replace(self, text: str) -> None:
+        # Ranges over this index report lines of the new text
+        self.line_starts = array("q", [0])
+        self.length = 0
+        self.first_line = 1
+        self.extend(text)
+
+    def edit(self, start: int, end: int, text: str) -> None:
+        # Replaces the source between `start` and `end` with `text`: only
+        # the lines of `text` are split, the ones after it are shifted
+        starts = self.line_starts
+        first = bisect_right(starts, start)
+        last = bisect_right(starts, end)
+        delta = len(text) - (end - start)
+        lengths = (len(line) + 1 for line in text.split("\n")[:-1])
+        added = islice(accumulate(lengths, initial=start), 1, None)
+        starts[first:] = array(
+            "q", [*added, *(i + delta for i in islice(starts, last, None))]
+        )
+        self.length += delta
+
+    def extend(self, text: str) -> None:
+        lengths = (len(line) + 1 for line in text.split("\n")[:-1])
+        starts = accumulate(lengths, initial=self.length)
+        self.line_starts.extend(islice(starts, 1, None))
+        self.length += len(text)
+
+    def line(self, position: int) -> int:
+        return bisect_right(self.line_starts, position) + self.first_line - 1
+
+    def line_and_column(self, position: int) -> tuple[int, int]:
+        index = bisect_right(self.line_starts, position)
+        return (
+            index + self.first_line - 1,
+            position - self.line_starts[index - 1] + 1,
+        )
+
+
+class Range:
+    __slots__ = ("position_start", "position_end", "lines")
+
+    def __init__(
+        self, position_start: int, position_end: int, lines: LineIndex
+    ):
+        self.position_start = position_start
+        self.position_end = position_end
+        self.lines = lines
+
+    @property
+    def line_start(self) -> int:
+        return self.lines.line(self.position_start)
+
+    @property
+    def line_end(self) -> int:
+        return self.lines.line(self.position_end)
+
+    @property
+    def column_start(self) -> int:
+        return self.lines.line_and_column(self.position_start)[1]
+
+    @property
+    def column_end(self) -> int:
+        return self.lines.line_and_column(self.position_end)[1]
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, Range)
+            and self.position_start == other.position_start
+            and self.position_end == other.position_end
+        )
+
+    def __hash__(self):
+        return hash((self.position_start, self.position_end))
+
+    def __repr__(self) -> str:
+        line_start, column_start = self.lines.line_and_column(
+            self.position_start
+        )
+        line_end, column_end = self.lines.line_and_column(self.position_end)
+        return (
+            f"Range(line_start={line_start}, line_end={line_end},"
+            f" column_start={column_start}, column_end={column_end},"
+            f" position_start={self.position_start},"
+            f" position_end={self.position_end})"
+        )
+
+
+@dataclass(slots=True)
 class HasRange:
     _range: Range
 
 
-def token2Range(token: Token) -> Range:
-    # type: ignore
-    return Range(
-        token.line,  # type: ignore
-        token.end_line,  # type: ignore
-        token.column,  # type: ignore
-        token.end_column,  # type: ignore
-        token.start_pos,  # type: ignore
-        token.end_pos,  # type: ignore
-    )
+def token2Range(token: Token, lines: LineIndex) -> Range:
+    return Range(token.start_pos, token.end_pos, lines)  # type: ignore
 
 
 def mergeRanges(range1: Range, range2: Range) -> Range:
-    if range1.position_start <= range2.position_start:
-        if range1.position_end <= range2.position_end:
-            return Range(
-                range1.line_start,
-                range2.line_end,
-                range1.column_start,
-                range2.column_end,
-                range1.position_start,
-                range2.position_end,
-            )
-        else:
-            return range1
-    else:
-        return mergeRanges(range2, range1)
+    return Range(
+        min(range1.position_start, range2.position_start),
+        max(range1.position_end, range2.position_end),
+        range1.lines,
+    )
@@ -0,0 +1,56 @@
+from array import array
+from bisect import bisect_right
+from typing import Any, Iterable, Iterator, Optional
+
+from STLC.Parser.AST import Definition, Declaration, children
+
+
+class SpanIndex:
+    # Interval index over the ranges of every node of a program, to find
+    # the node at a position without walking the AST.
+    #
+    # Nodes are stored in preorder, so `starts` is sorted and the subtree
+    # of a node is a contiguous run after it. Ranges are nested, so the
+    # innermost node containing a position is the last node starting at
+    # or before it, or the first of its ancestors that contains it. A
+    # query is a binary search plus a walk up `parents` (-1 for top level
+    # statements).
+    __slots__ = ("starts", "ends", "parents", "nodes")
+
+    def __init__(self, statements: Iterable[Definition | Declaration]):
+        self.starts = array("q")
+        self.ends = array("q")
+        self.parents = array("q")
+        self.nodes: list[Any] = []
+        stack: list[tuple[Any, int]] = [
+            (statement, -1) for statement in reversed(list(statements))
+        ]
+        while stack:
+            node, parent = stack.pop()
+            index = len(self.nodes)
+            self.nodes.append(node)
+            self.starts.append(node._range.position_start)
+            self.ends.append(node._range.position_end)
+            self.parents.append(parent)
+            for child in reversed(children(node)):
+                stack.append((child, index))
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def find(self, position: int) -> int:
+        # index of the innermost node containing `position`, or -1
+        index = bisect_right(self.starts, position) - 1
+        while index >= 0 and self.ends[index] <= position:
+            index = self.parents[index]
+        return index
+
+    def at(self, position: int) -> Optional[Any]:
+        index = self.find(position)
+        return None if index < 0 else self.nodes[index]
+
+    def ancestors(self, index: int) -> Iterator[Any]:
+        index = self.parents[index]
+        while index >= 0:
+            yield self.nodes[index]
+            index = self.parents[index]
@@ -0,0 +1,77 @@
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional
+
+from STLC.Parser.AST import Definition, Declaration
+from STLC.Range import Range
+from STLC.Timings import timed
+
+
+@dataclass(slots=True)
+class Symbol:
+    name: str
+    declarations: list[Declaration] = field(default_factory=list)
+    definitions: list[Definition] = field(default_factory=list)
+
+    def spans(self) -> list[Range]:
+        return [i._range for i in self.declarations] + [
+            i._range for i in self.definitions
+        ]
+
+
+class SymbolTable:
+    # Built once per program and shared by the checks, the type checker and
+    # the CLI: the top level names with their declarations and definitions.
+    # Names are already interned by the parser (`sys.intern` in `ToAST`), so
+    # a lookup by name is a dict lookup that compares them by identity.
+    __slots__ = ("symbols", "statements", "defined", "declared")
+
+    @timed("SymbolTable")
+    def __init__(self, statements: Iterable[Definition | Declaration] = ()):
+        self.symbols: dict[str, Symbol] = dict()
+        self.statements: list[Definition | Declaration] = []
+        # in order of their first definition (or declaration)
+        self.defined: list[Symbol] = []
+        self.declared: list[Symbol] = []
+        for statement in statements:
+            self.add(statement)
+
+    def add(self, statement: Definition | Declaration) -> Symbol:
+        symbol = self.symbols.get(statement.name, None)
+        if symbol is None:
+            symbol = Symbol(statement.name)
+            self.symbols[statement.name] = symbol
+        self.statements.append(statement)
+        if isinstance(statement, Declaration):
+            if not symbol.declarations:
+                self.declared.append(symbol)
+            symbol.declarations.append(statement)
+        else:
+            if not symbol.definitions:
+                self.defined.append(symbol)
+            symbol.definitions.append(statement)
+        return symbol
+
+    def lookup(self, name: str) -> Optional[Symbol]:
+        return self.symbols.get(name, None)
+
+    def is_defined(self, name: str) -> bool:
+        symbol = self.symbols.get(name, None)
+        return symbol is not None and len(symbol.definitions) > 0
+
+    def definitions_of(self, name: str) -> list[Definition]:
+        symbol = self.symbols.get(name, None)
+        if symbol is None:
+            return []
+        return symbol.definitions
+
+    def declarations_of(self, name: str) -> list[Declaration]:
+        symbol = self.symbols.get(name, None)
+        if symbol is None:
+            return []
+        return symbol.declarations
+
+    def defined_symbols(self) -> Iterator[Symbol]:
+        return iter(self.defined)
+
+    def declared_symbols(self) -> Iterator[Symbol]:
+        return iter(self.declared)
@@ -0,0 +1,183 @@
+import json
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from functools import wraps
+from time import perf_counter
+from typing import Any, Callable, ContextManager, Iterator, Optional, TypeVar
+
+# Wall time, call count and (optionally) tracemalloc peak of every phase
+# of a run. The pipeline marks its phases with
+#
+#   with phase("parse_string"):
+#       ...
+#
+# and they are only measured while a `Timings` is active (see
+# `recording`). Otherwise `phase` returns a shared no-op context manager,
+# which is all it costs. Phases can nest, a phase's time includes the
+# time of the phases inside it.
+#
+# Hooks are called at the end of every phase with its name, wall time and
+# peak (None unless memory is traced), to export the numbers somewhere
+# else.
+
+Hook = Callable[[str, float, Optional[int]], None]
+F = TypeVar("F", bound=Callable[..., Any])
+
+_NULL = nullcontext()
+
+
+@dataclass
+class PhaseStats:
+    name: str
+    calls: int = 0
+    seconds: float = 0
+    # the highest peak of any call, above the memory in use when it started
+    peak_bytes: Optional[int] = None
+
+
+class Timings:
+    def __init__(
+        self, memory: bool = False, hooks: Optional[list[Hook]] = None
+    ):
+        self.memory = memory
+        self.hooks: list[Hook] = [] if hooks is None else hooks
+        self.phases: dict[str, PhaseStats] = dict()
+        # for every open phase: traced memory when it started and the
+        # highest absolute peak of the phases inside it
+        self.open: list[list[int]] = []
+
+    def stats(self, name: str) -> PhaseStats:
+        stats = self.phases.get(name, None)
+        if stats is None:
+            stats = PhaseStats(name)
+            self.phases[name] = stats
+        return stats
+
+    def record(
+        self,
+        name: str,
+        seconds: float,
+        peak: Optional[int] = None,
+        calls: int = 1,
+    ) -> None:
+        stats = self.stats(name)
+        stats.calls += calls
+        stats.seconds += seconds
+        if peak is not None:
+            stats.peak_bytes = (
+                peak
+                if stats.peak_bytes is None
+                else max(stats.peak_bytes, peak)
+            )
+        for hook in self.hooks:
+            hook(name, seconds, peak)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if not self.memory or not tracemalloc.is_tracing():
+            start = perf_counter()
+            try:
+                yield
+            finally:
+                self.record(name, perf_counter() - start)
+            return
+        # `reset_peak` is global, the peak seen by a phase is passed to the
+        # phase around it before resetting it
+        current, peak = tracemalloc.get_traced_memory()
+        if self.open:
+            self.open[-1][1] = max(self.open[-1][1], peak)
+        tracemalloc.reset_peak()
+        self.open.append([current, 0])
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            seconds = perf_counter() - start
+            base, inner = self.open.pop()
+            peak = max(tracemalloc.get_traced_memory()[1], inner)
+            if self.open:
+                self.open[-1][1] = max(self.open[-1][1], peak)
+            tracemalloc.reset_peak()
+            self.record(name, seconds, peak - base)
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "phases": [
+                {
+                    "name": stats.name,
+                    "calls": stats.calls,
+                    "seconds": stats.seconds,
+                    "peak_bytes": stats.peak_bytes,
+                }
+                for stats in self.phases.values()
+            ]
+        }
+
+    def pretty_json(self) -> str:
+        return json.dumps(self.to_json(), indent=2)
+
+    def pretty(self) -> str:
+        width = max([len("phase")] + [len(name) for name in self.phases])
+        header = (
+            f"{'phase':<{width}}  {'calls':>7}  {'total':>11}  {'mean':>11}"
+        )
+        if self.memory:
+            header += f"  {'peak':>12}"
+        lines = [header]
+        for stats in self.phases.values():
+            mean = stats.seconds / stats.calls if stats.calls else 0
+            line = (
+                f"{stats.name:<{width}}  {stats.calls:>7}"
+                f"  {stats.seconds * 1000:>9.3f}ms  {mean * 1000:>9.3f}ms"
+            )
+            if self.memory:
+                peak = "-" if stats.peak_bytes is None else stats.peak_bytes
+                line += f"  {peak:>12}"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+_ACTIVE: Optional[Timings] = None
+
+
+def active() -> Optional[Timings]:
+    return _ACTIVE
+
+
+def phase(name: str) -> ContextManager[None]:
+    if _ACTIVE is None:
+        return _NULL
+    return _ACTIVE.phase(name)
+
+
+@contextmanager
+def recording(timings: Timings) -> Iterator[Timings]:
+    # Makes `timings` the active one, tracing memory if it was asked to
+    global _ACTIVE
+    previous = _ACTIVE
+    started = timings.memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    _ACTIVE = timings
+    try:
+        yield timings
+    finally:
+        _ACTIVE = previous
+        if started:
+            tracemalloc.stop()
+
+
+def timed(name: str) -> Callable[[F], F]:
+    # Decorator, every call of the function is a `phase`
+    def decorate(function: F) -> F:
+        @wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _ACTIVE is None:
+                return function(*args, **kwargs)
+            with _ACTIVE.phase(name):
+                return function(*args, **kwargs)
+
+        return wrapper  # type: ignore
+
+    return decorate
@@ -0,0 +1,101 @@
+from types import GeneratorType
+from typing import Any, Callable, Generator, Iterator, Sequence, TypeVar
+
+# Traversals with an explicit stack, for trees of any depth. Every
+# function takes the `children` of a node as a function, so the same
+# traversal works for the AST (`STLC.Parser.AST.children`), the types of
+# the checker or the core IR. Time and memory are linear in the size of
+# the tree and the Python stack never grows with its depth.
+#
+# `fold` computes a value bottom-up, `preorder` lists the nodes top-down
+# (a `children` function that returns `()` prunes a subtree) and `run`
+# drives traversals that don't fit a fold, like the bidirectional type
+# checker: they are written as generators that `yield` the generator of
+# every recursive call and get its result back, as in
+#
+#   def size(node):
+#       total = 1
+#       for child in children(node):
+#           total += yield size(child)
+#       return total
+#
+#   run(size(tree))
+#
+# A task can also yield a value instead of a generator, it's sent back
+# right away: a call whose result is already known (a leaf, usually)
+# doesn't need a generator of its own.
+
+N = TypeVar("N")
+R = TypeVar("R")
+
+Task = Generator[Any, Any, R]
+
+# Marks that the results of the children of the node under it are ready
+_COMBINE = object()
+
+
+def fold(
+    root: N,
+    combine: Callable[[N, list[R]], R],
+    children: Callable[[N], Sequence[N]],
+) -> R:
+    # `combine(node, results)` gets the results of the children of `node`
+    # in order
+    results: list[R] = []
+    counts: list[int] = []
+    stack: list[Any] = [root]
+    while stack:
+        node = stack.pop()
+        if node is _COMBINE:
+            node = stack.pop()
+            start = len(results) - counts.pop()
+            value = combine(node, results[start:])
+            del results[start:]
+            results.append(value)
+            continue
+        inner = children(node)
+        if not inner:
+            results.append(combine(node, []))
+            continue
+        counts.append(len(inner))
+        stack.append(node)
+        stack.append(_COMBINE)
+        stack.extend(reversed(inner))
+    return results[0]
+
+
+def preorder(root: N, children: Callable[[N], Sequence[N]]) -> Iterator[N]:
+    stack = [root]
+    pop, extend = stack.pop, stack.extend
+    while stack:
+        node = pop()
+        yield node
+        inner = children(node)
+        if inner:
+            extend(reversed(inner))
+
+
+def run(task: Task[R] | R) -> R:
+    # Runs `task` and the tasks it yields, one generator per pending call
+    # on a list instead of a frame on the Python stack
+    if not isinstance(task, GeneratorType):
+        return task
+    tasks: list[Task[Any]] = [task]
+    send, push, pop = task.send, tasks.append, tasks.pop
+    value: Any = None
+    while True:
+        try:
+            inner = send(value)
+        except StopIteration as stop:
+            pop()
+            if not tasks:
+                return stop.value
+            send = tasks[-1].send
+            value = stop.value
+            continue
+        if type(inner) is not GeneratorType:
+            value = inner
+            continue
+        push(inner)
+        send = inner.send
+        value = None
@@ -0,0 +1,356 @@
+import gc
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from lark import Lark
+
+from STLC.Parser.Lexer import lex
+from STLC.Parser.Parser import (
+    load_grammar,
+    load_fused_grammar,
+    parse_string,
+    parse_string_to_ast,
+    ParserError,
+)
+from STLC.Parser.Transformation import ToAST
+from STLC.Parser.AST import document
+from STLC.Pretty import render
+from STLC.Range import LineIndex
+from STLC.SymbolTable import SymbolTable
+from STLC.Checker.Engine import CheckEngine, CheckVisitor
+from STLC.Checker.Checks import (
+    non_type_checks,
+    DeclarationPairingCheck,
+    MultipleDeclarationOrDefinitionCheck,
+    UndefinedVariableCheck,
+    ShadowingCheck,
+)
+from STLC.Checker.TypeChecker import type_checks
+from benchmarks.Generators import GENERATORS
+
+# Times every stage of the pipeline over the synthetic programs of
+# `benchmarks.Generators`, and the peak memory allocated by each one.
+# Every program is run at its size and at `GROWTH` times it, the report
+# shows how much slower every stage gets: about `GROWTH` for a linear
+# stage, its square for a quadratic one.
+#
+#   python -m benchmarks.Benchmark                  run and print the results
+#   python -m benchmarks.Benchmark --save NAME      store them as a baseline
+#   python -m benchmarks.Benchmark --compare NAME   compare with a baseline
+#
+# Baselines are JSON files in `benchmarks/baselines`, only comparable
+# with runs on the same machine, so they aren't committed. A stage is
+# reported as a regression when it is slower than the baseline by more
+# than the threshold (and by at least half a millisecond), and
+# `--compare` exits with 1 if any is.
+#
+# A stage is timed `repeat` times and the fastest run is kept, memory is
+# measured on a separate run with `tracemalloc` since tracing slows the
+# code down.
+
+BASELINES = Path(__file__).parent / "baselines"
+RESULTS_VERSION = 2
+
+GROWTH = 4
+
+# Differences smaller than this are noise whatever the ratio
+MIN_DIFFERENCE = 0.0005
+
+
+@dataclass
+class Measurement:
+    seconds: float
+    peak_bytes: int
+
+
+def measure(function: Callable[[], Any], repeat: int) -> Measurement:
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        function()
+        peak = tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return Measurement(min(times), peak)
+
+
+def check_with(visitor: type[CheckVisitor], symbols: SymbolTable) -> list[Any]:
+    return CheckEngine([visitor()]).run_symbols(symbols)
+
+
+CHECKS: list[type[CheckVisitor]] = [
+    DeclarationPairingCheck,
+    MultipleDeclarationOrDefinitionCheck,
+    UndefinedVariableCheck,
+    ShadowingCheck,
+]
+
+
+def benchmark_program(
+    lark: Lark, fused: Lark, text: str, repeat: int
+) -> dict[str, Measurement]:
+    results: dict[str, Measurement] = dict()
+    tree = parse_string(lark, text)
+    if isinstance(tree, ParserError):
+        raise ValueError(f"The generated program doesn't parse: {tree}")
+    results["lex"] = measure(lambda: lex(text), repeat)
+    results["parse_string"] = measure(lambda: parse_string(lark, text), repeat)
+    statements = ToAST(LineIndex(text)).transform(tree)
+    results["ToAST.transform"] = measure(
+        lambda: ToAST(LineIndex(text)).transform(tree), repeat
+    )
+    results["parse_string_to_ast"] = measure(
+        lambda: parse_string_to_ast(fused, text), repeat
+    )
+    symbols = SymbolTable(statements)
+    results["SymbolTable"] = measure(lambda: SymbolTable(statements), repeat)
+    for check in CHECKS:
+        results[check.__name__] = measure(
+            lambda: check_with(check, symbols), repeat
+        )
+    results["non_type_checks"] = measure(
+        lambda: non_type_checks(statements, symbols), repeat
+    )
+    results["type_checks"] = measure(
+        lambda: type_checks(statements, symbols), repeat
+    )
+    results["pretty"] = measure(
+        lambda: [statement.pretty() for statement in statements], repeat
+    )
+    results["render"] = measure(
+        lambda: [render(document(i), io.StringIO()) for i in statements],
+        repeat,
+    )
+    return results
+
+
+def run(
+    repeat: int, scale: float, only: Optional[list[str]] = None
+) -> dict[str, Measurement]:
+    # "program:size/stage" -> measurement
+    results: dict[str, Measurement] = dict()
+    results["grammar/load_grammar"] = measure(load_grammar, repeat)
+    lark = load_grammar()
+    if not isinstance(lark, Lark):
+        raise ValueError(f"Can't load the grammar: {lark}")
+    fused = load_fused_grammar()
+    if not isinstance(fused, Lark):
+        raise ValueError(f"Can't load the grammar: {fused}")
+    for name, (generator, size) in GENERATORS.items():
+        if only and name not in only:
+            continue
+        size = max(1, int(size * scale))
+        for program_size in (size, size * GROWTH):
+            text = generator(program_size, 0)
+            for stage, measurement in benchmark_program(
+                lark, fused, text, repeat
+            ).items():
+                results[f"{name}:{program_size}/{stage}"] = measurement
+    return results
+
+
+def growth(results: dict[str, Measurement]) -> dict[str, float]:
+    # For every stage of a program at `GROWTH` times its size, how many
+    # times slower it is than at its size
+    ratios: dict[str, float] = dict()
+    for key, value in results.items():
+        program, _, stage = key.partition("/")
+        name, _, size = program.partition(":")
+        if not size or int(size) % GROWTH:
+            continue
+        smaller = results.get(f"{name}:{int(size) // GROWTH}/{stage}", None)
+        if smaller is not None and smaller.seconds:
+            ratios[key] = value.seconds / smaller.seconds
+    return ratios
+
+
+def to_json(
+    results: dict[str, Measurement], repeat: int, scale: float
+) -> dict[str, Any]:
+    return {
+        "version": RESULTS_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "scale": scale,
+        "results": {key: asdict(value) for key, value in results.items()},
+    }
+
+
+def from_json(data: dict[str, Any]) -> dict[str, Measurement]:
+    return {key: Measurement(**value) for key, value in data["results"].items()}
+
+
+def pretty_bytes(size: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def report(results: dict[str, Measurement]) -> str:
+    width = max(map(len, results))
+    ratios = growth(results)
+    lines = [
+        f"{'stage':<{width}}  {'time':>10}  {'peak memory':>12}"
+        f"  {'growth':>6}"
+    ]
+    for key, value in results.items():
+        ratio = f"{ratios[key]:>6.1f}" if key in ratios else f"{'':>6}"
+        lines.append(
+            f"{key:<{width}}  {value.seconds * 1000:>8.2f}ms"
+            f"  {pretty_bytes(value.peak_bytes):>12}  {ratio}"
+        )
+    return "\n".join(lines)
+
+
+def comparison(
+    baseline: dict[str, Measurement],
+    results: dict[str, Measurement],
+    threshold: float,
+) -> tuple[str, int]:
+    # The report and the number of regressions
+    width = max(map(len, results))
+    lines = [
+        f"{'stage':<{width}}  {'baseline':>10}  {'current':>10}  {'ratio':>6}"
+        f"  {'memory ratio':>12}"
+    ]
+    regressions = 0
+    for key, value in results.items():
+        old = baseline.get(key, None)
+        if old is None:
+            lines.append(
+                f"{key:<{width}}  {'-':>10}  {value.seconds * 1000:>8.2f}ms"
+                "  (new)"
+            )
+            continue
+        ratio = value.seconds / old.seconds if old.seconds else 1.0
+        memory = value.peak_bytes / old.peak_bytes if old.peak_bytes else 1.0
+        mark = ""
+        significant = abs(value.seconds - old.seconds) >= MIN_DIFFERENCE
+        if significant and ratio > 1 + threshold:
+            mark = "  slower"
+            regressions += 1
+        elif significant and ratio < 1 / (1 + threshold):
+            mark = "  faster"
+        if memory > 1 + threshold:
+            mark += "  more memory"
+        lines.append(
+            f"{key:<{width}}  {old.seconds * 1000:>8.2f}ms"
+            f"  {value.seconds * 1000:>8.2f}ms  {ratio:>6.2f}"
+            f"  {memory:>12.2f}{mark}"
+        )
+    missing = sum(1 for key in baseline if key not in results)
+    if missing:
+        lines.append(f"{missing} stages of the baseline were not run.")
+    lines.append(
+        f"{regressions} of {len(results)} stages slower than the baseline"
+        f" by more than {threshold:.0%}."
+    )
+    return "\n".join(lines), regressions
+
+
+def main() -> int:
+    parser = ArgumentParser(
+        prog="python -m benchmarks.Benchmark",
+        description="Time every stage of the pipeline over synthetic programs",
+    )
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=5,
+        metavar="N",
+        help="Runs of every stage, the fastest is kept (default: 5)",
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        metavar="F",
+        help="Multiplies the size of every generated program (default: 1)",
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=list(GENERATORS),
+        metavar="PROGRAM",
+        help="Run only these programs, of " + ", ".join(GENERATORS),
+    )
+    parser.add_argument(
+        "--save", type=str, metavar="NAME", help="Store the results as NAME"
+    )
+    parser.add_argument(
+        "--compare",
+        type=str,
+        metavar="NAME",
+        help="Compare the results with the baseline NAME",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        metavar="F",
+        help="Slowdown reported as a regression (default: 0.25, 25%%)",
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="Print the results as JSON"
+    )
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error("-r/--repeat must be at least 1")
+    baseline = None
+    if args.compare is not None:
+        path = BASELINES / f"{args.compare}.json"
+        try:
+            with open(path, "r") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            print(f"Can't read the baseline: {path}")
+            return 1
+        if data.get("version") != RESULTS_VERSION:
+            print(f"The baseline {path} is of another version, save it again")
+            return 1
+        baseline = from_json(data)
+        if data.get("scale") != args.scale:
+            print(
+                f"The baseline was run with --scale {data.get('scale')},"
+                " the sizes of the programs don't match"
+            )
+    results = run(args.repeat, args.scale, args.only)
+    data = to_json(results, args.repeat, args.scale)
+    if args.json:
+        print(json.dumps(data, indent=2))
+    elif baseline is None:
+        print(report(results))
+    if args.save is not None:
+        BASELINES.mkdir(exist_ok=True)
+        with open(BASELINES / f"{args.save}.json", "w") as file:
+            json.dump(data, file, indent=2)
+            file.write("\n")
+    if baseline is not None:
+        text, regressions = comparison(baseline, results, args.threshold)
+        print(text)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+from random import Random
+from typing import Callable
+
+# Synthetic STLC programs for the benchmarks. Every generator is
+# deterministic for a given size and seed, and the programs are well typed,
+# so the checks do the work of a clean run instead of stopping early.
+
+
+def name(prefix: str, index: int) -> str:
+    # variables can only have letters and `_`
+    letters = []
+    while True:
+        index, digit = divmod(index, 26)
+        letters.append(chr(ord("a") + digit))
+        if index == 0:
+            break
+    return prefix + "_" + "".join(reversed(letters))
+
+
+def arrow(arguments: int, result: str = "Int") -> str:
+    return " -> ".join(["Int"] * arguments + [result])
+
+
+def many_definitions(size: int, seed: int = 0) -> str:
+    # `size` declared definitions, each one calling some of the previous
+    random = Random(seed)
+    first = name("f", 0)
+    out = [f"{first} : Int -> Int;", f"{first} x = x + 1;"]
+    for i in range(1, size):
+        current = name("f", i)
+        callee = name("f", random.randrange(i))
+        other = name("f", random.randrange(i))
+        out.append(f"{current} : Int -> Int;")
+        out.append(
+            f"{current} x = if x <= {i} then {callee} (x * 2)"
+            f" else {other} (x - {random.randrange(1, 10)}) + {i};"
+        )
+    return "\n".join(out)
+
+
+def nested_lambdas(size: int, seed: int = 0) -> str:
+    # a definition made of `size` nested lambdas
+    arguments = " -> ".join(f"\\ {name('x', i)}" for i in range(size))
+    body = " + ".join(name("x", i) for i in range(0, size, max(1, size // 8)))
+    return f"lambdas : {arrow(size)};\nlambdas = {arguments} -> {body};"
+
+
+def nested_ifs(size: int, seed: int = 0) -> str:
+    # `size` ifs nested in the else branch, and as many in the conditions
+    random = Random(seed)
+    expression = "x"
+    for i in range(size):
+        condition = (
+            f"(if x == {i} then True else x <= {random.randrange(size)})"
+        )
+        expression = f"if {condition} then {i} else {expression}"
+    return f"nested : Int -> Int;\nnested x = {expression};"
+
+
+def operator_chain(size: int, seed: int = 0) -> str:
+    # a single expression with `size` operators
+    random = Random(seed)
+    operands = [f"x" if random.random() < 0.5 else str(i) for i in range(size)]
+    operators = [random.choice(["+", "-", "*"]) for _ in range(size)]
+    chain = " ".join(f"{a} {o}" for a, o in zip(operands, operators))
+    return f"chain : Int -> Int;\nchain x = {chain} x;"
+
+
+def wide_application(size: int, seed: int = 0) -> str:
+    # a function of `size` arguments applied to all of them
+    random = Random(seed)
+    parameters = " ".join(name("a", i) for i in range(size))
+    arguments = " ".join(
+        f"(x + {random.randrange(100)})" if i % 2 else "x" for i in range(size)
+    )
+    return (
+        f"wide : {arrow(size)};\nwide {parameters} = {name('a', 0)};\n"
+        f"call : Int -> Int;\ncall x = wide {arguments};"
+    )
+
+
+# name -> generator and the size used by default, the benchmark runs every
+# program at this size and at 4 times it
+GENERATORS: dict[str, tuple[Callable[[int, int], str], int]] = {
+    "many_definitions": (many_definitions, 500),
+    "nested_lambdas": (nested_lambdas, 1000),
+    "nested_ifs": (nested_ifs, 500),
+    "operator_chain": (operator_chain, 2000),
+    "wide_application": (wide_application, 1000),
+}
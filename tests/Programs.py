@@ -0,0 +1,45 @@
+from random import Random
+
+# Random programs for the differential tests. They use few names, so
+# shadowing, recursion, undefined variables and ill-typed expressions are
+# common: every error path of the checks and the evaluators is taken.
+
+NAMES = ["a", "b", "f", "g", "x", "y"]
+ATOMS = [*NAMES, "0", "1", "2", "True", "False"]
+OPERATORS = ["+", "-", "*", "/", "<=", "==", "&", "|"]
+
+
+def expression(random: Random, depth: int) -> str:
+    choice = random.random()
+    if depth <= 0 or choice < 0.25:
+        return random.choice(ATOMS)
+    if choice < 0.4:
+        return f"(\\ {random.choice(NAMES)} -> {expression(random, depth - 1)})"
+    if choice < 0.55:
+        return (
+            f"(if {expression(random, depth - 1)}"
+            f" then {expression(random, depth - 1)}"
+            f" else {expression(random, depth - 1)})"
+        )
+    if choice < 0.75:
+        return (
+            f"({expression(random, depth - 1)}"
+            f" {random.choice(OPERATORS)} {expression(random, depth - 1)})"
+        )
+    if choice < 0.8:
+        return f"({expression(random, depth - 1)} : Int)"
+    return f"({expression(random, depth - 1)} {expression(random, depth - 1)})"
+
+
+def statement(random: Random, depth: int) -> str:
+    name = random.choice(NAMES[:4])
+    if random.random() < 0.3:
+        return f"{name} : {random.choice(['Int', 'Bool', 'Int -> Int'])};"
+    arguments = " ".join(
+        random.choice(NAMES) for _ in range(random.randint(0, 2))
+    )
+    return f"{name} {arguments} = {expression(random, depth)};"
+
+
+def program(random: Random, statements: int = 8, depth: int = 4) -> list[str]:
+    return [statement(random, depth) for _ in range(statements)]
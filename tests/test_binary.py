@@ -0,0 +1,89 @@
+from random import Random
+
+import pytest
+
+from STLC.Parser.Parser import load_fused_grammar, parse_string_to_ast
+from STLC.Parser.AST import Definition, UnitLiteral, children
+from STLC.Parser.Binary import dumps, loads, BinaryAST, BinaryLoadError
+from STLC.Range import LineIndex, Range
+from STLC.Traversal import preorder
+from tests.Programs import program
+
+EVERY_KIND = """
+u : Unit -> (Int -> Bool) -> Int;
+u a b = (a : Unit) 123456789012345678901234567890 (if True then -5 else 3 / 2);
+v = \\ x -> \\ y -> (x <= y) | False;
+"""
+
+
+@pytest.fixture(scope="module")
+def lark():
+    return load_fused_grammar()
+
+
+def nodes(statements):
+    # Every node as its kind, its name, value or operator and its range,
+    # without comparing the trees recursively
+    return [
+        (
+            type(node).__name__,
+            getattr(node, "name", None),
+            getattr(node, "value", None),
+            getattr(node, "operator", None),
+            node._range.position_start,
+            node._range.position_end,
+            node._range.line_start,
+            node._range.column_start,
+        )
+        for statement in statements
+        for node in preorder(statement, children)
+    ]
+
+
+def round_trip(statements, lines: LineIndex) -> BinaryAST:
+    loaded = loads(dumps(statements, lines, bytes(range(32))))
+    assert isinstance(loaded, BinaryAST)
+    assert loaded.source_hash == bytes(range(32))
+    assert list(loaded.lines.line_starts) == list(lines.line_starts)
+    assert loaded.lines.length == lines.length
+    assert nodes(loaded.statements) == nodes(statements)
+    return loaded
+
+
+def parse(lark, text: str):
+    statements = parse_string_to_ast(lark, text)
+    assert isinstance(statements, list)
+    return statements, statements[0]._range.lines
+
+
+def test_every_kind(lark):
+    statements, lines = parse(lark, EVERY_KIND)
+    unit = Definition(
+        Range(0, 1, lines), "w", [], UnitLiteral(Range(0, 1, lines))
+    )
+    round_trip([*statements, unit], lines)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_random_programs(lark, seed):
+    text = "\n".join(program(Random(seed), 30))
+    round_trip(*parse(lark, text))
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "f = " + "\\ x -> " * 5000 + "x;",
+        "f = " + "g (" * 5000 + "x" + ")" * 5000 + ";",
+        "f = " + "1 + (" * 5000 + "x" + ")" * 5000 + ";",
+    ],
+    ids=["lambdas", "arguments", "operators"],
+)
+def test_deep_trees(lark, text):
+    round_trip(*parse(lark, text))
+
+
+def test_truncated_buffers_are_rejected(lark):
+    data = dumps(*parse(lark, EVERY_KIND))
+    for size in (0, 10, len(data) // 2, len(data) - 1):
+        assert isinstance(loads(data[:size]), BinaryLoadError)
@@ -0,0 +1,123 @@
+from random import Random
+
+import pytest
+
+from STLC.Parser.Parser import (
+    load_fused_grammar,
+    parse_string_to_ast,
+    ParserError,
+)
+from STLC.Checker.Checks import non_type_checks
+from STLC.Checker.TypeChecker import type_checks
+from STLC.Checker.Incremental import IncrementalChecker, CheckCache
+from STLC.Parser.AST import children
+from STLC.Traversal import preorder
+from tests.Programs import program, statement
+
+
+@pytest.fixture(scope="module")
+def lark():
+    return load_fused_grammar()
+
+
+def full_checks(lark, text: str):
+    statements = parse_string_to_ast(lark, text)
+    if isinstance(statements, ParserError):
+        return ("parse error", str(statements.exception))
+    return (
+        [i.pretty() for i in non_type_checks(statements)],
+        [i.pretty() for i in type_checks(statements)],
+    )
+
+
+def incremental_checks(checker: IncrementalChecker, text: str):
+    result = checker.check(text)
+    if isinstance(result, ParserError):
+        return ("parse error", str(result.exception))
+    return (
+        [i.pretty() for i in result.errors],
+        [i.pretty() for i in result.type_errors],
+    )
+
+
+def ranges(statements):
+    return [
+        (
+            type(node).__name__,
+            node._range.position_start,
+            node._range.position_end,
+        )
+        for statement in statements
+        for node in preorder(statement, children)
+    ]
+
+
+def edit(random: Random, statements: list[str]) -> None:
+    # change, insert, delete or move statements, or only shift them
+    choice = random.random()
+    index = random.randrange(len(statements))
+    if choice < 0.3:
+        statements[index] = statement(random, 3)
+    elif choice < 0.5:
+        statements.insert(index, statement(random, 3))
+    elif choice < 0.65 and len(statements) > 1:
+        del statements[index]
+    elif choice < 0.75:
+        statements.insert(index, statements.pop())
+    elif choice < 0.9:
+        statements.insert(0, "# a comment")
+    else:
+        statements[index] = statements[index].replace(";", " ;", 1)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_incremental_checks_equal_full_checks(lark, tmp_path, seed):
+    random = Random(seed)
+    path = tmp_path / "checks"
+    statements = program(random, 20)
+    if seed % 2:
+        statements[:0] = ["f : Int -> Int;", "f x = x + g;", "g : Int;"]
+    # a checker kept between edits reuses its nodes, a new one loads the
+    # cache saved by the previous run
+    kept = IncrementalChecker(lark, CheckCache(path))
+    for _ in range(8):
+        text = "\n".join(statements)
+        expected = full_checks(lark, text)
+        assert incremental_checks(kept, text) == expected
+        # the kept nodes are moved where a new parse puts them
+        full = parse_string_to_ast(lark, text)
+        if not isinstance(full, ParserError):
+            assert ranges(kept.check(text).statements) == ranges(full)
+        kept.cache.save()
+        fresh = IncrementalChecker(lark, CheckCache(path))
+        assert incremental_checks(fresh, text) == expected
+        edit(random, statements)
+
+
+def test_only_changed_definitions_are_checked_again(lark):
+    checker = IncrementalChecker(lark)
+    text = "\n".join(
+        [
+            "f : Int -> Int;",
+            "f x = x + g;",
+            "g : Int;",
+            "g = 2;",
+            "h : Int;",
+            "h = 3;",
+        ]
+    )
+    first = checker.check(text)
+    assert not isinstance(first, ParserError)
+    assert first.checked == 3 and first.reused == 0
+
+    second = checker.check("# moved\n" + text.replace("g = 2;", "g = 4;"))
+    assert not isinstance(second, ParserError)
+    # f uses g, but only the type and count of its definitions, that
+    # didn't change: only g is checked again
+    assert second.changed == {"g"}
+    assert second.affected == {"f", "g"}
+    assert second.checked == 1 and second.reused == 2
+
+    third = checker.check(text.replace("g : Int;", "g : Bool;"))
+    assert not isinstance(third, ParserError)
+    assert third.checked == 2 and third.reused == 1
@@ -0,0 +1,93 @@
+import io
+import json
+
+from STLC.CMD.LanguageServer import (
+    LanguageServer,
+    read_message,
+    PARSE_ERROR,
+    INVALID_PARAMS,
+    INVALID_REQUEST,
+)
+
+
+def frame(body: bytes) -> bytes:
+    return f"Content-Length: {len(body)}\r\n\r\n".encode("ascii") + body
+
+
+def session(*messages) -> tuple[int, list]:
+    # `bytes` are sent as they are, anything else as JSON
+    input = b"".join(
+        frame(i if isinstance(i, bytes) else json.dumps(i).encode("utf8"))
+        for i in messages
+    )
+    output = io.BytesIO()
+    code = LanguageServer(io.BytesIO(input), output).run()
+    output.seek(0)
+    answers = []
+    while (answer := read_message(output)) is not None:
+        answers.append(answer)
+    return code, answers
+
+
+INITIALIZE = {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}}
+SHUTDOWN = {"jsonrpc": "2.0", "id": 9, "method": "shutdown"}
+EXIT = {"jsonrpc": "2.0", "method": "exit"}
+URI = "file:///a.stlc"
+
+
+def test_malformed_messages_are_answered():
+    code, answers = session(
+        INITIALIZE,
+        b"{not json",
+        b"[1, 2]",
+        {"jsonrpc": "2.0", "id": 2, "method": "textDocument/hover"},
+        {
+            "jsonrpc": "2.0",
+            "id": 3,
+            "method": "textDocument/hover",
+            "params": {"textDocument": {}},
+        },
+        SHUTDOWN,
+        EXIT,
+    )
+    assert code == 0
+    errors = [(i["id"], i["error"]["code"]) for i in answers if "error" in i]
+    assert errors == [
+        (None, PARSE_ERROR),
+        (None, INVALID_REQUEST),
+        (2, INVALID_PARAMS),
+        (3, INVALID_PARAMS),
+    ]
+    assert answers[-1] == {"jsonrpc": "2.0", "id": 9, "result": None}
+
+
+def test_malformed_notifications_are_ignored():
+    code, answers = session(
+        INITIALIZE,
+        {"jsonrpc": "2.0", "method": "textDocument/didOpen", "params": {}},
+        {
+            "jsonrpc": "2.0",
+            "method": "textDocument/didOpen",
+            "params": {"textDocument": {"uri": URI, "text": "a = 1;"}},
+        },
+        {
+            "jsonrpc": "2.0",
+            "method": "textDocument/didChange",
+            "params": {"textDocument": {"uri": URI}},
+        },
+        {
+            "jsonrpc": "2.0",
+            "id": 2,
+            "method": "textDocument/hover",
+            "params": {
+                "textDocument": {"uri": URI},
+                "position": {"line": 0, "character": 0},
+            },
+        },
+        SHUTDOWN,
+        EXIT,
+    )
+    assert code == 0
+    assert not [i for i in answers if "error" in i]
+    hover = [i for i in answers if i.get("id") == 2][0]
+    assert hover["result"]["contents"]["value"] == "a (not declared)"
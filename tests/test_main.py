@@ -0,0 +1,32 @@
+import sys
+
+import pytest
+
+from STLC.CMD.Main import generate_arg_parser
+
+
+def parse_arguments(monkeypatch, *arguments: str):
+    monkeypatch.setattr(sys, "argv", ["stlc", *arguments])
+    return generate_arg_parser()
+
+
+@pytest.mark.parametrize(
+    "arguments",
+    [
+        ["-i", "a = 1;", "--incremental"],
+        ["-f", "a.stlc", "--incremental"],
+        ["-i", "a = 1;", "--ast-cache"],
+        ["-f", "a.stlc", "--ast-cache"],
+        ["-i", "a = 1;", "-e", "a", "--stop-after", "check"],
+        ["-i", "a = 1;", "-O", "unknown"],
+    ],
+)
+def test_invalid_combinations_are_rejected(monkeypatch, arguments):
+    with pytest.raises(SystemExit) as exit:
+        parse_arguments(monkeypatch, *arguments)
+    assert exit.value.code == 2
+
+
+def test_caches_are_accepted_with_paths(monkeypatch):
+    args = parse_arguments(monkeypatch, "--incremental", "--ast-cache", "dir")
+    assert args.incremental and args.ast_cache and args.paths == ["dir"]
@@ -0,0 +1,48 @@
+from random import Random
+
+import pytest
+
+from STLC.Parser.Parser import load_fused_grammar, parse_string_to_ast
+from STLC.Parser.AST import Definition
+from STLC.SymbolTable import SymbolTable
+from STLC.Evaluator.Evaluator import (
+    Evaluator,
+    EvaluationError,
+    StepLimitExceeded,
+    pretty_value,
+)
+from STLC.Optimizer import optimize
+from tests.Programs import program
+
+# Bounds the programs that don't terminate
+MAX_STEPS = 10_000
+
+
+@pytest.fixture(scope="module")
+def lark():
+    return load_fused_grammar()
+
+
+def outcome(statements, name: str):
+    # The rewrites move the nodes errors point to, only the kind of error
+    # is compared
+    result = Evaluator(SymbolTable(statements), MAX_STEPS).evaluate_global(name)
+    if isinstance(result, EvaluationError):
+        return type(result).__name__
+    return pretty_value(result)
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_optimized_programs_evaluate_the_same(lark, seed):
+    statements = parse_string_to_ast(lark, "\n".join(program(Random(seed), 10)))
+    whole, _ = optimize(statements)
+    names = sorted({i.name for i in statements if isinstance(i, Definition)})
+    for name in names:
+        expected = outcome(statements, name)
+        if expected == StepLimitExceeded.__name__:
+            continue
+        # the optimizer never adds function calls, so an optimized program
+        # stops within the same limit
+        assert outcome(whole, name) == expected
+        entry, _ = optimize(statements, name)
+        assert outcome(entry, name) == expected
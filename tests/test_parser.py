@@ -0,0 +1,58 @@
+import io
+from random import Random
+
+import pytest
+
+import STLC.Parser.Parser as Parser
+from STLC.Parser.Parser import (
+    load_fused_grammar,
+    parse_string_to_ast,
+    parse_stream,
+    ParserError,
+)
+from STLC.Parser.AST import children
+from STLC.Traversal import preorder
+from STLC.CMD.Batch import parser_error_message
+from tests.Programs import program
+
+
+@pytest.fixture(scope="module")
+def lark():
+    return load_fused_grammar()
+
+
+def outcome(result):
+    if isinstance(result, ParserError):
+        return parser_error_message(result)
+    return [
+        (type(node).__name__, node.pretty(), node._range.position_start)
+        for statement in result
+        for node in preorder(statement, children)
+    ]
+
+
+def parses(lark, text: str):
+    stream = parse_stream(lark, io.StringIO(text))
+    return (
+        outcome(parse_string_to_ast(lark, text)),
+        [outcome(i if isinstance(i, ParserError) else [i]) for i in stream],
+    )
+
+
+def sources():
+    random = Random(0)
+    for _ in range(10):
+        statements = program(random, 10)
+        yield "\n".join(statements)
+        # and a syntax error in one of them
+        index = random.randrange(len(statements))
+        statements[index] = statements[index].replace("=", "= =", 1)
+        yield "\n".join(statements)
+
+
+def test_public_api_fallback_parses_the_same(lark, monkeypatch):
+    fast = [parses(lark, text) for text in sources()]
+    # what the parsers do when the internals of lark they read are missing
+    monkeypatch.setattr(Parser, "Shift", None)
+    fallback = [parses(lark, text) for text in sources()]
+    assert fallback == fast
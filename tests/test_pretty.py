@@ -0,0 +1,32 @@
+import pytest
+
+from STLC.Parser.Parser import load_fused_grammar, parse_string_to_ast
+from STLC.Parser.AST import document
+from STLC.Pretty import render_string
+
+DEPTH = 2000
+
+
+@pytest.fixture(scope="module")
+def lark():
+    return load_fused_grammar()
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "f = " + "\\ x -> " * DEPTH + "x;",
+        "f = " + "g (" * DEPTH + "x" + ")" * DEPTH + ";",
+        "f = " + "1 + (" * DEPTH + "x" + ")" * DEPTH + ";",
+    ],
+    ids=["lambdas", "arguments", "operators"],
+)
+def test_deep_documents_render_in_linear_size(lark, source):
+    [definition] = parse_string_to_ast(lark, source)
+    for width in (20, 80):
+        rendered = render_string(document(definition), width)
+        # no line is indented past half the width
+        lines = rendered.split("\n")
+        assert max(len(i) - len(i.lstrip(" ")) for i in lines) <= width // 2
+        [again] = parse_string_to_ast(lark, rendered)
+        assert again.pretty() == definition.pretty()
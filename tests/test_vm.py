@@ -0,0 +1,62 @@
+from random import Random
+
+import pytest
+
+from STLC.Parser.Parser import load_fused_grammar, parse_string_to_ast
+from STLC.Parser.AST import Definition
+from STLC.SymbolTable import SymbolTable
+from STLC.Evaluator.Evaluator import Evaluator, EvaluationError, pretty_value
+from STLC.Evaluator.VM import VM, pretty_vm_value
+from tests.Programs import program
+
+MAX_STEPS = 10_000
+
+COUNTDOWN = """
+count n = if n == 0 then 0 else count (n - 1);
+loop n = loop n;
+even n = if n == 0 then True else odd (n - 1);
+odd n = if n == 0 then False else even (n - 1);
+counted = count 100000;
+looped = loop 1;
+parity = even 100001;
+"""
+
+
+@pytest.fixture(scope="module")
+def lark():
+    return load_fused_grammar()
+
+
+def outcomes(statements, name: str) -> tuple[str, str]:
+    # The values and error messages of both evaluators, with locations
+    cek = Evaluator(SymbolTable(statements), MAX_STEPS).evaluate_global(name)
+    vm = VM(SymbolTable(statements), None, MAX_STEPS).evaluate_global(name)
+    return (
+        cek.pretty() if isinstance(cek, EvaluationError) else pretty_value(cek),
+        vm.pretty() if isinstance(vm, EvaluationError) else pretty_vm_value(vm),
+    )
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_vm_and_cek_evaluate_the_same(lark, seed):
+    statements = parse_string_to_ast(lark, "\n".join(program(Random(seed), 10)))
+    names = sorted({i.name for i in statements if isinstance(i, Definition)})
+    for name in names:
+        cek, vm = outcomes(statements, name)
+        assert vm == cek
+
+
+def test_loops_and_step_limits(lark):
+    statements = parse_string_to_ast(lark, COUNTDOWN)
+    limits = [
+        Evaluator(SymbolTable(statements), 200_000),
+        VM(SymbolTable(statements), None, 200_000),
+    ]
+    for evaluator in limits:
+        assert pretty_value(evaluator.evaluate_global("counted")) == "0"
+        assert pretty_value(evaluator.evaluate_global("parity")) == "False"
+        stopped = evaluator.evaluate_global("looped")
+        assert isinstance(stopped, EvaluationError)
+        assert stopped.pretty() == (
+            "The evaluation was stopped after 200000 function calls."
+        )